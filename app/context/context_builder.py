@@ -1,5 +1,6 @@
 import logging
 
+from app.context.token_budget import TokenBudget
 from app.models.game_session import GameSession
 from app.models.message import Message
 from app.models.session import Session
@@ -65,31 +66,36 @@ class ContextBuilder:
         self,
         game_session: GameSession,
         chat_history: list[Message],
+        budget: TokenBudget | None = None,
     ) -> str:
         """
         Builds the context that changes every turn (State, Narrative, Procedure).
         Order: World Index -> Active Quests -> Current Scene -> Character Sheet.
+        With a budget, each section is cut to its allocation and its size recorded.
         """
         sections = []
 
+        def fit(section: str, text: str) -> str:
+            return budget.fit(section, text) if budget else text
+
         # 1. World Index (The Directory)
-        index_text = self._build_entity_index(game_session.id)
+        index_text = fit("index", self._build_entity_index(game_session.id))
         if index_text:
             sections.append(self._wrap_section("REFERENCE INDEXES (truncated entries)", index_text))
 
         # 2. Active Quests
-        quests_text = self.state_builder.build_active_quests(game_session.id)
+        quests_text = fit("quests", self.state_builder.build_active_quests(game_session.id))
         if quests_text:
             sections.append(self._wrap_section("ACTIVE QUESTS", quests_text))
 
         # 3. Current Scene (Unified Spatial + Roster)
-        scene_text = self._build_scene_block(game_session.id)
+        scene_text = fit("scene", self._build_scene_block(game_session.id))
         if scene_text:
             sections.append(self._wrap_section("CURRENT SCENE", scene_text))
 
         # 4. Character Sheet (The Player's Personal Stats)
         if self.manifest:
-            char_text = self.state_builder.build_character_sheet(game_session.id, self.manifest)
+            char_text = fit("sheet", self.state_builder.build_character_sheet(game_session.id, self.manifest))
             if char_text:
                 sections.append(self._wrap_section("PLAYER CHARACTER STATE", char_text, lang="json"))
 
@@ -167,5 +173,18 @@ class ContextBuilder:
         return "\n\n".join(parts).strip()
 
     def get_truncated_history(self, session: Session, max_messages: int) -> list[Message]:
+        """
+        Returns the last max_messages of the session.
+        A stored session with no history in memory is read from the messages table: only the
+        tail rows are loaded, and the session becomes a window over them so that new messages
+        can be appended and persisted incrementally.
+        """
+        if session.id is not None and not session.history and self.db.messages:
+            total = self.db.messages.count(session.id)
+            session.history = self.db.messages.tail(session.id, max_messages)
+            session.history_offset = total - len(session.history)
+            session.mark_persisted()
+            return list(session.history)
+
         history = session.get_history()
         return history[-max_messages:] if len(history) > max_messages else history
@@ -0,0 +1,153 @@
+"""Rolling history compaction: old turns are sent to the LLM as their chronicler summaries."""
+
+from __future__ import annotations
+
+import logging
+import os
+from collections.abc import Callable
+
+from app.context.token_budget import TokenBudget
+from app.models.message import Message
+from app.models.session import Session
+from app.models.vocabulary import MessageRole
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TRIGGER_TOKENS = 8000
+DEFAULT_TARGET_TOKENS = 4000
+DEFAULT_SUMMARY_TOKENS = 1000
+DEFAULT_KEEP_TURNS = 2
+
+COMPACTED_HEADER = "# EARLIER TURNS (summarized)"
+
+
+def split_turns(messages: list[Message]) -> list[list[Message]]:
+    """
+    Groups messages into turns. A turn starts at a player (USER) message and holds every
+    assistant, tool and synthetic message up to the next one. Messages before the first
+    USER message (a window that starts mid-turn) form a leading partial turn.
+    """
+    turns: list[list[Message]] = []
+    for message in messages:
+        if message.role == MessageRole.USER or not turns:
+            turns.append([])
+        turns[-1].append(message)
+    return turns
+
+
+def turn_key(turn: list[Message]) -> str | None:
+    """The turn's id. Player messages carry none, so it is taken from the model's replies."""
+    return next((m.turn_id for m in turn if m.turn_id), None)
+
+
+class HistoryCompactor:
+    """
+    Once the verbatim part of the history passes `trigger_tokens`, its oldest complete turns are
+    folded into their turn_metadata summaries until it is back under `target_tokens`. The most
+    recent `keep_turns` turns are never folded. A turn without a summary (a lone player message,
+    a legacy row without a turn id, a failed chronicler call) is folded with no line of its own,
+    so it cannot hold back the turns after it.
+
+    The fold point is kept on the session (Session.compacted_seq) and only moves forward, so
+    each turn only considers the turns added since the last fold, and the prompt prefix stays
+    identical between folds. The stored transcript is untouched; only the request is compacted.
+    """
+
+    def __init__(
+        self,
+        trigger_tokens: int = DEFAULT_TRIGGER_TOKENS,
+        target_tokens: int = DEFAULT_TARGET_TOKENS,
+        summary_tokens: int = DEFAULT_SUMMARY_TOKENS,
+        keep_turns: int = DEFAULT_KEEP_TURNS,
+    ):
+        self.trigger_tokens = trigger_tokens
+        self.target_tokens = min(target_tokens, trigger_tokens)
+        self.summary_tokens = summary_tokens
+        self.keep_turns = max(keep_turns, 1)  # The last turn is the one being played
+
+    @classmethod
+    def from_env(cls) -> HistoryCompactor:
+        return cls(
+            trigger_tokens=int(os.environ.get("HISTORY_COMPACT_TRIGGER_TOKENS", DEFAULT_TRIGGER_TOKENS)),
+            target_tokens=int(os.environ.get("HISTORY_COMPACT_TARGET_TOKENS", DEFAULT_TARGET_TOKENS)),
+            summary_tokens=int(os.environ.get("HISTORY_SUMMARY_TOKENS", DEFAULT_SUMMARY_TOKENS)),
+            keep_turns=int(os.environ.get("HISTORY_KEEP_TURNS", DEFAULT_KEEP_TURNS)),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.trigger_tokens > 0
+
+    def compact(
+        self,
+        session: Session,
+        history: list[Message],
+        get_summaries: Callable[[list[str]], dict[str, str]],
+        budget: TokenBudget,
+    ) -> list[Message]:
+        """
+        Returns the history to send: a summary message for the folded turns in the window,
+        followed by the verbatim turns. `history` is the tail of the session's history and
+        `get_summaries` maps turn ids to their chronicler summaries. Advances session.compacted_seq.
+        """
+        if not self.enabled or not history:
+            return history
+
+        offset = session.next_index() - len(history)
+        start = self._live_start(session, history, offset)
+
+        turns = split_turns(history)
+        keys = [key for key in (turn_key(t) for t in turns[:-1]) if key]
+        summaries = get_summaries(keys) if keys else {}
+
+        # Fold more turns only if the verbatim part has grown past the trigger
+        live_turns = split_turns(history[start:])
+        sizes = [sum(budget.message_tokens(budget.compact_message(m)) for m in turn) for turn in live_turns]
+        live_tokens = sum(sizes)
+        if live_tokens > self.trigger_tokens:
+            for turn, size in zip(live_turns[: -self.keep_turns], sizes, strict=False):
+                if live_tokens <= self.target_tokens:
+                    break
+                start += len(turn)
+                live_tokens -= size
+            logger.info(
+                f"History compacted through message {offset + start} "
+                f"({live_tokens} verbatim tokens, trigger {self.trigger_tokens})"
+            )
+        session.compacted_seq = offset + start
+
+        if start == 0:
+            return history
+        live = history[start:]
+        block = self._summary_block([summaries.get(turn_key(t) or "", "") for t in split_turns(history[:start])], budget)
+        if not block:
+            return live
+        role = MessageRole.ASSISTANT if live[0].role == MessageRole.USER else MessageRole.USER
+        return [Message(role=role, content=block), *live]
+
+    def _live_start(self, session: Session, history: list[Message], offset: int) -> int:
+        """Index in `history` of the first verbatim message, from the session's fold point."""
+        local = session.compacted_seq - offset
+        if local <= 0:
+            return 0
+        # The history was rewound (undo, reroll, edit) to before the fold point: start over
+        if local >= len(history) or history[local].role != MessageRole.USER:
+            return 0
+        return local
+
+    def _summary_block(self, summaries: list[str], budget: TokenBudget) -> str:
+        """Folded turn summaries, oldest first, keeping the newest that fit in summary_tokens."""
+        lines: list[str] = []
+        remaining = self.summary_tokens - budget.count(COMPACTED_HEADER)
+        for summary in reversed(summaries):
+            if not summary:
+                continue
+            line = f"- {summary.strip()}"
+            tokens = budget.count(line) + 1
+            if tokens > remaining:
+                break
+            lines.append(line)
+            remaining -= tokens
+        if not lines:
+            return ""
+        return "\n".join([COMPACTED_HEADER, *reversed(lines)])
@@ -1,12 +1,10 @@
-import functools
 import logging
-import re
+from collections import defaultdict
+from dataclasses import dataclass, field, replace
 from datetime import datetime
 from typing import Any
 
-import nltk
-from fastembed.rerank.cross_encoder import TextCrossEncoder
-
+from app.context.retrieval_engine import RetrievalEngine
 from app.models.message import Message
 from app.models.vocabulary import WORLD_GEN_TAG, MemoryKind
 
@@ -20,73 +18,45 @@ DB_FETCH_LIMIT_EPISODIC = 50
 # RRF and Reranking Constants
 RRF_K = 60
 RERANKER_TOP_N = 30
-RERANKER_MODEL = "Xenova/ms-marco-MiniLM-L-6-v2"
 
 # Tags that are applied universally and provide zero discriminative value for retrieval
 NON_DISCRIMINATIVE_TAGS = {WORLD_GEN_TAG}
 
 
+@dataclass
+class RetrievalCandidates:
+    """Fused but not yet reranked candidates of one retrieval pass, best first per kind."""
+
+    session_id: int
+    query_text: str  # FTS keywords; also the rerank query
+    history_text: str  # History part of a passive query (last AI message)
+    codex: dict[MemoryKind, list[tuple[int, Any]]]
+    episodic: list[tuple[int, Any]]
+    budgets: dict[MemoryKind, int]
+    episodic_limit: int
+    limit: int | None = None
+    include_episodic: bool = True
+    exclude_ids: set[int] = field(default_factory=set)
+
+
 class MemoryRetriever:
     """Retrieves and formats relevant memories."""
 
-    def __init__(self, db_manager, vector_store, logger: logging.Logger | None = None):
+    def __init__(
+        self,
+        db_manager,
+        vector_store,
+        logger: logging.Logger | None = None,
+        engine: RetrievalEngine | None = None,
+    ):
         self.db = db_manager
         self.vs = vector_store
         self.logger = logger or logging.getLogger(__name__)
-
-        # Initialize NLTK safely
-        self.nltk_ready = False
-        try:
-            nltk.download('punkt', quiet=True)
-            nltk.download('punkt_tab', quiet=True)
-            nltk.download('averaged_perceptron_tagger', quiet=True)
-            nltk.download('averaged_perceptron_tagger_eng', quiet=True)
-            self.nltk_ready = True
-        except Exception as e:
-            self.logger.warning(f"Failed to initialize NLTK: {e}. Falling back to regex.")
-
-        # Create an instance-bound LRU cache to drastically speed up repetitive Episodic checks
-        self._cached_extract = functools.lru_cache(maxsize=200)(self._extract_keywords_internal)
-
-        # Initialize Cross-Encoder Reranker
-        self.reranker: TextCrossEncoder | None = None
-        try:
-            self.reranker = TextCrossEncoder(model_name=RERANKER_MODEL)
-            self.logger.info(f"Initialized Cross-Encoder with {RERANKER_MODEL}")
-        except Exception as e:
-            self.logger.warning(f"Could not load Cross-Encoder reranker: {e}. Falling back to RRF only.")
+        # NLTK data, the reranker and the keyword cache live in the shared engine
+        self.engine = engine or RetrievalEngine.default()
 
     def extract_keywords(self, text: str, min_length: int = 3) -> list[str]:
-        return self._cached_extract(text, min_length)
-
-    def _extract_keywords_internal(self, text: str, min_length: int = 3) -> list[str]:
-        # Process with NLTK using fast regex tokenization instead of the slow word_tokenize
-        words = re.findall(r"\b\w+\b", text)
-        stop_words = {
-            "the", "and", "but", "for", "not", "with", "this", "that", "from",
-            "have", "been", "are", "was", "were", "what", "how", "why", "you",
-            "your", "will", "can", "just", "like", "into", "over", "then",
-        }
-        words = list({w for w in words if len(w) >= min_length and w not in stop_words})
-
-        if not words:
-            return []
-
-        if not self.nltk_ready:
-            self.logger.warning("!!NLTK not ready. Falling back to regex.")
-            return words
-
-        tagged = nltk.pos_tag(words)
-
-        # NLTK Penn Treebank tags for Nouns and Verbs
-        valid_pos = {"NN", "NNS", "NNP", "NNPS", "VB", "VBD", "VBG", "VBN", "VBP", "VBZ"}
-
-        return list({
-            w for w, pos in tagged
-            if pos in valid_pos and w not in stop_words
-            and len(w) >= min_length
-            and w.isalpha()
-        })
+        return self.engine.extract_keywords(text, min_length)
 
     def _rrf_fuse(
         self,
@@ -112,59 +82,75 @@ class MemoryRetriever:
         """
         Cross-encoder reranking of top-N candidates.
         """
-        if not self.reranker or not query or not candidates:
-            return [mem for _, mem in candidates]
+        return self._rerank_pools(query, {None: (candidates, top_n)})[None]
 
-        # Limit candidates for reranking
-        to_rerank = candidates[:top_n]
-        remaining = candidates[top_n:]
+    def _rerank_pools(
+        self,
+        query: str,
+        pools: dict[Any, tuple[list[tuple[int, Any]], int]],  # key -> (fused candidates, top_n)
+    ) -> dict[Any, list[Any]]:
+        """
+        Cross-encoder reranking of the top-N of several fused pools with a single model call.
+        Each pool is reordered by its own scores; the rest of a pool keeps its fused order.
+        """
+        fused = {key: [mem for _, mem in candidates] for key, (candidates, _top_n) in pools.items()}
+        if not query or not self.engine.can_rerank:
+            return fused
+
+        # One batch over the union of the rerank windows
+        windows = {key: candidates[:top_n] for key, (candidates, top_n) in pools.items()}
+        doc_index: dict[int, int] = {}
+        doc_texts: list[str] = []
+        for window in windows.values():
+            for mem_id, mem in window:
+                if mem_id not in doc_index:
+                    doc_index[mem_id] = len(doc_texts)
+                    doc_texts.append(mem.content)
+        if not doc_texts:
+            return fused
 
         try:
-            doc_texts = [mem.content for _, mem in to_rerank]
-            # fastembed rerank returns scores for the documents
-            scores = list(self.reranker.rerank(query, doc_texts))
+            # fastembed rerank returns scores for the documents; known (query, memory) pairs come from the cache
+            scores = self.engine.rerank(query, doc_texts, memory_ids=list(doc_index))
+        except Exception as e:
+            self.logger.warning(f"Reranking failed: {e}")
+            return fused
 
+        reranked = {}
+        for key, window in windows.items():
             # Sort by reranker score
-            scored_mems = sorted(
-                zip(scores, [mem for _, mem in to_rerank], strict=False),
-                key=lambda x: x[0], reverse=True
-            )
-            reranked = [mem for _, mem in scored_mems]
-
+            scored = sorted(window, key=lambda item: scores[doc_index[item[0]]], reverse=True)
             # Append non-reranked as fallback
-            reranked.extend([mem for _, mem in remaining])
-            return reranked
-        except Exception as e:
-            self.logger.warning(f"Reranking failed: {e}")
-            return [mem for _, mem in candidates]
+            reranked[key] = [mem for _, mem in scored] + fused[key][len(window):]
+        return reranked
 
-    def _fetch_codex_kind(
+    def _codex_candidates(
         self,
-        session_id: int,
         kind: MemoryKind,
-        active_tags: set[str],
         query_text: str,
-        sem_hits: list[dict[str, Any]],
+        sem_mems: list[Any],
         fts_hits: dict[int, dict[str, Any]],
+        tag_mems: list[Any],
+        high_pri: list[Any],
+        tag_counts: dict[int, int],
         exclude_ids: list[int] | None,
-        limit: int,
-    ) -> list[Any]:
+    ) -> list[tuple[int, Any]]:
+        """
+        Fused (RRF) candidates of one codex kind, best first; reranking happens later.
+        `sem_mems` are this kind's semantic hits, already hydrated, in similarity order;
+        `tag_mems` and `high_pri` are its slices of the shared tag and priority pools, and
+        `tag_counts` holds each candidate's number of active tags.
+        """
         candidates: dict[int, Any] = {}
 
         # 1. Gather Candidates and Sources
         # Semantic Rank
         sem_ranked = []
-        for h in sem_hits:
-            mem_id = h["memory_id"]
-            if mem_id in (exclude_ids or []):
+        for mem in sem_mems:
+            if mem.id in (exclude_ids or []):
                 continue
-
-            # We don't fetch every memory yet if we can help it,
-            # but we need to check the 'kind'
-            mem = self.db.memories.get_by_id(mem_id)
-            if mem and mem.kind == kind:
-                candidates[mem.id] = mem
-                sem_ranked.append(mem.id)
+            candidates[mem.id] = mem
+            sem_ranked.append(mem.id)
 
         # FTS Rank
         fts_ranked = []
@@ -177,16 +163,11 @@ class MemoryRetriever:
                 fts_ranked.append(mem.id)
 
         # Tag Overlap & Priority Ranking
-        # For these, we fetch from DB to get pool of potential matches
-        tag_mems = []
-        if active_tags:
-            tag_mems = self.db.memories.query(session_id, kind=kind, tags=list(active_tags), limit=DB_FETCH_LIMIT_TAGS)
-            for m in tag_mems:
-                if exclude_ids and m.id in exclude_ids:
-                    continue
-                candidates[m.id] = m
+        for m in tag_mems:
+            if exclude_ids and m.id in exclude_ids:
+                continue
+            candidates[m.id] = m
 
-        high_pri = self.db.memories.query(session_id, kind=kind, limit=DB_FETCH_LIMIT_PRIORITY)
         for m in high_pri:
             if exclude_ids and m.id in exclude_ids:
                 continue
@@ -197,11 +178,7 @@ class MemoryRetriever:
 
         # Build Ranked Lists for RRF
         # Tag overlaps list
-        tag_ranked = sorted(
-            candidates.keys(),
-            key=lambda mid: len(active_tags & {t.lower() for t in candidates[mid].tags_list()}),
-            reverse=True
-        )
+        tag_ranked = sorted(candidates.keys(), key=lambda mid: tag_counts.get(mid, 0), reverse=True)
         # Priority list
         pri_ranked = sorted(
             candidates.keys(),
@@ -218,10 +195,7 @@ class MemoryRetriever:
 
         # FUSE
         fused = self._rrf_fuse(set(candidates.keys()), ranked_lists)
-
-        # RERANK
-        mem_candidates = [(mid, candidates[mid]) for mid, score in fused]
-        return self._rerank_candidates(query_text, mem_candidates, top_n=limit * 2)[:limit]
+        return [(mid, candidates[mid]) for mid, score in fused]
 
     def get_relevant(
         self,
@@ -237,12 +211,82 @@ class MemoryRetriever:
         Retrieve relevant memories using Tag Funnel and Dual-System Retrieval.
         Returns a dictionary categorized by kind (rule, lore, episodic, etc).
         """
-        if not session or not session.id:
+        candidates = self.gather_candidates(
+            session, recent_messages, extra_tags, kinds, limit, exclude_ids, explicit_query
+        )
+        if candidates is None:
             return {}
+        return self.rank_candidates(candidates)
+
+    def prefetch_candidates(self, session, history: list[Message]) -> RetrievalCandidates | None:
+        """
+        Gathers passive-retrieval candidates from the history alone, before the player's next
+        input exists. Finish with `refine_candidates` once the input is known.
+        """
+        # An empty trailing user message makes the query exactly "last AI message, no input"
+        return self.gather_candidates(session, [*history, Message(role="user", content="")])
+
+    def refine_candidates(self, candidates: RetrievalCandidates, user_text: str) -> RetrievalCandidates:
+        """
+        Folds the player's input into prefetched candidates: full-text hits for the input join
+        the pools, and the rerank query becomes the same one a cold retrieval would use.
+        """
+        user_keywords = self.extract_keywords(user_text) if user_text else []
+        full_query = " ".join(self.extract_keywords(self._passive_query_text(candidates.history_text, user_text)))
+        refined = replace(
+            candidates,
+            query_text=full_query,
+            codex={k: list(v) for k, v in candidates.codex.items()},
+            episodic=list(candidates.episodic),
+        )
+        if not user_keywords:
+            return refined
+
+        try:
+            bm25_results = self.db.memories.search_bm25(
+                candidates.session_id, " ".join(user_keywords), limit=DB_FETCH_LIMIT_PRIORITY
+            )
+        except Exception as e:
+            self.logger.warning(f"FTS search failed: {e}")
+            return refined
+
+        # Input matches go first so they are inside the rerank window
+        for kind, pool in [*refined.codex.items(), (MemoryKind.EPISODIC, refined.episodic)]:
+            if kind == MemoryKind.EPISODIC and not refined.include_episodic:
+                continue
+            known = {mid for mid, _ in pool}
+            hits = [
+                (mem.id, mem) for mem, _score in bm25_results
+                if mem.kind == kind and mem.id not in known and mem.id not in refined.exclude_ids
+            ]
+            pool[:0] = hits
+        return refined
+
+    @staticmethod
+    def _passive_query_text(history_text: str, user_text: str | None) -> str:
+        query_parts = [history_text] if history_text else []
+        if user_text is not None:
+            query_parts.append(user_text)
+        return "\n\n".join(query_parts) if query_parts else "Start of session"
+
+    def gather_candidates(
+        self,
+        session,
+        recent_messages: list[Message],
+        extra_tags: list[str] | None = None,
+        kinds: list[MemoryKind] | None = None,
+        limit: int | None = None,
+        exclude_ids: list[int] | None = None,
+        explicit_query: str | None = None,
+    ) -> RetrievalCandidates | None:
+        """First half of `get_relevant`: searches, tag funnel and fusion, without reranking."""
+        if not session or not session.id:
+            return None
 
         # 1. EXTRACT OR USE QUERY
         fts_search_text = ""
         keywords = []
+        history_text = ""
 
         if explicit_query:
             # If a tool provides a specific search string, we use it directly for FTS
@@ -251,16 +295,16 @@ class MemoryRetriever:
             # but usually explicit_query is enough
         else:
             # Passive retrieval path: build query from recent history
-            query_parts = []
             if recent_messages and len(recent_messages) >= 2:
                 last_ai = next((m for m in reversed(recent_messages[:-1]) if m.role == "assistant"), None)
                 if last_ai and last_ai.content:
-                    query_parts.append(last_ai.content[:500])
+                    history_text = last_ai.content[:500]
 
+            user_text = None
             if recent_messages and recent_messages[-1].role == "user":
-                query_parts.append(recent_messages[-1].content or "")
+                user_text = recent_messages[-1].content or ""
 
-            recent_text = "\n\n".join(query_parts) if query_parts else "Start of session"
+            recent_text = self._passive_query_text(history_text, user_text)
             keywords = self.extract_keywords(recent_text)
             fts_search_text = " ".join(keywords)
 
@@ -279,7 +323,10 @@ class MemoryRetriever:
 
         # Fetch tags from last 2 rounds of TurnMetadata
         history = session.get_history() if hasattr(session, "get_history") else recent_messages
-        current_round = len(history) // 2
+        # Rounds are numbered by absolute message index, as the chronicler stores them; the loaded
+        # history may be only a window over the messages table
+        next_index = session.next_index() if hasattr(session, "next_index") else len(history or [])
+        current_round = next_index // 2
         try:
             recent_metadata = self.db.turn_metadata.get_range(
                 session.id,
@@ -309,19 +356,14 @@ class MemoryRetriever:
         active_tags = {t.lower() for t in active_tags} - NON_DISCRIMINATIVE_TAGS
         self.logger.info(f"Active retrieval tags: {active_tags}")
 
+        # Hydrate every semantic hit once (FTS hits are already full rows), then split by kind
+        sem_by_kind = self._hydrate_semantic_hits(sem_hits, fts_hits)
+
         # 3. CODEX RETRIEVAL (Rules, Lore, User Preferences)
         codex_kinds = [MemoryKind.RULE, MemoryKind.LORE, MemoryKind.USER_PREF]
         if kinds is not None:
              codex_kinds = [k for k in codex_kinds if k in kinds]
 
-        result_dict: dict[MemoryKind, list[Any]] = {
-            MemoryKind.RULE: [],
-            MemoryKind.LORE: [],
-            MemoryKind.USER_PREF: [],
-            MemoryKind.SEMANTIC: [],
-            MemoryKind.EPISODIC: []
-        }
-
         # Determine budget per kind
         if limit is not None:
              budgets = {k: limit for k in codex_kinds}
@@ -330,23 +372,47 @@ class MemoryRetriever:
              budgets = {MemoryKind.RULE: 4, MemoryKind.LORE: 6, MemoryKind.SEMANTIC: 1, MemoryKind.USER_PREF: 1}
              episodic_limit = 3
 
-        for k in codex_kinds:
-            result_dict[k] = self._fetch_codex_kind(
-                session.id, k, active_tags, fts_search_text, sem_hits, fts_hits, exclude_ids, limit=budgets.get(k, 2)
+        # One statement per pool for all kinds instead of one per kind
+        include_episodic = kinds is None or MemoryKind.EPISODIC in kinds
+        tag_pool = (
+            self.db.memories.query_per_kind(
+                session.id, {k: DB_FETCH_LIMIT_TAGS for k in codex_kinds}, tags=list(active_tags)
             )
+            if active_tags else {}
+        )
+        pri_limits = {k: DB_FETCH_LIMIT_PRIORITY for k in codex_kinds}
+        if include_episodic:
+            pri_limits[MemoryKind.EPISODIC] = DB_FETCH_LIMIT_EPISODIC
+        pri_pool = self.db.memories.query_per_kind(session.id, pri_limits)
+
+        # Tag overlap of every codex candidate, counted on the tag index in one query
+        tag_counts: dict[int, int] = {}
+        if active_tags:
+            pool_ids = [
+                m.id for k in codex_kinds
+                for m in (*sem_by_kind.get(k, []), *tag_pool.get(k, []), *pri_pool.get(k, []))
+            ]
+            pool_ids.extend(mid for mid, data in fts_hits.items() if data["mem"] and data["mem"].kind in codex_kinds)
+            tag_counts = self.db.memories.tag_overlap_counts(pool_ids, list(active_tags))
+
+        codex = {
+            k: self._codex_candidates(
+                k, fts_search_text, sem_by_kind.get(k, []), fts_hits,
+                tag_pool.get(k, []), pri_pool.get(k, []), tag_counts, exclude_ids,
+            )
+            for k in codex_kinds
+        }
 
         # 4. CHRONICLE RETRIEVAL (Episodic)
-        if kinds is None or MemoryKind.EPISODIC in kinds:
+        final_candidates_ep: list[tuple[int, Any]] = []
+        if include_episodic:
             candidates_ep: dict[int, Any] = {}
 
             # Gather sources
             sem_ranked_ep = []
-            hit_ids = {h["memory_id"] for h in sem_hits}
-            for hid in hit_ids:
-                mem = self.db.memories.get_by_id(hid)
-                if mem and mem.kind == MemoryKind.EPISODIC:
-                    candidates_ep[mem.id] = mem
-                    sem_ranked_ep.append(mem.id)
+            for mem in sem_by_kind.get(MemoryKind.EPISODIC, []):
+                candidates_ep[mem.id] = mem
+                sem_ranked_ep.append(mem.id)
 
             fts_ranked_ep = []
             for _fts_id, data in fts_hits.items():
@@ -355,8 +421,7 @@ class MemoryRetriever:
                     candidates_ep[mem.id] = mem
                     fts_ranked_ep.append(mem.id)
 
-            episodic_mems = self.db.memories.query(session.id, kind=MemoryKind.EPISODIC, limit=DB_FETCH_LIMIT_EPISODIC)
-            for m in episodic_mems:
+            for m in pri_pool.get(MemoryKind.EPISODIC, []):
                 if exclude_ids and m.id in exclude_ids:
                     continue
                 candidates_ep[m.id] = m
@@ -390,7 +455,6 @@ class MemoryRetriever:
                 fused_ep = self._rrf_fuse(set(candidates_ep.keys()), ranked_lists_ep)
 
                 # Filter and Deduplicate
-                final_candidates_ep = []
                 for mid, _score in fused_ep:
                     mem = candidates_ep[mid]
                     mem_words = set(self.extract_keywords(mem.content))
@@ -402,10 +466,58 @@ class MemoryRetriever:
 
                     final_candidates_ep.append((mid, mem))
 
-                # RERANK
-                result_dict[MemoryKind.EPISODIC] = self._rerank_candidates(
-                    fts_search_text, final_candidates_ep, top_n=episodic_limit * 2
-                )[:episodic_limit]
+        return RetrievalCandidates(
+            session_id=session.id,
+            query_text=fts_search_text,
+            history_text=history_text,
+            codex=codex,
+            episodic=final_candidates_ep,
+            budgets=budgets,
+            episodic_limit=episodic_limit,
+            limit=limit,
+            include_episodic=include_episodic,
+            exclude_ids=set(exclude_ids or []),
+        )
+
+    def _hydrate_semantic_hits(
+        self, sem_hits: list[dict[str, Any]], fts_hits: dict[int, dict[str, Any]]
+    ) -> dict[str, list[Any]]:
+        """Semantic hits as Memory rows grouped by kind, in similarity order; one query for all of them."""
+        known = {mid: data["mem"] for mid, data in fts_hits.items() if data.get("mem")}
+        missing = [h["memory_id"] for h in sem_hits if h["memory_id"] not in known]
+        hydrated = {**self.db.memories.get_many(missing), **known} if missing else known
+
+        by_kind: dict[str, list[Any]] = defaultdict(list)
+        seen: set[int] = set()
+        for h in sem_hits:
+            mem = hydrated.get(h["memory_id"])
+            if mem is None or mem.id in seen:
+                continue
+            seen.add(mem.id)
+            by_kind[mem.kind].append(mem)
+        return by_kind
+
+    def rank_candidates(self, candidates: RetrievalCandidates) -> dict[str, list[Any]]:
+        """Second half of `get_relevant`: one cross-encoder pass over every kind, then budgeting."""
+        query_text = candidates.query_text
+        limit = candidates.limit
+        result_dict: dict[MemoryKind, list[Any]] = {
+            MemoryKind.RULE: [],
+            MemoryKind.LORE: [],
+            MemoryKind.USER_PREF: [],
+            MemoryKind.SEMANTIC: [],
+            MemoryKind.EPISODIC: []
+        }
+
+        # RERANK: each kind's window (twice its budget) is scored in the same batch
+        budgets = {k: candidates.budgets.get(k, 2) for k in candidates.codex}
+        pools = {k: (pool, budgets[k] * 2) for k, pool in candidates.codex.items()}
+        if candidates.episodic:
+            budgets[MemoryKind.EPISODIC] = candidates.episodic_limit
+            pools[MemoryKind.EPISODIC] = (candidates.episodic, candidates.episodic_limit * 2)
+
+        for k, ranked in self._rerank_pools(query_text, pools).items():
+            result_dict[k] = ranked[:budgets[k]]
 
         # 5. ORGANIZE AND BUDGET
         # Final pass if limit was global (sum of all results)
@@ -428,6 +540,7 @@ class MemoryRetriever:
         return {k: v for k, v in result_dict.items() if v}
 
 
+
     def format_for_prompt(
         self, categorized_memories: dict[str, list[Any]], title: str = "# KNOWLEDGE AND MEMORIES\n"
     ) -> str:
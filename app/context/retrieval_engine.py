@@ -0,0 +1,205 @@
+import functools
+import hashlib
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+
+import nltk
+from fastembed.rerank.cross_encoder import TextCrossEncoder
+
+RERANKER_MODEL = "Xenova/ms-marco-MiniLM-L-6-v2"
+KEYWORD_CACHE_SIZE = 2048
+DEFAULT_RERANK_CACHE_SIZE = 4096
+
+NLTK_PACKAGES = (
+    "punkt",
+    "punkt_tab",
+    "averaged_perceptron_tagger",
+    "averaged_perceptron_tagger_eng",
+)
+
+STOP_WORDS = {
+    "the", "and", "but", "for", "not", "with", "this", "that", "from",
+    "have", "been", "are", "was", "were", "what", "how", "why", "you",
+    "your", "will", "can", "just", "like", "into", "over", "then",
+}
+
+# NLTK Penn Treebank tags for Nouns and Verbs
+VALID_POS = {"NN", "NNS", "NNP", "NNPS", "VB", "VBD", "VBG", "VBN", "VBP", "VBZ"}
+
+
+class RetrievalEngine:
+    """
+    Process-wide owner of the expensive retrieval resources.
+    Loads NLTK data and the Cross-Encoder reranker once and keeps the keyword
+    and rerank score caches alive across turns. Safe to share between turn and tool threads.
+    """
+
+    _default: "RetrievalEngine | None" = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, logger: logging.Logger | None = None, reranker_model: str = RERANKER_MODEL):
+        self.logger = logger or logging.getLogger(__name__)
+        self.reranker_model = reranker_model
+
+        self.nltk_ready = False
+        self.reranker: TextCrossEncoder | None = None
+
+        self._warmed = False
+        self._warm_lock = threading.Lock()
+        # ONNX sessions and the NLTK tagger are shared; serialize inference on them.
+        self._rerank_lock = threading.Lock()
+        self._tagger_lock = threading.Lock()
+
+        self._cached_extract = functools.lru_cache(maxsize=KEYWORD_CACHE_SIZE)(self._extract_keywords_internal)
+
+        # Bounded LRU of (query fingerprint, memory id, content hash) -> cross-encoder score
+        self.rerank_cache_size = max(0, int(os.environ.get("RERANK_CACHE_SIZE", DEFAULT_RERANK_CACHE_SIZE)))
+        self._score_cache: OrderedDict[tuple[str, int, str], float] = OrderedDict()
+        self._score_cache_lock = threading.Lock()
+        self.rerank_cache_hits = 0
+        self.rerank_cache_misses = 0
+
+    @classmethod
+    def default(cls) -> "RetrievalEngine":
+        """Shared fallback instance for callers that were not handed one (scripts, tools)."""
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls()
+            return cls._default
+
+    # --- Lifecycle ---
+
+    def warm_up(self):
+        """Download NLTK data and load the reranker. Idempotent; blocks concurrent callers until done."""
+        if self._warmed:
+            return
+        with self._warm_lock:
+            if self._warmed:
+                return
+
+            try:
+                for package in NLTK_PACKAGES:
+                    nltk.download(package, quiet=True)
+                self.nltk_ready = True
+            except Exception as e:
+                self.logger.warning(f"Failed to initialize NLTK: {e}. Falling back to regex.")
+
+            try:
+                self.reranker = TextCrossEncoder(model_name=self.reranker_model)
+                self.logger.info(f"Initialized Cross-Encoder with {self.reranker_model}")
+            except Exception as e:
+                self.logger.warning(f"Could not load Cross-Encoder reranker: {e}. Falling back to RRF only.")
+
+            self._warmed = True
+
+    def warm_up_async(self) -> threading.Thread:
+        """Warm up on a daemon thread so application startup is not blocked."""
+        thread = threading.Thread(target=self.warm_up, daemon=True, name="RetrievalEngine-WarmUp")
+        thread.start()
+        return thread
+
+    # --- Keywords ---
+
+    def extract_keywords(self, text: str, min_length: int = 3) -> list[str]:
+        self.warm_up()
+        return list(self._cached_extract(text, min_length))
+
+    def keyword_cache_info(self):
+        return self._cached_extract.cache_info()
+
+    def _extract_keywords_internal(self, text: str, min_length: int = 3) -> tuple[str, ...]:
+        # Process with NLTK using fast regex tokenization instead of the slow word_tokenize
+        words = re.findall(r"\b\w+\b", text)
+        words = list({w for w in words if len(w) >= min_length and w not in STOP_WORDS})
+
+        if not words:
+            return ()
+
+        if not self.nltk_ready:
+            self.logger.warning("!!NLTK not ready. Falling back to regex.")
+            return tuple(words)
+
+        with self._tagger_lock:
+            tagged = nltk.pos_tag(words)
+
+        return tuple({
+            w for w, pos in tagged
+            if pos in VALID_POS and w not in STOP_WORDS
+            and len(w) >= min_length
+            and w.isalpha()
+        })
+
+    # --- Reranking ---
+
+    @property
+    def can_rerank(self) -> bool:
+        self.warm_up()
+        return self.reranker is not None
+
+    def rerank(self, query: str, documents: list[str], memory_ids: list[int] | None = None) -> list[float]:
+        """
+        Scores documents against the query with the Cross-Encoder. Raises if no reranker is loaded.
+        With `memory_ids` (one per document) scores are cached; only unseen pairs reach the model.
+        """
+        self.warm_up()
+        if self.reranker is None:
+            raise RuntimeError("Cross-Encoder reranker is not available.")
+        if memory_ids is None or not self.rerank_cache_size:
+            return self._score(query, documents)
+
+        fingerprint = _query_fingerprint(query)
+        keys = [(fingerprint, mem_id, _content_hash(doc)) for mem_id, doc in zip(memory_ids, documents, strict=True)]
+        scores: list[float | None] = [None] * len(documents)
+        missing: list[int] = []
+
+        with self._score_cache_lock:
+            for i, key in enumerate(keys):
+                cached = self._score_cache.get(key)
+                if cached is not None:
+                    self._score_cache.move_to_end(key)
+                    scores[i] = cached
+                    self.rerank_cache_hits += 1
+                else:
+                    missing.append(i)
+                    self.rerank_cache_misses += 1
+
+        if missing:
+            fresh = self._score(query, [documents[i] for i in missing])
+            with self._score_cache_lock:
+                for i, score in zip(missing, fresh, strict=True):
+                    scores[i] = score
+                    self._score_cache[keys[i]] = score
+                    self._score_cache.move_to_end(keys[i])
+                while len(self._score_cache) > self.rerank_cache_size:
+                    self._score_cache.popitem(last=False)
+
+        return [float(s) for s in scores if s is not None]
+
+    def _score(self, query: str, documents: list[str]) -> list[float]:
+        assert self.reranker is not None
+        with self._rerank_lock:
+            return [float(s) for s in self.reranker.rerank(query, documents)]
+
+    def rerank_cache_info(self) -> dict[str, float]:
+        with self._score_cache_lock:
+            lookups = self.rerank_cache_hits + self.rerank_cache_misses
+            return {
+                "hits": self.rerank_cache_hits,
+                "misses": self.rerank_cache_misses,
+                "hit_rate": self.rerank_cache_hits / lookups if lookups else 0.0,
+                "size": len(self._score_cache),
+                "max_size": self.rerank_cache_size,
+            }
+
+
+def _query_fingerprint(query: str) -> str:
+    """Order- and case-insensitive: the query is a keyword bag whose order is not stable."""
+    normalized = " ".join(sorted(set(query.lower().split())))
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _content_hash(content: str) -> str:
+    return hashlib.blake2b(content.encode("utf-8"), digest_size=16).hexdigest()
@@ -0,0 +1,226 @@
+"""Token accounting for prompt assembly: pluggable tokenizers and a per-section budget."""
+
+from __future__ import annotations
+
+import functools
+import json
+import logging
+import math
+import os
+from typing import Protocol
+
+from app.models.message import Message
+from app.models.vocabulary import MessageRole
+
+try:
+    import tiktoken
+except ImportError:  # Optional: exact counts for OpenAI-style BPE vocabularies
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONTEXT_WINDOW = 32768
+DEFAULT_OUTPUT_RESERVE = 4096
+DEFAULT_TOOL_RESULT_TOKENS = 1024
+
+# Share of the flexible budget (window minus output reserve and fixed sections) per section.
+# History takes whatever the other sections leave unused.
+SECTION_SHARES = {
+    "index": 0.10,
+    "quests": 0.05,
+    "scene": 0.08,
+    "sheet": 0.12,
+    "rag": 0.15,
+}
+
+TRUNCATION_MARKER = "\n…[truncated]"
+
+
+class Tokenizer(Protocol):
+    name: str
+
+    def count(self, text: str) -> int: ...
+
+
+class ApproxTokenizer:
+    """Offline estimate: about four characters per token for English prose and JSON."""
+
+    def __init__(self, chars_per_token: float = 4.0):
+        self.chars_per_token = chars_per_token
+        self.name = f"approx/{chars_per_token:g}"
+
+    def count(self, text: str) -> int:
+        return math.ceil(len(text) / self.chars_per_token) if text else 0
+
+
+class TiktokenTokenizer:
+    def __init__(self, encoding: str = "cl100k_base"):
+        if tiktoken is None:
+            raise ImportError("tiktoken is not installed")
+        self._encoding = tiktoken.get_encoding(encoding)
+        self.name = f"tiktoken/{encoding}"
+
+    def count(self, text: str) -> int:
+        return len(self._encoding.encode(text, disallowed_special=())) if text else 0
+
+
+@functools.cache
+def get_tokenizer(spec: str | None = None) -> Tokenizer:
+    """
+    Tokenizer from a spec (default: env CONTEXT_TOKENIZER): "approx", "approx:<chars per token>",
+    "tiktoken" or "tiktoken:<encoding>". Falls back to the approximation if tiktoken is missing.
+    """
+    spec = (spec or os.environ.get("CONTEXT_TOKENIZER", "approx")).strip().lower()
+    kind, _, arg = spec.partition(":")
+    if kind == "tiktoken":
+        try:
+            return TiktokenTokenizer(arg or "cl100k_base")
+        except Exception as e:
+            logger.warning(f"Tokenizer '{spec}' unavailable ({e}); using the approximate model.")
+            return ApproxTokenizer()
+    if kind == "approx" and arg:
+        return ApproxTokenizer(float(arg))
+    return ApproxTokenizer()
+
+
+def compact_tool_content(content: str, max_tokens: int, tokenizer: Tokenizer) -> str:
+    """Re-encodes an oversized JSON tool result without indentation, then truncates if still too big."""
+    if tokenizer.count(content) <= max_tokens:
+        return content
+    try:
+        content = json.dumps(json.loads(content), separators=(",", ":"), ensure_ascii=False)
+    except (json.JSONDecodeError, TypeError):
+        pass
+    return fit_text(content, max_tokens, tokenizer)
+
+
+def fit_text(text: str, max_tokens: int, tokenizer: Tokenizer) -> str:
+    """Cuts text to max_tokens, preferring a line boundary, and marks the cut."""
+    if not text or tokenizer.count(text) <= max_tokens:
+        return text
+    if max_tokens <= 0:
+        return ""
+    # Token counts are roughly proportional to length; shrink until it fits
+    keep = len(text) * max_tokens // max(tokenizer.count(text), 1)
+    while keep > 0:
+        cut = text[:keep]
+        newline = cut.rfind("\n")
+        if newline > keep // 2:
+            cut = cut[:newline]
+        candidate = cut + TRUNCATION_MARKER
+        if tokenizer.count(candidate) <= max_tokens:
+            return candidate
+        keep = int(keep * 0.9)
+    return ""
+
+
+class TokenBudget:
+    """
+    Budget for one prompt. Fixed sections (static rules, tool definitions) are measured as they
+    are; the rest of the window, minus the output reserve, is split between the flexible
+    sections by SECTION_SHARES, and history is packed into whatever remains.
+    """
+
+    def __init__(
+        self,
+        tokenizer: Tokenizer | None = None,
+        context_window: int = DEFAULT_CONTEXT_WINDOW,
+        output_reserve: int = DEFAULT_OUTPUT_RESERVE,
+        tool_result_tokens: int = DEFAULT_TOOL_RESULT_TOKENS,
+    ):
+        self.tokenizer = tokenizer or get_tokenizer()
+        self.context_window = context_window
+        self.output_reserve = output_reserve
+        self.tool_result_tokens = tool_result_tokens
+        self.sizes: dict[str, int] = {}
+
+    @classmethod
+    def from_env(cls) -> TokenBudget:
+        return cls(
+            context_window=int(os.environ.get("CONTEXT_WINDOW_TOKENS", DEFAULT_CONTEXT_WINDOW)),
+            output_reserve=int(os.environ.get("CONTEXT_OUTPUT_RESERVE", DEFAULT_OUTPUT_RESERVE)),
+            tool_result_tokens=int(os.environ.get("TOOL_RESULT_MAX_TOKENS", DEFAULT_TOOL_RESULT_TOKENS)),
+        )
+
+    # --- Accounting ---
+
+    def count(self, text: str) -> int:
+        return self.tokenizer.count(text)
+
+    def record(self, section: str, text: str) -> int:
+        tokens = self.count(text)
+        self.sizes[section] = tokens
+        return tokens
+
+    @property
+    def used(self) -> int:
+        return sum(self.sizes.values())
+
+    @property
+    def remaining(self) -> int:
+        return max(self.context_window - self.output_reserve - self.used, 0)
+
+    def limit(self, section: str) -> int:
+        """Allocation of a flexible section, computed from what the fixed sections left over."""
+        fixed = self.sizes.get("static", 0) + self.sizes.get("tools", 0)
+        flexible = max(self.context_window - self.output_reserve - fixed, 0)
+        return int(flexible * SECTION_SHARES.get(section, 0.0))
+
+    def fit(self, section: str, text: str) -> str:
+        """Fits text into the section's allocation and records its size."""
+        fitted = fit_text(text, self.limit(section), self.tokenizer)
+        if fitted != text:
+            logger.info(f"Context section '{section}' trimmed to its {self.limit(section)} token budget")
+        self.record(section, fitted)
+        return fitted
+
+    # --- History ---
+
+    def message_tokens(self, message: Message) -> int:
+        # Small per-message overhead for role/framing tokens
+        tokens = 4 + self.count(message.content or "") + self.count(message.thought or "")
+        if message.tool_calls:
+            tokens += self.count(json.dumps(message.tool_calls, default=str))
+        return tokens
+
+    def compact_message(self, message: Message) -> Message:
+        """Tool results over the per-result limit are re-encoded compactly and truncated."""
+        if message.role != MessageRole.TOOL or not message.content:
+            return message
+        compacted = compact_tool_content(message.content, self.tool_result_tokens, self.tokenizer)
+        if compacted == message.content:
+            return message
+        return message.model_copy(update={"content": compacted})
+
+    def pack_history(self, messages: list[Message], reserve: int = 0) -> list[Message]:
+        """
+        Packs history newest-first into the remaining budget, less `reserve` tokens held back
+        for messages placed in front of it (e.g. the rolling summary). The latest message is
+        always kept and the result never starts with orphaned tool results.
+        """
+        budget = self.remaining - reserve
+
+        packed: list[Message] = []
+        for message in reversed(messages):
+            message = self.compact_message(message)
+            tokens = self.message_tokens(message)
+            if packed and tokens > budget:
+                break
+            packed.append(message)
+            budget -= tokens
+        packed.reverse()
+
+        while len(packed) > 1 and packed[0].role == MessageRole.TOOL:
+            packed.pop(0)
+
+        self.sizes["history"] = reserve + sum(self.message_tokens(m) for m in packed)
+        if len(packed) < len(messages):
+            logger.info(f"History packed to {len(packed)}/{len(messages)} messages ({self.sizes['history']} tokens)")
+        return packed
+
+    def summary(self) -> str:
+        sections = ", ".join(f"{name}={tokens}" for name, tokens in self.sizes.items())
+        return (
+            f"{self.used}/{self.context_window - self.output_reserve} tokens "
+            f"[{sections}] ({self.tokenizer.name})"
+        )
@@ -0,0 +1,57 @@
+"""The tools offered to the LLM each turn, and their prose listing for the context window."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from app.prefabs.manifest import SystemManifest
+from app.tools.schemas import Adjust, ContextRetrieve, LocationCreate, Mark, Move, Note, NpcSpawn, Roll, Set, StateQuery
+
+ACTIVE_TOOL_NAMES = [
+    Roll.model_fields["name"].default,
+
+    Adjust.model_fields["name"].default,
+    Set.model_fields["name"].default,
+    Mark.model_fields["name"].default,
+
+    Move.model_fields["name"].default,
+
+    Note.model_fields["name"].default,
+    ContextRetrieve.model_fields["name"].default,
+    StateQuery.model_fields["name"].default,
+
+    NpcSpawn.model_fields["name"].default,
+    LocationCreate.model_fields["name"].default,
+]
+
+
+def build_tool_definitions(tool_registry, manifest: SystemManifest | None) -> tuple[list[dict[str, Any]], str]:
+    """
+    Returns the turn's LLM tool schemas and the `available_tools` listing sent with them.
+    Both are pure functions of the registry and manifest, so the prefetcher can budget
+    the listing before the turn builds it.
+    """
+    llm_tools = tool_registry.get_llm_tool_schemas(ACTIVE_TOOL_NAMES)
+    # Inject Dice Rules into Roll Tool
+    if manifest:
+        for tool in llm_tools:
+            if tool["function"]["name"] == "roll":
+                eng = manifest.engine
+                desc = (
+                    f"{tool['function']['description']}\n"
+                    f"SYSTEM: Dice='{eng.dice}'. "
+                    f"Mechanic='{eng.mechanic}'. "
+                    f"Crit='{eng.crit}'.\n"
+                    "You must use this tool any time a dice roll is involved. Never 'simulate' a roll."
+                )
+                tool["function"]["description"] = desc
+
+    tools_defs = "I have access to the following tools to retrieve or confirm information, roll dice, create or modify Game State, etc.\n\n```available_tools\n"
+    for tool in llm_tools:
+        name = tool["function"]["name"]
+        desc = tool["function"]["description"].strip()
+        # Clean up docstring formatting
+        desc = " ".join(desc.split())
+        tools_defs += f"- **{name}**: {desc}\n"
+    tools_defs += "\n```\n\nI will use the dice tool to make decisions, create entropy, simulate outcomes, etc.\n\nI will also proactively decide which tools/functions to use and when.\n"
+    return llm_tools, tools_defs
@@ -17,10 +17,11 @@ class TurnMetadataService:
         summary: str,
         tags: list[str],
         importance: int,
+        turn_id: str | None = None,
     ):
         try:
             self.db.turn_metadata.create(
-                session_id, prompt_id, round_number, summary, tags, importance
+                session_id, prompt_id, round_number, summary, tags, importance, turn_id=turn_id
             )
         except Exception as e:
             logger.error(f"Failed to persist turn metadata {session_id}:{prompt_id} to database: {e}")
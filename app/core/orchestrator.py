@@ -5,12 +5,14 @@ import threading
 import uuid
 from collections.abc import Callable
 
+from app.context.retrieval_engine import RetrievalEngine
 from app.core.react_turn_manager import ReActTurnManager
 from app.core.vector_store import VectorStore
 from app.database.db_manager import DBManager
 from app.llm.gemini_connector import GeminiConnector
 from app.llm.llm_connector import LLMConnector
 from app.llm.openai_connector import OpenAIConnector
+from app.llm.replay_connector import RecordingConnector, ReplayConnector
 from app.models.game_session import GameSession
 from app.models.session import Session
 from app.models.vocabulary import UIEventType
@@ -33,6 +35,9 @@ class Orchestrator:
         self.llm_connector = self._get_llm_connector()
         self.tool_registry = ToolRegistry()
         self.vector_store = VectorStore()
+        # Shared across turn threads; warm NLTK + reranker in the background at startup
+        self.retrieval_engine = RetrievalEngine(logger=self.logger)
+        self.retrieval_engine.warm_up_async()
         self.session: Session | None = None
 
         # Turn Manager
@@ -44,13 +49,21 @@ class Orchestrator:
 
     def _get_llm_connector(self) -> LLMConnector:
         provider = os.environ.get("LLM_PROVIDER", "GEMINI").upper()
+        connector: LLMConnector
         if provider == "GEMINI":
-            return GeminiConnector()
+            connector = GeminiConnector()
         elif provider == "OPENAI":
-            return OpenAIConnector()
+            connector = OpenAIConnector()
+        elif provider == "REPLAY":
+            return ReplayConnector.from_env()
         else:
             raise ValueError(f"Unsupported LLM_PROVIDER: {provider}")
 
+        record_path = os.environ.get("LLM_RECORD_CASSETTE")
+        if record_path:
+            connector = RecordingConnector(connector, record_path)
+        return connector
+
     def stop_generation(self):
         """Signal the running turn to stop and ignore subsequent UI events."""
         self.logger.info("🛑 Stop signal received.")
@@ -104,7 +117,10 @@ class Orchestrator:
         )
         self.bridge.clear_input()
 
-        session.session_data = self.session.to_json()
+        # Persist only the new message; the turn thread reads the history tail from the messages table
+        with DBManager(self.db_path) as db:
+            db.messages.append(session.id, self.session.pending_messages())
+        self.session.mark_persisted()
 
         # 4. Start Thread
         self._start_turn_thread(session, user_input)
@@ -123,6 +139,9 @@ class Orchestrator:
             self.ui_queue.put({"type": UIEventType.ERROR, "message": str(e), "turn_id": turn_id})
         finally:
             self.ui_queue.put({"type": UIEventType.TURN_COMPLETE, "turn_id": turn_id})
+            if self.active_turn_id == turn_id and not self.stop_event.is_set():
+                # The player is reading and typing now; build the next turn's context meanwhile
+                self.turn_manager.prefetcher.schedule(game_session)
 
     def _update_game_in_thread(
         self,
@@ -133,23 +152,49 @@ class Orchestrator:
         """Helper to update the game session in the database from a background thread."""
         if not game_session:
             return
+        # Append-only: write the messages produced this turn, then the (small) session header
+        pending = final_session_state.pending_messages()
+        if pending and db_manager.messages:
+            db_manager.messages.append(game_session.id, pending)
+            final_session_state.mark_persisted()
+
         game_session.session_data = final_session_state.to_json()
         if db_manager.sessions:
             db_manager.sessions.update(game_session)
-        self.session = final_session_state
-        self.session.id = game_session.id
+
+        if self.session and self.session.id == game_session.id and self.session.history_offset == 0:
+            # The turn only saw a tail window; splice it onto the full in-memory history
+            self.session.history = self.session.history[: final_session_state.history_offset] + final_session_state.history
+            self.session.system_prompt = final_session_state.system_prompt
+            self.session.compacted_seq = final_session_state.compacted_seq
+            self.session.mark_persisted()
+        else:
+            self.session = final_session_state
+            self.session.id = game_session.id
 
     # --- Session Management ---
 
     def load_game(self, session_id: int):
         with DBManager(self.db_path) as db_manager:
             game_session = db_manager.sessions.get_by_id(session_id)
+            history = db_manager.messages.get_all(session_id) if game_session else []
         if game_session:
             self.session = Session.from_json(game_session.session_data)
             self.session.id = game_session.id
+            self.session.history = history
+            self.session.mark_persisted()
+            self.turn_manager.prefetcher.schedule(game_session)
 
     # --- History Manipulation ---
 
+    def _truncate_stored_history(self, game_session: GameSession):
+        """Drops stored messages past the end of the (clipped) in-memory history."""
+        if not self.session:
+            return
+        with DBManager(self.db_path) as db:
+            db.messages.truncate(game_session.id, self.session.next_index())
+        self.session.mark_persisted()
+
     def reroll_last_turn(self, game_session: GameSession):
         """Deletes the last Assistant response and re-runs the turn with the previous User input."""
         if not self.session or not self.session.history:
@@ -177,10 +222,7 @@ class Orchestrator:
         if history and history[-1].role == "user":
             last_user_msg = history[-1].content or ""
 
-        game_session.session_data = self.session.to_json()
-
-        with DBManager(self.db_path) as db:
-            db.sessions.update(game_session)
+        self._truncate_stored_history(game_session)
 
         # 3. Refresh UI & Start
         self.ui_queue.put({"type": UIEventType.HISTORY_CHANGED})
@@ -206,10 +248,7 @@ class Orchestrator:
             # If targeting a user message, we clip everything AFTER it
             self.session.history = self.session.history[: index + 1]
 
-        game_session.session_data = self.session.to_json()
-
-        with DBManager(self.db_path) as db:
-            db.sessions.update(game_session)
+        self._truncate_stored_history(game_session)
 
         # 3. Refresh UI & Start
         self.ui_queue.put({"type": UIEventType.HISTORY_CHANGED})
@@ -234,8 +273,6 @@ class Orchestrator:
         if history and history[-1].role == "user":
             history.pop()
 
-        game_session.session_data = self.session.to_json()
-        with DBManager(self.db_path) as db:
-            db.sessions.update(game_session)
+        self._truncate_stored_history(game_session)
 
         self.ui_queue.put({"type": UIEventType.HISTORY_CHANGED})
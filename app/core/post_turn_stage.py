@@ -0,0 +1,128 @@
+"""Bounded background stage for post-turn work (suggestions, chronicler metadata)."""
+
+from __future__ import annotations
+
+import logging
+import threading
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass, field, replace
+
+from app.models.message import Message
+
+
+@dataclass
+class PostTurnJob:
+    session_id: int
+    prompt_id: int
+    turn_id: str
+    round_number: int
+    system_prompt: str
+    history: list[Message]  # Ends with the turn's narrative
+    suggestions: bool = True  # False once a newer turn made this turn's action suggestions stale
+
+
+@dataclass
+class _SessionSlot:
+    queued: deque[PostTurnJob] = field(default_factory=deque)
+    running: bool = False
+    idle: threading.Event = field(default_factory=threading.Event)
+
+
+class PostTurnStage:
+    """
+    Runs post-turn jobs on a small pool of daemon workers.
+
+    Jobs of one session run one at a time, in turn order. Every turn's chronicler work
+    runs (its summary cannot be regenerated later), but when a newer turn is submitted the
+    waiting jobs lose their action suggestions, which only matter for the latest turn.
+    At most `max_pending` sessions may wait with suggestions; beyond that the oldest
+    waiting session's suggestions are dropped too.
+    """
+
+    def __init__(
+        self,
+        runner: Callable[[PostTurnJob], None],
+        workers: int = 2,
+        max_pending: int = 8,
+        logger: logging.Logger | None = None,
+    ):
+        self.runner = runner
+        self.workers = max(1, workers)
+        self.max_pending = max(1, max_pending)
+        self.logger = logger or logging.getLogger(__name__)
+
+        self._slots: dict[int, _SessionSlot] = {}
+        self._ready: deque[int] = deque()
+        self._cond = threading.Condition()
+        self._threads: list[threading.Thread] = []
+
+    def submit(self, job: PostTurnJob):
+        with self._cond:
+            slot = self._slots.setdefault(job.session_id, _SessionSlot())
+            self._drop_suggestions(slot, f"superseded by turn {job.turn_id}")
+            slot.queued.append(job)
+            slot.idle.clear()
+
+            if not slot.running and job.session_id not in self._ready:
+                if len(self._ready) >= self.max_pending:
+                    self._drop_oldest()
+                self._ready.append(job.session_id)
+                self._cond.notify()
+            self._ensure_workers()
+
+    def wait(self, session_id: int, timeout: float | None = None) -> bool:
+        """Blocks until the session has no running or waiting job. Returns False on timeout."""
+        slot = self._slots.get(session_id)
+        return slot.idle.wait(timeout) if slot else True
+
+    def pending(self, session_id: int) -> bool:
+        slot = self._slots.get(session_id)
+        return bool(slot and not slot.idle.is_set())
+
+    def _drop_oldest(self):
+        """Strips the suggestions of the oldest waiting session that still has some."""
+        for session_id in self._ready:
+            slot = self._slots[session_id]
+            if any(job.suggestions for job in slot.queued):
+                self._drop_suggestions(slot, "post-turn queue full")
+                return
+
+    def _drop_suggestions(self, slot: _SessionSlot, reason: str):
+        for i, job in enumerate(slot.queued):
+            if job.suggestions:
+                self.logger.info(f"Dropping action suggestions for turn {job.turn_id}: {reason}")
+                slot.queued[i] = replace(job, suggestions=False)
+
+    def _ensure_workers(self):
+        # Started on first use; idle workers just wait on the condition
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(
+                target=self._work, daemon=True, name=f"PostTurn-{len(self._threads)}"
+            )
+            self._threads.append(thread)
+            thread.start()
+
+    def _work(self):
+        while True:
+            with self._cond:
+                while not self._ready:
+                    self._cond.wait()
+                session_id = self._ready.popleft()
+                slot = self._slots[session_id]
+                job = slot.queued.popleft() if slot.queued else None
+                slot.running = True
+
+            try:
+                if job:
+                    self.runner(job)
+            except Exception as e:
+                self.logger.error(f"Post-turn work failed for turn {job.turn_id if job else '?'}: {e}", exc_info=True)
+            finally:
+                with self._cond:
+                    slot.running = False
+                    if slot.queued:
+                        self._ready.append(session_id)
+                        self._cond.notify()
+                    else:
+                        slot.idle.set()
@@ -1,31 +1,61 @@
-import json
+import asyncio
 import logging
 import os
-import threading
-from typing import Any
+from typing import Any, cast
 
 from pydantic import BaseModel
 
 from app.context.context_builder import ContextBuilder
+from app.context.history_compactor import HistoryCompactor
 from app.context.memory_retriever import MemoryRetriever
 from app.context.state_context import StateContextBuilder
+from app.context.token_budget import TokenBudget
+from app.context.tool_definitions import build_tool_definitions
 from app.core.metadata.turn_metadata_service import TurnMetadataService
+from app.core.post_turn_stage import PostTurnJob, PostTurnStage
 from app.core.simulation_service import SimulationService
+from app.core.turn_prefetcher import TurnPrefetcher
 from app.database.db_manager import DBManager
-from app.llm.schemas import TurnMetadata, TurnSuggestions
+from app.database.game_state_unit_of_work import GameStateUnitOfWork
+from app.llm.llm_connector import LLMResponse, StreamEventKind
+from app.llm.resilience import CircuitOpenError
+from app.llm.schemas import TurnMetadata, TurnSuggestions, TurnWrapUp
 from app.models.game_session import GameSession
 from app.models.message import Message
 from app.models.session import Session
 from app.models.vocabulary import MessageRole, UIEventType
 from app.setup.setup_manifest import SetupManifest
 from app.tools.executor import ToolExecutor
-from app.tools.schemas import Adjust, ContextRetrieve, LocationCreate, Mark, Move, Note, NpcSpawn, Roll, Set, StateQuery
+from app.tools.result_encoder import encode_result
+from app.tools.schemas import is_read_only
 
 logger = logging.getLogger(__name__)
 
-MAX_HISTORY_MESSAGES = 50
+# Messages loaded per turn; the token budget decides how many of them are sent
+MAX_HISTORY_MESSAGES = 100
 MAX_REACT_LOOPS = 15
 
+SUGGESTIONS_PROMPT = (
+    "Simmulate 3-5 brief, concise, and short responses as if the Player wrote them "
+    "(E.g. 'I do X', 'I go to Y', 'What is Z?', etc.), based on the narrative above. Return strictly as JSON."
+)
+CHRONICLER_PROMPT = (
+    "Summarize this scene, generate tags that describe the scene, and provide an importance rating.\n"
+    "1. Provide a concise 1-3 sentence summary.\n"
+    "2. Provide snake_case tags.\n"
+    "3. Rate importance 1-5.\n"
+    "Return strictly as JSON."
+)
+WRAP_UP_PROMPT = (
+    "Wrap up the scene above.\n"
+    "1. choices: simulate 3-5 brief, concise, and short responses as if the Player wrote them "
+    "(E.g. 'I do X', 'I go to Y', 'What is Z?', etc.).\n"
+    "2. summary: a concise 1-3 sentence summary of the scene.\n"
+    "3. tags: snake_case tags that describe the scene.\n"
+    "4. importance: rate importance 1-5.\n"
+    "Return strictly as JSON."
+)
+
 
 class ReActTurnManager:
     """
@@ -40,15 +70,64 @@ class ReActTurnManager:
         self.llm_connector = orchestrator.llm_connector
         self.tool_registry = orchestrator.tool_registry
         self.vector_store = orchestrator.vector_store
+        self.retrieval_engine = orchestrator.retrieval_engine
         self.ui_queue = orchestrator.ui_queue
         self.tool_map: dict[str, type[BaseModel]] = {
             t.model_fields["name"].default: t
             for t in self.tool_registry.get_all_tool_types()
         }
+        # Suggestions and chronicler metadata run after the turn completes
+        self.post_turn = PostTurnStage(
+            self._run_post_turn,
+            workers=int(os.environ.get("POST_TURN_WORKERS", 2)),
+            logger=self.logger,
+        )
+        self.prefetcher = TurnPrefetcher(
+            orchestrator.db_path,
+            self.tool_registry,
+            self.vector_store,
+            self.retrieval_engine,
+            history_limit=MAX_HISTORY_MESSAGES,
+            logger=self.logger,
+            wait_for_background=self.wait_for_background,
+        )
 
     def execute_turn(self, game_session: GameSession, thread_db_manager, turn_id: str):
         if self.orchestrator.stop_event.is_set():
             return
+
+        # Game state writes go through a per-turn unit of work: flushed after each tool call,
+        # committed together with the turn's messages, rolled back if the turn is not persisted.
+        state_uow = GameStateUnitOfWork(thread_db_manager.game_state)
+        thread_db_manager.game_state = state_uow
+        persisted = False
+        try:
+            persisted = self._run_turn(game_session, thread_db_manager, turn_id, state_uow)
+        finally:
+            try:
+                if not persisted:
+                    state_uow.rollback()
+                    self.logger.info(f"Turn {turn_id} was not persisted; game state changes rolled back.")
+            except Exception as e:
+                self.logger.error(f"Failed to finalize game state for turn {turn_id}: {e}", exc_info=True)
+            thread_db_manager.game_state = state_uow.repository
+            self.logger.debug(f"LLM connection reuse after turn {turn_id}: {self.llm_connector.get_connection_stats()}")
+            self.logger.debug(f"LLM call attempts after turn {turn_id}: {self.llm_connector.get_call_stats()}")
+            self.logger.debug(f"Rerank score cache after turn {turn_id}: {self.retrieval_engine.rerank_cache_info()}")
+
+    def wait_for_background(self, session_id: int, timeout: float | None = None):
+        """Blocks until the session's post-turn background work has finished (or the timeout)."""
+        self.post_turn.wait(session_id, timeout)
+
+    def _is_turn_aborted(self, turn_id: str) -> bool:
+        # stop_event is cleared when the next turn starts, so also check the turn is still the active one
+        return self.orchestrator.stop_event.is_set() or self.orchestrator.active_turn_id != turn_id
+
+    def _run_turn(self, game_session: GameSession, thread_db_manager, turn_id: str, state_uow: GameStateUnitOfWork) -> bool:
+        """Plays the turn; returns whether it was persisted (every other exit is rolled back)."""
+        # Context speculatively built when the previous turn completed (validated below)
+        prefetch = self.prefetcher.take(game_session.id)
+
         # --- 1. LOAD MANIFEST ---
         # Fetch the active system manifest for this session
         manifest_mgr = SetupManifest(thread_db_manager)
@@ -70,13 +149,13 @@ class ReActTurnManager:
                 "message": system_error,
                 "turn_id": turn_id,
             })
-            return
+            return False
         # --- 2. SETUP SERVICES ---
         state_builder = StateContextBuilder(
             self.tool_registry, thread_db_manager, self.logger
         )
         mem_retriever = MemoryRetriever(
-            thread_db_manager, self.vector_store, self.logger
+            thread_db_manager, self.vector_store, self.logger, engine=self.retrieval_engine
         )
         sim_service = SimulationService(
             self.llm_connector, self.logger, stop_event=self.orchestrator.stop_event
@@ -97,28 +176,53 @@ class ReActTurnManager:
             self.vector_store,
             self.ui_queue,
             self.logger,
+            retrieval_engine=self.retrieval_engine,
         )
         # --- 3. CONTEXT BUILDING ---
         session_in_thread = Session.from_json(game_session.session_data)
         session_in_thread.id = game_session.id
-        static_instruction = context_builder.build_static_system_instruction(
-            game_session
-        )
         chat_history = context_builder.get_truncated_history(
             session_in_thread, MAX_HISTORY_MESSAGES
         )
         working_history = list(chat_history)
         working_history = self._prepend_rolling_summary(game_session, working_history)
 
-        dynamic_context = context_builder.build_dynamic_context(
-            game_session, chat_history
-        )
+        if prefetch:
+            key = self.prefetcher.make_key(thread_db_manager, game_session, session_in_thread, manifest_id)
+            if not prefetch.matches(key, manifest):
+                self.logger.info(f"Prefetched context for turn {turn_id} is stale; building it cold")
+                prefetch = None
+
+        # Tool definitions are fixed for the turn; budget them before the sections they crowd out
+        llm_tools, tools_defs = build_tool_definitions(self.tool_registry, manifest)
+
+        budget = TokenBudget.from_env()
+        if prefetch:
+            static_instruction = prefetch.static_instruction
+            dynamic_context = prefetch.dynamic_context
+            budget.sizes.update(prefetch.section_tokens)
+        else:
+            static_instruction = context_builder.build_static_system_instruction(
+                game_session
+            )
+            budget.record("static", static_instruction)
+            budget.record("tools", tools_defs)
+            dynamic_context = context_builder.build_dynamic_context(
+                game_session, chat_history, budget
+            )
         turn_system_prompt = f"{static_instruction}\n\n{dynamic_context}"
 
-        mems = mem_retriever.get_relevant(
-            session_in_thread,
-            recent_messages=working_history,
-        )
+        if prefetch and prefetch.candidates is not None:
+            # Only the player's input is new: add its full-text hits and rerank
+            user_text = ""
+            if chat_history and chat_history[-1].role == MessageRole.USER:
+                user_text = chat_history[-1].content or ""
+            mems = mem_retriever.rank_candidates(mem_retriever.refine_candidates(prefetch.candidates, user_text))
+        else:
+            mems = mem_retriever.get_relevant(
+                session_in_thread,
+                recent_messages=working_history,
+            )
 
         # Staged synthetic tool messages — collected here, injected after a synthetic
         # assistant message so the history is OpenAI-standard compliant.
@@ -126,7 +230,7 @@ class ReActTurnManager:
 
         if mems:
             # Emit UI event for debug visibility
-            rag_text_for_ui = mem_retriever.format_for_prompt(mems)
+            rag_text_for_ui = budget.fit("rag", mem_retriever.format_for_prompt(mems))
 
             # Stage the rag context as a synthetic tool return message
             if rag_text_for_ui:
@@ -150,47 +254,6 @@ class ReActTurnManager:
                 }
             )
         # --- 4. TOOL INJECTION ---
-        active_tool_names = [
-            Roll.model_fields["name"].default,
-
-            Adjust.model_fields["name"].default,
-            Set.model_fields["name"].default,
-            Mark.model_fields["name"].default,
-
-            Move.model_fields["name"].default,
-
-            Note.model_fields["name"].default,
-            ContextRetrieve.model_fields["name"].default,
-            StateQuery.model_fields["name"].default,
-
-            NpcSpawn.model_fields["name"].default,
-            LocationCreate.model_fields["name"].default,
-        ]
-        llm_tools = self.tool_registry.get_llm_tool_schemas(active_tool_names)
-        # Inject Dice Rules into Roll Tool
-        if manifest:
-            for tool in llm_tools:
-                if tool["function"]["name"] == "roll":
-                    eng = manifest.engine
-                    desc = (
-                        f"{tool['function']['description']}\n"
-                        f"SYSTEM: Dice='{eng.dice}'. "
-                        f"Mechanic='{eng.mechanic}'. "
-                        f"Crit='{eng.crit}'.\n"
-                        "You must use this tool any time a dice roll is involved. Never 'simulate' a roll."
-                    )
-                    tool["function"]["description"] = desc
-
-        # Appends the list of available tools to the working history
-        tools_defs = "I have access to the following tools to retrieve or confirm information, roll dice, create or modify Game State, etc.\n\n```available_tools\n"
-        for tool in llm_tools:
-            name = tool["function"]["name"]
-            desc = tool["function"]["description"].strip()
-            # Clean up docstring formatting
-            desc = " ".join(desc.split())
-            tools_defs += f"- **{name}**: {desc}\n"
-        tools_defs += "\n```\n\nI will use the dice tool to make decisions, create entropy, simulate outcomes, etc.\n\nI will also proactively decide which tools/functions to use and when.\n"
-
         # Stage the tool definitions as a synthetic tool return message
         if tools_defs:
             synthetic_tool_messages["available_tools"] = Message(
@@ -201,12 +264,40 @@ class ReActTurnManager:
                 turn_id=turn_id,
             )
 
+        # Turns past the compaction threshold are sent as their chronicler summaries
+        request_history = HistoryCompactor.from_env().compact(
+            session_in_thread,
+            chat_history,
+            lambda turn_ids: thread_db_manager.turn_metadata.get_summaries(game_session.id, turn_ids),
+            budget,
+        )
+
+        # History gets what the other sections left, newest messages first
+        summary_tokens = budget.count(game_session.memory or "")
+        working_history = self._prepend_rolling_summary(
+            game_session, budget.pack_history(request_history, reserve=summary_tokens)
+        )
+        self.logger.info(f"Context budget for turn {turn_id}: {budget.summary()}")
+
         # Inject synthetic tool context (RAG, tool definitions, etc.)
         working_history_request = self._get_request_history_with_synthetic_tools(
             working_history, synthetic_tool_messages, turn_id
         )
 
         # --- 5. ACTION LOOP ---
+        streaming = os.environ.get("REACT_STREAMING", "true").lower() == "true"
+        extra_ctx = {
+            "simulation_service": sim_service,
+            "manifest": manifest,  # PASS MANIFEST TO TOOLS
+            "pre_fetched_mems": mems,
+        }
+
+        def run_tool(call_data: dict[str, Any]) -> Message:
+            return self._execute_tool_call(call_data, executor, game_session, setup_data, extra_ctx, turn_id)
+
+        def start_tool(call_data: dict[str, Any]):
+            return self._start_read_only_call(call_data, executor, game_session, setup_data, extra_ctx, turn_id)
+
         loop_count = 0
         narrative_text = ""
         while loop_count < MAX_REACT_LOOPS:
@@ -214,25 +305,51 @@ class ReActTurnManager:
                 self.ui_queue.put(
                     {"type": UIEventType.ERROR, "message": "Stopped by user.", "turn_id": turn_id}
                 )
-                return
+                return False
             loop_count += 1
+            tool_messages: list[Message] | None = None
             try:
-                response = self.llm_connector.chat_with_tools(
-                    system_prompt=turn_system_prompt,
-                    chat_history=working_history_request,
-                    tools=llm_tools,
-                    stop_event=self.orchestrator.stop_event,
-                )
+                # Static instruction and dynamic context travel separately so the
+                # provider can cache the static prefix across loop iterations
+                if streaming:
+                    response, tool_messages = self._stream_llm_step(
+                        static_instruction, dynamic_context, working_history_request, llm_tools, turn_id,
+                        run_tool, start_tool,
+                    )
+                else:
+                    response = self.llm_connector.chat_with_tools(
+                        system_prompt=static_instruction,
+                        chat_history=working_history_request,
+                        tools=llm_tools,
+                        stop_event=self.orchestrator.stop_event,
+                        dynamic_context=dynamic_context,
+                    )
             except InterruptedError:
                 self.ui_queue.put(
                     {"type": UIEventType.ERROR, "message": "Stopped by user.", "turn_id": turn_id}
                 )
-                return
+                return False
+            except CircuitOpenError as e:
+                # The backend kept failing; fail fast instead of queueing more retries behind it
+                self.logger.error(f"LLM unavailable for turn {turn_id}: {e}")
+                self.ui_queue.put(
+                    {
+                        "type": UIEventType.ERROR,
+                        "message": "⚠️ The model backend is not responding. Please try again in a moment.",
+                        "turn_id": turn_id,
+                    }
+                )
+                return False
             except Exception as e:
                 if self.orchestrator.stop_event.is_set():
-                    return
+                    return False
                 raise e
 
+            if response.cached_tokens is not None:
+                self.logger.info(
+                    f"ReAct Loop {loop_count}: {response.cached_tokens}/{response.prompt_tokens} prompt tokens served from cache."
+                )
+
             if not response.content and not response.tool_calls:
                 self.logger.warning(f"Empty response from LLM for turn {turn_id}")
                 continue
@@ -252,7 +369,7 @@ class ReActTurnManager:
 
             # Add the full llm_msg to history, not a stripped one
             session_in_thread.history.append(llm_msg)
-            msg_index = len(session_in_thread.history) - 1
+            msg_index = session_in_thread.next_index() - 1
             narrative_text += f"\n{response.content}"
 
             self.ui_queue.put(
@@ -278,78 +395,20 @@ class ReActTurnManager:
                             "turn_id": turn_id,
                         }
                     )
-                for call_data in response.tool_calls:
+                if tool_messages is None:
+                    # Non-streaming: the whole batch runs now; independent reads run concurrently
                     if self.orchestrator.stop_event.is_set():
-                        return
-
-                    call_id = call_data.get("id", "call_default")
-                    name = call_data["name"]
-                    args = call_data["arguments"]
-                    if name in self.tool_map:
-                        try:
-                            pydantic_model = self.tool_map[name](**args)
-                            extra_ctx = {
-                                "simulation_service": sim_service,
-                                "manifest": manifest,  # PASS MANIFEST TO TOOLS
-                                "pre_fetched_mems": mems if 'mems' in locals() else None,
-                            }
-                            result, _ = executor.execute(
-                                [pydantic_model],
-                                game_session,
-                                setup_data,  # Pass setup data as manifest dict fallback
-                                tool_budget=1,
-                                current_game_time=game_session.game_time,
-                                extra_context=extra_ctx,
-                                turn_id=turn_id,
-                            )
-                            res_data = (
-                                result[0]["result"]
-                                if result
-                                else {"error": "No result returned"}
-                            )
-                            tool_msg = Message(
-                                role=MessageRole.TOOL,
-                                tool_call_id=call_id,
-                                name=name,
-                                content=json.dumps(res_data, indent=2),
-                                turn_id=turn_id,
-                            )
-                            working_history.append(tool_msg)
-                            working_history_request.append(tool_msg)
-                            # CRITICAL: Persist tool messages to history!
-                            session_in_thread.history.append(tool_msg)
-                        except Exception as e:
-                            tool_error = Message(
-                                role=MessageRole.TOOL,
-                                tool_call_id=call_id,
-                                name=name,
-                                content=json.dumps({"error": str(e)}, indent=2),
-                                turn_id=turn_id,
-                            )
-                            working_history.append(tool_error)
-                            working_history_request.append(tool_error)
-                            # Persist error result too
-                            session_in_thread.history.append(tool_error)
-                            self.ui_queue.put(
-                                {
-                                    "type": UIEventType.TOOL_RESULT,
-                                    "name": name,
-                                    "result": str(e),
-                                    "is_error": True,
-                                    "turn_id": turn_id,
-                                }
-                            )
-                    else:
-                        tool_error = Message(
-                            role=MessageRole.TOOL,
-                            tool_call_id=call_id,
-                            name=name,
-                            content=json.dumps({"error": f"Tool '{name}' not found."}, indent=2),
-                            turn_id=turn_id,
-                        )
-                        working_history.append(tool_error)
-                        working_history_request.append(tool_error)
-                        session_in_thread.history.append(tool_error)
+                        return False
+                    tool_messages = self._execute_tool_calls(
+                        response.tool_calls, executor, game_session, setup_data, extra_ctx, turn_id
+                    )
+
+                # Tool results always follow the assistant message that called them
+                for tool_msg in tool_messages:
+                    working_history.append(tool_msg)
+                    working_history_request.append(tool_msg)
+                    # CRITICAL: Persist tool messages (and errors) to history!
+                    session_in_thread.history.append(tool_msg)
                 continue
             else:
                 # No more tools, we are done
@@ -369,7 +428,7 @@ class ReActTurnManager:
                 )
                 narrative_text = "".join(fallback_response)
             except InterruptedError:
-                return
+                return False
                 if narrative_text:
                     self.ui_queue.put(
                         {
@@ -382,132 +441,122 @@ class ReActTurnManager:
             except Exception as fallback_e:
                 self.logger.error(f"Fallback narrative generation failed: {fallback_e}")
 
-        # --- 6. TIER 1: SYNCHRONOUS SUGGESTIONS ---
-        if self.orchestrator.stop_event.is_set() or not narrative_text:
-            return
+        if self._is_turn_aborted(turn_id) or not narrative_text:
+            return False
 
-        choices = []
-        try:
-            # Prepare minimal history for suggestions
-            final_history = list(working_history)
-            if not any(m.content == narrative_text for m in final_history if m.role == MessageRole.ASSISTANT):
-                 final_history.append(Message(role=MessageRole.ASSISTANT, content=narrative_text))
-
-            final_history.append(
-                Message(
-                    role=MessageRole.USER,
-                    content="Simmulate 3-5 brief, concise, and short responses as if the Player wrote them (E.g. 'I do X', 'I go to Y', 'What is Z?', etc.), based on the narrative above. Return strictly as JSON.",
-                )
-            )
-
-            # Fast, small schema call
-            suggestions_out = self.llm_connector.get_structured_response(
-                system_prompt=turn_system_prompt,
-                chat_history=final_history,
-                output_schema=TurnSuggestions,
-                temperature=0.7,
-                stop_event=self.orchestrator.stop_event,
-            )
-            choices = list(suggestions_out.choices or [])
-
-        except Exception as e:
-            self.logger.warning(f"Turn suggestions generation failed: {e}")
-
-        # --- 7. PERSISTENCE ---
+        # --- 6. PERSISTENCE ---
         # Note: Assistant messages were already added to session_in_thread.history
         # incrementally during the ReAct loop to support live interactivity.
-
-        self.orchestrator._update_game_in_thread(
-            game_session, thread_db_manager, session_in_thread
-        )
-
-        if choices:
-            self.ui_queue.put(
-                {
-                    "type": UIEventType.CHOICES,
-                    "choices": choices,
-                    "turn_id": turn_id,
-                }
+        # Game state is flushed first and only committed once the messages are written, so a
+        # failed write still rolls the whole turn back.
+        state_uow.flush()
+        with thread_db_manager.transaction():
+            self.orchestrator._update_game_in_thread(
+                game_session, thread_db_manager, session_in_thread
+            )
+        state_uow.commit()
+
+        # --- 7. POST-TURN STAGE ---
+        # Suggestions and chronicler metadata are produced in the background, after TURN_COMPLETE
+        final_history = list(working_history)
+        if not any(m.content == narrative_text for m in final_history if m.role == MessageRole.ASSISTANT):
+            final_history.append(Message(role=MessageRole.ASSISTANT, content=narrative_text))
+
+        self.post_turn.submit(
+            PostTurnJob(
+                session_id=game_session.id,
+                prompt_id=game_session.prompt_id,
+                turn_id=turn_id,
+                round_number=session_in_thread.next_index() // 2,
+                system_prompt=turn_system_prompt,
+                history=final_history,
             )
-
-        # --- 8. TIER 2: BACKGROUND CHRONICLER ---
-        # Spawn thread for summary, tags, and importance
-        chronicler_thread = threading.Thread(
-            target=self._run_chronicler_task,
-            args=(
-                game_session.id,
-                working_history,
-                narrative_text,
-                turn_id,
-                turn_system_prompt
-            ),
-            daemon=True,
-            name=f"Chronicler-{game_session.id}-{turn_id}"
         )
-        chronicler_thread.start()
+        return True
 
-    def _run_chronicler_task(
-        self,
-        session_id: int,
-        working_history: list[Message],
-        narrative_text: str,
-        turn_id: str,
-        turn_system_prompt: str
-    ):
+    def _run_post_turn(self, job: PostTurnJob):
         """
-        Background task to generate turn summary, tags, and importance.
-        Uses its own DB connection for thread safety.
+        Produces the turn's action suggestions and chronicler metadata (summary, tags,
+        importance): one combined extraction if POST_TURN_COMBINED is on, otherwise two
+        concurrent ones. Jobs superseded by a newer turn only get the chronicler call.
+        Runs on the post-turn stage with its own DB connection.
         """
-        self.logger.debug(f"Starting background chronicler for session {session_id}")
+        self.logger.debug(f"Starting post-turn stage for session {job.session_id}")
+        choices: list[str] = []
+        metadata: TurnMetadata | None = None
 
-        try:
-            # Prepare metadata context
-            final_history = list(working_history)
-            if not any(m.content == narrative_text for m in final_history if m.role == MessageRole.ASSISTANT):
-                 final_history.append(Message(role=MessageRole.ASSISTANT, content=narrative_text))
+        combined = os.environ.get("POST_TURN_COMBINED", "true").lower() == "true"
+        if job.suggestions and combined:
+            try:
+                wrap_up = cast(
+                    TurnWrapUp,
+                    self.llm_connector.get_structured_response(
+                        system_prompt=job.system_prompt,
+                        chat_history=[*job.history, Message(role=MessageRole.USER, content=WRAP_UP_PROMPT)],
+                        output_schema=TurnWrapUp,
+                        temperature=0.6,
+                    ),
+                )
+                choices = list(wrap_up.choices or [])
+                metadata = TurnMetadata(summary=wrap_up.summary, tags=wrap_up.tags, importance=wrap_up.importance)
+            except Exception as e:
+                self.logger.warning(f"Combined post-turn extraction failed, using separate calls: {e}")
+
+        if metadata is None:
+            async def suggest():
+                if not job.suggestions:
+                    return None
+                return await self.llm_connector.async_get_structured_response(
+                    job.system_prompt,
+                    [*job.history, Message(role=MessageRole.USER, content=SUGGESTIONS_PROMPT)],
+                    TurnSuggestions,
+                    0.7,
+                )
 
-            final_history.append(
-                Message(
-                    role=MessageRole.USER,
-                    content=(
-                        "Summarize this scene, generate tags that describe the scene, and provide an importance rating.\n"
-                        "1. Provide a concise 1-3 sentence summary.\n"
-                        "2. Provide snake_case tags.\n"
-                        "3. Rate importance 1-5.\n"
-                        "Return strictly as JSON."
+            async def extract_separately():
+                return await asyncio.gather(
+                    suggest(),
+                    self.llm_connector.async_get_structured_response(
+                        job.system_prompt,
+                        [*job.history, Message(role=MessageRole.USER, content=CHRONICLER_PROMPT)],
+                        TurnMetadata,
+                        0.5,
                     ),
+                    return_exceptions=True,
                 )
-            )
 
-            metadata_out = self.llm_connector.get_structured_response(
-                system_prompt=turn_system_prompt,
-                chat_history=final_history,
-                output_schema=TurnMetadata,
-                temperature=0.5,
-                stop_event=self.orchestrator.stop_event,
+            suggestions_out, metadata_out = self.llm_connector.io_loop.run(extract_separately())
+            if isinstance(suggestions_out, BaseException):
+                self.logger.warning(f"Turn suggestions generation failed: {suggestions_out}")
+            elif suggestions_out is not None:
+                choices = list(cast(TurnSuggestions, suggestions_out).choices or [])
+            if isinstance(metadata_out, BaseException):
+                self.logger.error(f"Background chronicler failed: {metadata_out}")
+            else:
+                metadata = cast(TurnMetadata, metadata_out)
+
+        # Suggestions for a turn that is no longer the latest would be noise
+        if choices and self.orchestrator.active_turn_id == job.turn_id:
+            self.ui_queue.put(
+                {
+                    "type": UIEventType.CHOICES,
+                    "choices": choices,
+                    "turn_id": job.turn_id,
+                }
             )
 
-            # Persist with new DB connection
+        if metadata is not None:
             with DBManager(self.orchestrator.db_path) as db:
-                turnmeta = TurnMetadataService(db, self.vector_store)
-
-                # Fetch rolling history to get round number
-                game_session = db.sessions.get_by_id(session_id)
-                full_session = Session.from_json(game_session.session_data)
-
-                turnmeta.persist(
-                    session_id=session_id,
-                    prompt_id=game_session.prompt_id,
-                    round_number=len(full_session.get_history()) // 2,
-                    summary=(metadata_out.summary or "").strip(),
-                    tags=[t.strip() for t in metadata_out.tags if isinstance(t, str) and t.strip()],
-                    importance=int(metadata_out.importance or 3),
+                TurnMetadataService(db, self.vector_store).persist(
+                    session_id=job.session_id,
+                    prompt_id=job.prompt_id,
+                    round_number=job.round_number,
+                    summary=(metadata.summary or "").strip(),
+                    tags=[t.strip() for t in metadata.tags if isinstance(t, str) and t.strip()],
+                    importance=int(metadata.importance or 3),
+                    turn_id=job.turn_id,
                 )
-
-            self.logger.info(f"Background chronicler complete for session {session_id}")
-
-        except Exception as e:
-            self.logger.error(f"Background chronicler failed: {e}", exc_info=True)
+            self.logger.info(f"Background chronicler complete for session {job.session_id}")
 
     def _prepend_rolling_summary(
         self, game_session: GameSession, history: list[Message]
@@ -529,6 +578,187 @@ class ReActTurnManager:
         )
         return [prefix, *history]
 
+    def _stream_llm_step(
+        self,
+        static_instruction: str,
+        dynamic_context: str,
+        request_history: list[Message],
+        llm_tools: list[dict[str, Any]],
+        turn_id: str,
+        run_tool,
+        start_tool=None,
+    ) -> tuple[LLMResponse, list[Message]]:
+        """
+        One streamed ReAct step: text and thought deltas go to the UI as they arrive, and each
+        tool starts as soon as its call is complete (while the model may still be generating).
+        `start_tool` begins a read-only call in the background and returns a join callable (None
+        for calls that must run inline); consecutive reads overlap and are joined before the next
+        mutating call or the end of the step. Returns the assembled response and the tool result
+        messages, in call order.
+        """
+        tool_messages: list[Message] = []
+        pending_reads: list = []
+        response: LLMResponse | None = None
+
+        def join_reads():
+            tool_messages.extend(join() for join in pending_reads)
+            pending_reads.clear()
+
+        events = self.llm_connector.stream_chat_with_tools(
+            system_prompt=static_instruction,
+            chat_history=request_history,
+            tools=llm_tools,
+            stop_event=self.orchestrator.stop_event,
+            dynamic_context=dynamic_context,
+        )
+        for event in events:
+            if event.kind in (StreamEventKind.CONTENT, StreamEventKind.THOUGHT):
+                self.ui_queue.put(
+                    {
+                        "type": UIEventType.STREAM_DELTA,
+                        "kind": str(event.kind),
+                        "text": event.text,
+                        "turn_id": turn_id,
+                    }
+                )
+            elif event.kind == StreamEventKind.TOOL_CALL and event.tool_call:
+                if self.orchestrator.stop_event.is_set():
+                    raise InterruptedError("Stopped by user")
+                join = start_tool(event.tool_call) if start_tool else None
+                if join is not None:
+                    pending_reads.append(join)
+                    continue
+                # Mutations see the results of every read the model issued before them
+                join_reads()
+                tool_messages.append(run_tool(event.tool_call))
+            elif event.kind == StreamEventKind.DONE:
+                response = event.response
+
+        join_reads()
+        if response is None:
+            raise RuntimeError("LLM stream ended without a response.")
+        return response, tool_messages
+
+    def _execute_tool_call(
+        self,
+        call_data: dict[str, Any],
+        executor: ToolExecutor,
+        game_session: GameSession,
+        setup_data: dict,
+        extra_ctx: dict[str, Any],
+        turn_id: str,
+    ) -> Message:
+        """Runs one model tool call and returns its TOOL message (errors included)."""
+        return self._execute_tool_calls([call_data], executor, game_session, setup_data, extra_ctx, turn_id)[0]
+
+    def _start_read_only_call(
+        self,
+        call_data: dict[str, Any],
+        executor: ToolExecutor,
+        game_session: GameSession,
+        setup_data: dict,
+        extra_ctx: dict[str, Any],
+        turn_id: str,
+    ):
+        """
+        Starts a read-only tool call on the tool pool. Returns a callable that waits for it and
+        builds its TOOL message, or None if the call must run inline (mutating, unknown, invalid).
+        """
+        tool_type = self.tool_map.get(call_data["name"])
+        if tool_type is None or not is_read_only(tool_type):
+            return None
+        try:
+            model = tool_type(**call_data["arguments"])
+        except Exception:
+            return None  # The inline path reports the validation error
+
+        future = executor.start(
+            model, game_session, setup_data, current_game_time=game_session.game_time, extra_context=extra_ctx, turn_id=turn_id
+        )
+
+        def join() -> Message:
+            entry = executor.collect([(model, future)], game_session, turn_id)[0]
+            return self._tool_message(call_data, self._entry_content(entry), turn_id)
+
+        return join
+
+    @staticmethod
+    def _entry_content(entry: dict[str, Any]) -> str:
+        return entry.get("content") or encode_result(
+            entry["name"], entry["result"] if "result" in entry else {"error": entry.get("error")}
+        )
+
+    @staticmethod
+    def _tool_message(call_data: dict[str, Any], content: str | None, turn_id: str) -> Message:
+        return Message(
+            role=MessageRole.TOOL,
+            tool_call_id=call_data.get("id", "call_default"),
+            name=call_data["name"],
+            content=content or encode_result(call_data["name"], {"error": "No result returned"}),
+            turn_id=turn_id,
+        )
+
+    def _execute_tool_calls(
+        self,
+        calls_data: list[dict[str, Any]],
+        executor: ToolExecutor,
+        game_session: GameSession,
+        setup_data: dict,
+        extra_ctx: dict[str, Any],
+        turn_id: str,
+    ) -> list[Message]:
+        """
+        Runs the tool calls of one model response as a single executor batch, so independent
+        read-only calls can run concurrently. Returns one TOOL message per call, in call order.
+        """
+        contents: list[str | None] = [None] * len(calls_data)
+        models: list[BaseModel] = []
+        model_slots: list[int] = []
+
+        for i, call_data in enumerate(calls_data):
+            name = call_data["name"]
+            if name not in self.tool_map:
+                contents[i] = encode_result(name, {"error": f"Tool '{name}' not found."})
+                continue
+            try:
+                models.append(self.tool_map[name](**call_data["arguments"]))
+                model_slots.append(i)
+            except Exception as e:
+                self._report_tool_error(name, e, turn_id)
+                contents[i] = encode_result(name, {"error": str(e)})
+
+        if models:
+            try:
+                results, _ = executor.execute(
+                    models,
+                    game_session,
+                    setup_data,  # Pass setup data as manifest dict fallback
+                    tool_budget=len(models),
+                    current_game_time=game_session.game_time,
+                    extra_context=extra_ctx,
+                    turn_id=turn_id,
+                )
+            except Exception as e:
+                for slot in model_slots:
+                    self._report_tool_error(calls_data[slot]["name"], e, turn_id)
+                    contents[slot] = encode_result(calls_data[slot]["name"], {"error": str(e)})
+            else:
+                for slot, entry in zip(model_slots, results, strict=False):
+                    contents[slot] = self._entry_content(entry)
+
+        return [self._tool_message(call_data, contents[i], turn_id) for i, call_data in enumerate(calls_data)]
+
+    def _report_tool_error(self, name: str, error: Exception, turn_id: str):
+        self.ui_queue.put(
+            {
+                "type": UIEventType.TOOL_RESULT,
+                "name": name,
+                "result": str(error),
+                "is_error": True,
+                "turn_id": turn_id,
+            }
+        )
+
     def _get_request_history_with_synthetic_tools(
         self,
         working_history: list[Message],
@@ -0,0 +1,221 @@
+"""Speculative next-turn context, built while the player is typing."""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from app.context.context_builder import ContextBuilder
+from app.context.memory_retriever import MemoryRetriever, RetrievalCandidates
+from app.context.state_context import StateContextBuilder
+from app.context.token_budget import TokenBudget
+from app.context.tool_definitions import build_tool_definitions
+from app.database.db_manager import DBManager
+from app.models.game_session import GameSession
+from app.models.session import Session
+from app.models.vocabulary import MessageRole
+from app.prefabs.manifest import SystemManifest
+from app.setup.setup_manifest import SetupManifest
+
+# How long a turn waits for a prefetch that is already building, rather than starting cold
+PREFETCH_JOIN_TIMEOUT = 10.0
+# How long a prefetch waits for the previous turn's background work (chronicler tags)
+BACKGROUND_WAIT_TIMEOUT = 60.0
+
+
+@dataclass(frozen=True)
+class PrefetchKey:
+    """Everything the prefetched context was derived from. Any difference invalidates it."""
+
+    session_id: int
+    header: str  # System prompt and author's note
+    manifest_id: int | None
+    state: str
+    memories: str
+    turn_metadata: tuple[int, ...]
+    history: tuple[int, str]  # (message count, digest of the last message) before the player's input
+
+
+@dataclass
+class TurnPrefetch:
+    key: PrefetchKey
+    manifest: SystemManifest
+    static_instruction: str
+    dynamic_context: str
+    candidates: RetrievalCandidates | None
+    section_tokens: dict[str, int]  # Budgeted sizes of the static and dynamic sections
+
+    def matches(self, key: PrefetchKey, manifest: SystemManifest | None) -> bool:
+        # Manifests are cached and shared; a changed manifest is a different object
+        return self.key == key and self.manifest is manifest
+
+
+class _Job:
+    def __init__(self, session_id: int):
+        self.session_id = session_id
+        self.done = threading.Event()
+        self.building = False
+        self.cancelled = False
+        self.result: TurnPrefetch | None = None
+
+
+class TurnPrefetcher:
+    """
+    Precomputes the next turn's static instruction, dynamic context and history-only RAG
+    candidates once a turn completes. The turn takes the result if its key still matches
+    the session state and only folds in the player's new input.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        tool_registry,
+        vector_store,
+        retrieval_engine,
+        history_limit: int,
+        logger: logging.Logger | None = None,
+        wait_for_background: Callable[[int, float], None] | None = None,
+    ):
+        self.db_path = db_path
+        self.tool_registry = tool_registry
+        self.vector_store = vector_store
+        self.retrieval_engine = retrieval_engine
+        self.history_limit = history_limit
+        self.logger = logger or logging.getLogger(__name__)
+        self.wait_for_background = wait_for_background
+        self.enabled = os.environ.get("TURN_PREFETCH", "true").lower() == "true"
+
+        self._jobs: dict[int, _Job] = {}
+        self._lock = threading.Lock()
+
+    # --- Keys ---
+
+    @staticmethod
+    def make_key(db, game_session: GameSession, session: Session, manifest_id: int | None) -> PrefetchKey:
+        """
+        Key of the context a turn would build now. A trailing user message is the player's
+        new input and is not part of the key.
+        """
+        history = session.get_history()
+        count = session.next_index()
+        if history and history[-1].role == MessageRole.USER:
+            history = history[:-1]
+            count -= 1
+        last = history[-1] if history else None
+        last_digest = hashlib.sha1(f"{last.role}\x1f{last.content or ''}".encode()).hexdigest() if last else ""
+
+        header = hashlib.sha1(
+            f"{session.get_system_prompt()}\x1f{game_session.authors_note or ''}".encode()
+        ).hexdigest()
+        return PrefetchKey(
+            session_id=game_session.id,
+            header=header,
+            manifest_id=manifest_id,
+            state=db.game_state.get_revision(game_session.id),
+            memories=db.memories.get_revision(game_session.id),
+            turn_metadata=tuple(db.turn_metadata.get_revision(game_session.id)),
+            history=(count, last_digest),
+        )
+
+    # --- Scheduling ---
+
+    def schedule(self, game_session: GameSession) -> threading.Thread | None:
+        """Starts building the next turn's context for this session on a daemon thread."""
+        if not self.enabled or not game_session or not game_session.id:
+            return None
+
+        job = _Job(game_session.id)
+        with self._lock:
+            previous = self._jobs.get(game_session.id)
+            if previous:
+                previous.cancelled = True
+            self._jobs[game_session.id] = job
+
+        thread = threading.Thread(
+            target=self._run_job,
+            args=(job, game_session),
+            daemon=True,
+            name=f"Prefetch-{game_session.id}",
+        )
+        thread.start()
+        return thread
+
+    def take(self, session_id: int) -> TurnPrefetch | None:
+        """
+        Removes and returns the prefetch for this session, if any. A prefetch that is already
+        building is awaited; one still waiting on background work is cancelled.
+        """
+        with self._lock:
+            job = self._jobs.pop(session_id, None)
+            if job is None:
+                return None
+            if not job.building:
+                job.cancelled = True
+                return None
+
+        if not job.done.wait(PREFETCH_JOIN_TIMEOUT):
+            self.logger.info(f"Prefetch for session {session_id} not ready in time; building context cold")
+            return None
+        return job.result
+
+    def invalidate(self, session_id: int | None = None):
+        with self._lock:
+            jobs = list(self._jobs.values()) if session_id is None else [self._jobs.get(session_id)]
+            for job in jobs:
+                if job:
+                    job.cancelled = True
+                    self._jobs.pop(job.session_id, None)
+
+    def _run_job(self, job: _Job, game_session: GameSession):
+        try:
+            if self.wait_for_background:
+                # Chronicler tags feed retrieval; build after they land
+                self.wait_for_background(game_session.id, BACKGROUND_WAIT_TIMEOUT)
+            with self._lock:
+                if job.cancelled:
+                    return
+                job.building = True
+            job.result = self._build(game_session)
+            if job.result:
+                self.logger.debug(f"Prefetched next-turn context for session {game_session.id}")
+        except Exception as e:
+            self.logger.warning(f"Next-turn prefetch failed for session {game_session.id}: {e}")
+        finally:
+            job.done.set()
+
+    def _build(self, game_session: GameSession) -> TurnPrefetch | None:
+        with DBManager(self.db_path) as db:
+            setup_data = SetupManifest(db).get_manifest(game_session.id)
+            manifest_id = setup_data.get("manifest_id")
+            manifest = db.manifests.get_by_id(manifest_id) if manifest_id else None
+            if not manifest:
+                return None
+
+            state_builder = StateContextBuilder(self.tool_registry, db, self.logger)
+            mem_retriever = MemoryRetriever(db, self.vector_store, self.logger, engine=self.retrieval_engine)
+            context_builder = ContextBuilder(
+                db, self.vector_store, state_builder, mem_retriever, None, logger=self.logger, manifest=manifest
+            )
+
+            session = Session.from_json(game_session.session_data)
+            session.id = game_session.id
+            history = context_builder.get_truncated_history(session, self.history_limit)
+
+            # Read the key first: a write racing the build makes the prefetch look stale, never fresh
+            key = self.make_key(db, game_session, session, manifest_id)
+            budget = TokenBudget.from_env()
+            static_instruction = context_builder.build_static_system_instruction(game_session)
+            budget.record("static", static_instruction)
+            budget.record("tools", build_tool_definitions(self.tool_registry, manifest)[1])
+            return TurnPrefetch(
+                key=key,
+                manifest=manifest,
+                static_instruction=static_instruction,
+                dynamic_context=context_builder.build_dynamic_context(game_session, history, budget),
+                candidates=mem_retriever.prefetch_candidates(session, history),
+                section_tokens=dict(budget.sizes),
+            )
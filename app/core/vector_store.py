@@ -2,6 +2,9 @@ from __future__ import annotations
 
 import logging
 import os
+import re
+import threading
+from collections import OrderedDict
 from typing import Any, cast
 
 import chromadb
@@ -10,19 +13,45 @@ from fastembed import TextEmbedding
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_EMBED_BATCH_SIZE = 64
+DEFAULT_EMBED_CACHE_SIZE = 1024
+MIGRATION_BATCH_SIZE = 500
+
+# VECTOR_PARTITIONING modes
+PARTITION_SHARED = "shared"  # one collection per data type, filtered by session_id
+PARTITION_SESSION = "session"  # one turn and one memory collection per session
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
 class VectorStore:
     """
     Manages vector embeddings for:
     1. Turn Metadata (History Search)
     2. Memories (Lore/Facts)
     3. Rules (RAG Rulebook)
+
+    With VECTOR_PARTITIONING=session, turns and memories live in per-session collections
+    (created on first write) so a search only walks that session's HNSW graph and deleting
+    a session drops its collections. Rows left in the shared collections by an earlier layout
+    are still searched and deleted until they are migrated. Rules stay in one collection keyed by ruleset.
     """
 
+    partitioning = PARTITION_SHARED
+
     def __init__(self, persist_directory: str = "./chroma_db"):
         self.client = chromadb.PersistentClient(
             path=persist_directory, settings=Settings(anonymized_telemetry=False)
         )
 
+        self.partitioning = os.environ.get("VECTOR_PARTITIONING", PARTITION_SHARED).strip().lower()
+        if self.partitioning not in (PARTITION_SHARED, PARTITION_SESSION):
+            logger.warning(f"Unknown VECTOR_PARTITIONING '{self.partitioning}', using '{PARTITION_SHARED}'")
+            self.partitioning = PARTITION_SHARED
+        # (collection prefix, session_id) -> collection
+        self._session_collections: dict[tuple[str, int], Any] = {}
+        self._session_collections_lock = threading.Lock()
+
         # Initialize Collections
         self.turn_collection = self.client.get_or_create_collection(
             name="turn_metadata", metadata={"hnsw:space": "cosine"}
@@ -37,6 +66,15 @@ class VectorStore:
 
         # Embed Model
         model_name = os.environ.get("EMBEDDING_MODEL", "BAAI/bge-small-en-v1.5")
+        self.embed_batch_size = max(1, int(os.environ.get("EMBEDDING_BATCH_SIZE", DEFAULT_EMBED_BATCH_SIZE)))
+        self.embed_model_name = model_name
+
+        # Bounded LRU of (model, normalized text) -> vector, shared by searches and upserts
+        self.embed_cache_size = max(0, int(os.environ.get("EMBEDDING_CACHE_SIZE", DEFAULT_EMBED_CACHE_SIZE)))
+        self._embed_cache: OrderedDict[tuple[str, str], list[float]] = OrderedDict()
+        self._embed_cache_lock = threading.Lock()
+        self.embed_cache_hits = 0
+        self.embed_cache_misses = 0
 
         # Setup local cache dir for the embedding model to avoid redundant network downloads
         cache_dir = os.path.join(persist_directory, "models")
@@ -60,10 +98,204 @@ class VectorStore:
                 logger.error(f"Failed to load embedding model: {e}")
                 # Last resort fallback to default model
                 self.embed_model = TextEmbedding(model_name="BAAI/bge-small-en-v1.5", cache_dir=cache_dir)
+                self.embed_model_name = "BAAI/bge-small-en-v1.5"
 
     def _embed(self, text: str) -> list[float]:
-        embeddings = list(self.embed_model.embed([text]))
-        return [float(x) for x in embeddings[0].tolist()]
+        return self.embed_many([text])[0]
+
+    def embed_many(self, texts: list[str]) -> list[list[float]]:
+        """
+        Embeds a list of texts in fastembed batches. Output order matches input order.
+        Cached vectors are reused; only unseen texts go through the model.
+        """
+        if not texts:
+            return []
+
+        normalized = [_WHITESPACE_RE.sub(" ", t).strip() for t in texts]
+        results: list[list[float] | None] = [None] * len(texts)
+        missing: dict[str, list[int]] = {}
+
+        with self._embed_cache_lock:
+            for i, norm in enumerate(normalized):
+                key = (self.embed_model_name, norm)
+                cached = self._embed_cache.get(key)
+                if cached is not None:
+                    self._embed_cache.move_to_end(key)
+                    results[i] = cached
+                    self.embed_cache_hits += 1
+                else:
+                    missing.setdefault(norm, []).append(i)
+                    self.embed_cache_misses += 1
+
+        if missing:
+            pending = list(missing)
+            embeddings = self.embed_model.embed(pending, batch_size=self.embed_batch_size)
+            vectors = [[float(x) for x in emb.tolist()] for emb in embeddings]
+
+            with self._embed_cache_lock:
+                for norm, vector in zip(pending, vectors, strict=True):
+                    for i in missing[norm]:
+                        results[i] = vector
+                    if self.embed_cache_size:
+                        self._embed_cache[(self.embed_model_name, norm)] = vector
+                        self._embed_cache.move_to_end((self.embed_model_name, norm))
+                while len(self._embed_cache) > self.embed_cache_size:
+                    self._embed_cache.popitem(last=False)
+
+        return cast(list[list[float]], results)
+
+    def embed_cache_info(self) -> dict[str, int]:
+        with self._embed_cache_lock:
+            return {
+                "hits": self.embed_cache_hits,
+                "misses": self.embed_cache_misses,
+                "size": len(self._embed_cache),
+                "max_size": self.embed_cache_size,
+            }
+
+    def _write_batches(self, collection, ids: list[str], texts: list[str], metadatas: list[dict[str, Any]], documents: list[str] | None = None):
+        """Embeds and upserts records in chunks of embed_batch_size (capped by Chroma's max batch)."""
+        chunk = self.embed_batch_size
+        try:
+            chunk = min(chunk, self.client.get_max_batch_size())
+        except Exception:
+            pass
+
+        for start in range(0, len(ids), chunk):
+            end = start + chunk
+            embeddings = self.embed_many(texts[start:end])
+            collection.upsert(
+                ids=ids[start:end],
+                embeddings=embeddings,  # type: ignore[arg-type]
+                metadatas=metadatas[start:end],  # type: ignore[arg-type]
+                documents=documents[start:end] if documents else None,
+            )
+
+    # ==========================================================================
+    # PARTITIONS
+    # ==========================================================================
+
+    @property
+    def partitioned(self) -> bool:
+        return self.partitioning == PARTITION_SESSION
+
+    @staticmethod
+    def _partition_name(prefix: str, session_id: int) -> str:
+        return f"{prefix}_s{session_id}"
+
+    def _session_collection(self, prefix: str, session_id: int, create: bool):
+        """Cached per-session collection; None if it does not exist and create is False."""
+        key = (prefix, session_id)
+        with self._session_collections_lock:
+            collection = self._session_collections.get(key)
+            if collection is not None:
+                return collection
+            name = self._partition_name(prefix, session_id)
+            if create:
+                collection = self.client.get_or_create_collection(name=name, metadata={"hnsw:space": "cosine"})
+            else:
+                try:
+                    collection = self.client.get_collection(name=name)
+                except Exception:
+                    # Nothing indexed for this session yet; not cached so a later write can create it
+                    return None
+            self._session_collections[key] = collection
+            return collection
+
+    def _turns_for(self, session_id: int):
+        if not self.partitioned:
+            return self.turn_collection
+        return self._session_collection("turn_metadata", session_id, create=True)
+
+    def _memories_for(self, session_id: int):
+        if not self.partitioned:
+            return self.memories_collection
+        return self._session_collection("memories", session_id, create=True)
+
+    def _session_sources(self, prefix: str, session_id: int) -> list[tuple[Any, bool]]:
+        """
+        Collections holding a session's records, paired with whether they are shared (and so
+        need the session filter). A partitioned store keeps reading the shared collection while
+        it still has unmigrated rows, so sessions indexed before the switch stay searchable.
+        """
+        shared = self.turn_collection if prefix == "turn_metadata" else self.memories_collection
+        if not self.partitioned:
+            return [(shared, True)]
+        sources = []
+        own = self._session_collection(prefix, session_id, create=False)
+        if own is not None:
+            sources.append((own, False))
+        if shared.count():
+            sources.append((shared, True))
+        return sources
+
+    @staticmethod
+    def _session_where(session_id: int, shared: bool, *conditions: dict[str, Any]) -> dict[str, Any]:
+        """Chroma where clause; the session filter is only needed in the shared collections."""
+        clauses = [{"session_id": {"$eq": session_id}}, *conditions] if shared else list(conditions)
+        return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+    def _query_session(self, prefix: str, session_id: int, embedding: list[float], n_results: int, *conditions: dict[str, Any]) -> list[tuple[float, dict[str, Any], Any]]:
+        """Nearest (distance, metadata, document) hits across the session's collections, closest first."""
+        hits: dict[str, tuple[float, dict[str, Any], Any]] = {}
+        for collection, shared in self._session_sources(prefix, session_id):
+            res = cast(Any, collection).query(
+                query_embeddings=[embedding], n_results=n_results,
+                where=cast(Any, self._session_where(session_id, shared, *conditions)),
+            )
+            ids = (res.get("ids") or [[]])[0]
+            metas = (res.get("metadatas") or [[]])[0] or []
+            docs = (res.get("documents") or [[]])[0] or [None] * len(ids)
+            dists = (res.get("distances") or [[]])[0] or [0] * len(ids)
+            for i, doc_id in enumerate(ids):
+                # The session's own collection comes first; a stale shared copy never wins
+                if doc_id not in hits and i < len(metas) and isinstance(metas[i], dict):
+                    hits[doc_id] = (dists[i], metas[i], docs[i])
+        return sorted(hits.values(), key=lambda hit: hit[0])[:n_results]
+
+    def migrate_to_session_collections(self, batch_size: int = MIGRATION_BATCH_SIZE) -> dict[int, int]:
+        """
+        Moves turns and memories from the shared collections into per-session collections,
+        reusing the stored embeddings. Rows without a session_id are left in place.
+        Returns the number of records moved per session.
+        """
+        moved: dict[int, int] = {}
+        for prefix, shared in (("turn_metadata", self.turn_collection), ("memories", self.memories_collection)):
+            skipped = 0
+            while True:
+                page = shared.get(limit=batch_size, offset=skipped, include=["embeddings", "metadatas", "documents"])
+                ids = page.get("ids") or []
+                if not ids:
+                    break
+                metadatas = page.get("metadatas") or [None] * len(ids)
+                documents = page.get("documents") or [None] * len(ids)
+                embeddings = page.get("embeddings")
+                if embeddings is None:
+                    embeddings = [None] * len(ids)
+
+                by_session: dict[int, list[int]] = {}
+                for i, md in enumerate(metadatas):
+                    session_id = md.get("session_id") if isinstance(md, dict) else None
+                    if session_id is None or embeddings[i] is None:
+                        skipped += 1
+                        continue
+                    by_session.setdefault(int(session_id), []).append(i)
+
+                done: list[str] = []
+                for session_id, rows in by_session.items():
+                    target = self._session_collection(prefix, session_id, create=True)
+                    target.upsert(
+                        ids=[ids[i] for i in rows],
+                        embeddings=[list(embeddings[i]) for i in rows],
+                        metadatas=[metadatas[i] for i in rows],
+                        documents=[documents[i] for i in rows] if any(documents[i] is not None for i in rows) else None,
+                    )
+                    moved[session_id] = moved.get(session_id, 0) + len(rows)
+                    done.extend(ids[i] for i in rows)
+                if done:
+                    shared.delete(ids=done)
+        logger.info(f"Migrated vector data of {len(moved)} sessions to per-session collections")
+        return moved
 
     # ==========================================================================
     # RULES (The New Layer)
@@ -78,7 +310,6 @@ class VectorStore:
             return
 
         ids = []
-        embeddings = []
         metadatas = []
         documents = []
 
@@ -89,7 +320,6 @@ class VectorStore:
 
             ids.append(doc_id)
             documents.append(content)
-            embeddings.append(self._embed(content))
             metadatas.append({
                 "ruleset_id": ruleset_id,
                 "name": rule['name'],
@@ -97,12 +327,7 @@ class VectorStore:
             })
 
         try:
-            self.rules_collection.upsert(
-                ids=ids,
-                embeddings=embeddings,  # type: ignore[arg-type]
-                metadatas=metadatas,  # type: ignore[arg-type]
-                documents=documents
-            )
+            self._write_batches(self.rules_collection, ids, documents, metadatas, documents=documents)
             logger.info(f"Indexed {len(rules)} rules for Ruleset {ruleset_id}")
         except Exception as e:
             logger.error(f"Error indexing rules: {e}", exc_info=True)
@@ -140,107 +365,107 @@ class VectorStore:
     # ==========================================================================
 
     def add_turn(self, session_id: int, prompt_id: int, round_number: int, summary: str, tags: list[str], importance: int):
+        self.add_turns_bulk(session_id, prompt_id, [{
+            "round_number": round_number,
+            "summary": summary,
+            "tags": tags,
+            "importance": importance,
+        }])
+
+    def add_turns_bulk(self, session_id: int, prompt_id: int, turns: list[dict[str, Any]]):
+        """
+        Batch index turn summaries.
+        turns: List of {'round_number': int, 'summary': str, 'tags': List[str], 'importance': int}
+        """
+        if not turns:
+            return
+        ids = [f"{session_id}_{t['round_number']}" for t in turns]
+        texts = [t["summary"] for t in turns]
+        metadatas = [{
+            "session_id": session_id,
+            "prompt_id": prompt_id,
+            "round_number": t["round_number"],
+            "summary": t["summary"],
+            "tags": ",".join(t.get("tags", [])),
+            "importance": t["importance"],
+        } for t in turns]
         try:
-            embedding = self._embed(summary)
-            doc_id = f"{session_id}_{round_number}"
-            self.turn_collection.add(
-                ids=[doc_id],
-                embeddings=[embedding],  # type: ignore[arg-type]
-                metadatas=[{
-                    "session_id": session_id,
-                    "prompt_id": prompt_id,
-                    "round_number": round_number,
-                    "summary": summary,
-                    "tags": ",".join(tags),
-                    "importance": importance,
-                }]  # type: ignore[list-item]
-            )
+            self._write_batches(self._turns_for(session_id), ids, texts, metadatas)
         except Exception as e:
-            logger.error(f"Error adding turn: {e}")
+            logger.error(f"Error adding turns: {e}")
 
     def search_relevant_turns(self, session_id: int, query_text: str, top_k: int = 5, min_importance: int = 2) -> list[dict[str, Any]]:
+        if not self._session_sources("turn_metadata", session_id):
+            return []
         embedding = self._embed(query_text)
-        where_clause = cast(Any, {
-            "$and": [
-                {"session_id": {"$eq": session_id}},
-                {"importance": {"$gte": min_importance}},
-            ]
-        })
-        results = self.turn_collection.query(
-            query_embeddings=[embedding], n_results=top_k, where=where_clause  # type: ignore[arg-type]
-        )
-        formatted = []
-        res_ids = results.get("ids")
-        res_metas = results.get("metadatas")
-
-        if res_ids and res_ids[0] and res_metas and res_metas[0]:
-            for _i, meta in enumerate(res_metas[0]):
-                if not isinstance(meta, dict):
-                    continue
-                formatted.append({
-                    "round_number": meta.get("round_number", 0),
-                    "summary": meta.get("summary", ""),
-                    "tags": str(meta.get("tags", "")).split(","),
-                    "importance": meta.get("importance", 0)
-                })
-        return formatted
+        hits = self._query_session("turn_metadata", session_id, embedding, top_k, {"importance": {"$gte": min_importance}})
+        return [{
+            "round_number": meta.get("round_number", 0),
+            "summary": meta.get("summary", ""),
+            "tags": str(meta.get("tags", "")).split(","),
+            "importance": meta.get("importance", 0)
+        } for _, meta, _ in hits]
 
     def upsert_memory(self, session_id: int, memory_id: int, text: str, kind: str, tags: list[str], priority: int):
+        self.upsert_memories_bulk(session_id, [{
+            "memory_id": memory_id,
+            "text": text,
+            "kind": kind,
+            "tags": tags,
+            "priority": priority,
+        }])
+
+    def upsert_memories_bulk(self, session_id: int, memories: list[dict[str, Any]]):
+        """
+        Batch embed and upsert memories.
+        memories: List of {'memory_id': int, 'text': str, 'kind': str, 'tags': List[str], 'priority': int}
+        """
+        if not memories:
+            return
+        ids = [f"{session_id}:{m['memory_id']}" for m in memories]
+        texts = [m["text"] for m in memories]
+        metadatas = [{
+            "session_id": session_id,
+            "memory_id": m["memory_id"],
+            "kind": m["kind"],
+            "tags": ",".join(m.get("tags", [])),
+            "priority": m["priority"],
+        } for m in memories]
         try:
-            emb = self._embed(text)
-            doc_id = f"{session_id}:{memory_id}"
-            self.memories_collection.upsert(
-                ids=[doc_id],
-                embeddings=[emb],  # type: ignore[arg-type]
-                metadatas=[{
-                    "session_id": session_id,
-                    "memory_id": memory_id,
-                    "kind": kind,
-                    "tags": ",".join(tags),
-                    "priority": priority,
-                }]  # type: ignore[list-item]
-            )
+            self._write_batches(self._memories_for(session_id), ids, texts, metadatas, documents=texts)
         except Exception as e:
-            logger.error(f"upsert_memory failed: {e}")
+            logger.error(f"upsert_memories_bulk failed: {e}")
 
     def search_memories(self, session_id: int, query_text: str, k: int = 5, min_priority: int = 1) -> list[dict[str, Any]]:
-        if not query_text.strip():
+        if not query_text.strip() or not self._session_sources("memories", session_id):
             return []
         emb = self._embed(query_text)
-        where_clause = {
-            "$and": [
-                {"session_id": {"$eq": session_id}},
-                {"priority": {"$gte": min_priority}},
-                {"kind": {"$ne": "turn_metadata"}},
-            ]
-        }
-        res = cast(Any, self.memories_collection).query(
-            query_embeddings=[emb], n_results=k, where=cast(Any, where_clause)
+        hits = self._query_session(
+            "memories", session_id, emb, k, {"priority": {"$gte": min_priority}}, {"kind": {"$ne": "turn_metadata"}}
         )
-        out = []
-        res_ids = res.get("ids")
-        res_metas = res.get("metadatas")
-        res_docs = res.get("documents")
-        res_dists = res.get("distances")
-
-        if res_ids and res_ids[0] and res_metas and res_metas[0] and res_docs and res_docs[0]:
-            for i, md in enumerate(res_metas[0]):
-                if not isinstance(md, dict):
-                    continue
-                out.append({
-                    "memory_id": md.get("memory_id"),
-                    "kind": md.get("kind"),
-                    "content": res_docs[0][i], # Return content too
-                    "tags": str(md.get("tags", "")).split(",") if md.get("tags") else [],
-                    "distance": res_dists[0][i] if res_dists and res_dists[0] else 0
-                })
-        return out
+        return [{
+            "memory_id": md.get("memory_id"),
+            "kind": md.get("kind"),
+            "content": doc,  # Return content too
+            "tags": str(md.get("tags", "")).split(",") if md.get("tags") else [],
+            "distance": distance,
+        } for distance, md, doc in hits]
 
     def delete_session_data(self, session_id: int):
         """Removes all turns and memories for the given session."""
         try:
-            self.turn_collection.delete(where=cast(Any, {"session_id": {"$eq": session_id}}))
-            self.memories_collection.delete(where=cast(Any, {"session_id": {"$eq": session_id}}))
+            if self.partitioned:
+                for prefix in ("turn_metadata", "memories"):
+                    with self._session_collections_lock:
+                        self._session_collections.pop((prefix, session_id), None)
+                    try:
+                        self.client.delete_collection(name=self._partition_name(prefix, session_id))
+                    except Exception:
+                        pass  # Session never indexed anything
+            # Shared collections: the only copy in shared mode, unmigrated leftovers otherwise
+            for shared in (self.turn_collection, self.memories_collection):
+                if not self.partitioned or shared.count():
+                    shared.delete(where=cast(Any, {"session_id": {"$eq": session_id}}))
             logger.info(f"Deleted all vector data for Session {session_id}")
         except Exception as e:
             logger.error(f"delete_session_data failed: {e}")
@@ -249,7 +474,25 @@ class VectorStore:
         """Removes a specific memory by its generated ID."""
         try:
             doc_id = f"{session_id}:{memory_id}"
-            self.memories_collection.delete(ids=[doc_id])
+            # An unmigrated copy may still sit in the shared collection
+            for collection, _ in self._session_sources("memories", session_id):
+                collection.delete(ids=[doc_id])
             logger.debug(f"Deleted vector memory {doc_id}")
         except Exception as e:
             logger.error(f"delete_memory failed: {e}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Vector store maintenance")
+    parser.add_argument("command", choices=["migrate"], help="migrate: move shared turns/memories into per-session collections")
+    parser.add_argument("--path", default="./chroma_db", help="Chroma persist directory")
+    parser.add_argument("--batch-size", type=int, default=MIGRATION_BATCH_SIZE)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    moved = VectorStore(args.path).migrate_to_session_collections(args.batch_size)
+    for sid, count in sorted(moved.items()):
+        print(f"session {sid}: {count} records")
+    print("Set VECTOR_PARTITIONING=session to use the per-session collections.")
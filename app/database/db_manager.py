@@ -1,13 +1,17 @@
 from __future__ import annotations
 
 import sqlite3
+from contextlib import contextmanager
 from typing import TYPE_CHECKING
 
+from app.database.repositories.base_repository import transaction
+
 if TYPE_CHECKING:
     from app.database.repositories import (
         GameStateRepository,
         ManifestRepository,
         MemoryRepository,
+        MessageRepository,
         PromptRepository,
         RulesetRepository,
         SessionRepository,
@@ -35,6 +39,7 @@ class DBManager:
         self.prompts: PromptRepository | None = None
         self.sessions: SessionRepository | None = None
         self.memories: MemoryRepository | None = None
+        self.messages: MessageRepository | None = None
         self.game_state: GameStateRepository | None = None
         self.turn_metadata: TurnMetadataRepository | None = None
         self.rulesets: RulesetRepository | None = None
@@ -60,6 +65,7 @@ class DBManager:
         self.prompts = repositories.PromptRepository(self.conn)
         self.sessions = repositories.SessionRepository(self.conn)
         self.memories = repositories.MemoryRepository(self.conn)
+        self.messages = repositories.MessageRepository(self.conn)
         self.game_state = repositories.GameStateRepository(self.conn)
         self.turn_metadata = repositories.TurnMetadataRepository(self.conn)
         self.rulesets = repositories.RulesetRepository(self.conn)
@@ -73,6 +79,13 @@ class DBManager:
         if self.conn:
             self.conn.close()
 
+    @contextmanager
+    def transaction(self):
+        """Groups writes across repositories into one transaction; joins one already open."""
+        assert self.conn is not None
+        with transaction(self.conn):
+            yield
+
     def create_tables(self):
         """Initialize all database tables."""
         if not self.conn:
@@ -90,6 +103,7 @@ class DBManager:
             self.prompts,
             self.sessions,
             self.memories,
+            self.messages,
             self.turn_metadata,
             self.game_state,
             self.rulesets,
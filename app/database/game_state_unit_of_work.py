@@ -0,0 +1,173 @@
+"""Per-turn write-behind cache over GameStateRepository."""
+
+from __future__ import annotations
+
+import copy
+import logging
+import threading
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from app.database.repositories import GameStateRepository
+
+logger = logging.getLogger(__name__)
+
+EntityRef = tuple[int, str, str]  # (session_id, entity_type, entity_key)
+
+
+@dataclass
+class _Entry:
+    data: dict | None  # None = entity does not exist (never created or deleted)
+    version: int
+    dirty: bool = False
+
+
+class GameStateUnitOfWork:
+    """
+    Drop-in replacement for `db_manager.game_state` during a turn.
+
+    Entities are loaded once and mutated in memory; `flush()` writes every dirty entity
+    in one transaction. Versions are bumped once per `set_entity`, exactly as the
+    repository would. The pre-turn state of everything written is remembered so an
+    aborted turn can be rolled back with `rollback()`.
+
+    Methods not overridden here are delegated to the wrapped repository.
+    """
+
+    def __init__(self, repository: GameStateRepository):
+        self.repository = repository
+        self._entries: dict[EntityRef, _Entry] = {}
+        # First-seen state of each entity written this turn, and the version we last stored
+        self._originals: dict[EntityRef, tuple[dict | None, int]] = {}
+        self._flushed_versions: dict[EntityRef, int] = {}
+        self._lock = threading.RLock()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.repository, name)
+
+    # --- Repository interface ---
+
+    def _load(self, ref: EntityRef) -> _Entry:
+        entry = self._entries.get(ref)
+        if entry is None:
+            data, version = self.repository.get_entity_with_version(*ref)
+            entry = _Entry(data=data, version=version)
+            self._entries[ref] = entry
+        return entry
+
+    def get_entity(self, session_id: int, entity_type: str, entity_key: str) -> dict:
+        with self._lock:
+            entry = self._load((session_id, entity_type, entity_key))
+            return copy.deepcopy(entry.data) if entry.data is not None else {}
+
+    def set_entity(self, session_id: int, entity_type: str, entity_key: str, state_data: dict) -> int:
+        with self._lock:
+            ref = (session_id, entity_type, entity_key)
+            entry = self._load(ref)
+            self._originals.setdefault(ref, (copy.deepcopy(entry.data), entry.version))
+            entry.data = copy.deepcopy(state_data)
+            entry.version += 1
+            entry.dirty = True
+            return entry.version
+
+    def delete_entity(self, session_id: int, entity_type: str, entity_key: str):
+        with self._lock:
+            ref = (session_id, entity_type, entity_key)
+            entry = self._load(ref)
+            self._originals.setdefault(ref, (copy.deepcopy(entry.data), entry.version))
+            entry.data = None
+            entry.version = 0  # A later re-create starts at version 1, like a fresh insert
+            entry.dirty = True
+
+    def get_all_entities_by_type(self, session_id: int, entity_type: str) -> dict:
+        with self._lock:
+            results = self.repository.get_all_entities_by_type(session_id, entity_type)
+            for (sid, etype, key), entry in self._entries.items():
+                if sid != session_id or etype != entity_type:
+                    continue
+                if entry.data is None:
+                    results.pop(key, None)
+                else:
+                    results[key] = copy.deepcopy(entry.data)
+            return dict(sorted(results.items()))
+
+    def get_versions(self, session_id: int, entity_type: str) -> dict[str, int]:
+        with self._lock:
+            versions = self.repository.get_versions(session_id, entity_type)
+            for (sid, etype, key), entry in self._entries.items():
+                if sid != session_id or etype != entity_type:
+                    continue
+                if entry.data is None:
+                    versions.pop(key, None)
+                else:
+                    versions[key] = entry.version
+            return versions
+
+    def get_all(self, session_id: int) -> dict[str, dict[str, Any]]:
+        self.flush()
+        return self.repository.get_all(session_id)
+
+    # --- Unit of work ---
+
+    @property
+    def has_pending(self) -> bool:
+        return any(e.dirty for e in self._entries.values())
+
+    def flush(self):
+        """Writes all dirty entities in one transaction."""
+        with self._lock:
+            dirty = {ref: e for ref, e in self._entries.items() if e.dirty}
+            if not dirty:
+                return
+
+            upserts = [(*ref, e.data, e.version) for ref, e in dirty.items() if e.data is not None]
+            deletes = [ref for ref, e in dirty.items() if e.data is None]
+            self.repository.apply_changes(upserts, deletes)
+
+            for ref, entry in dirty.items():
+                entry.dirty = False
+                self._flushed_versions[ref] = entry.version
+            logger.debug(f"Flushed {len(upserts)} upserts and {len(deletes)} deletes")
+
+    def discard(self):
+        """Drops un-flushed changes; affected entities are re-read from the database on next access."""
+        with self._lock:
+            for ref in [ref for ref, e in self._entries.items() if e.dirty]:
+                del self._entries[ref]
+                if ref not in self._flushed_versions:
+                    self._originals.pop(ref, None)
+
+    def rollback(self):
+        """
+        Discards pending changes and restores every entity flushed during this unit of work
+        to its original state. Entities changed by someone else since our flush are left alone.
+        """
+        with self._lock:
+            self.discard()
+
+            upserts = []
+            deletes = []
+            for ref, flushed_version in self._flushed_versions.items():
+                original_data, original_version = self._originals[ref]
+                _, current_version = self.repository.get_entity_with_version(*ref)
+                if current_version != flushed_version:
+                    logger.warning(f"Skipping rollback of {ref[1]}:{ref[2]}; it was modified concurrently")
+                    continue
+                if original_data is None:
+                    deletes.append(ref)
+                else:
+                    # Bump rather than reuse the old version so version-based UI caches refresh
+                    upserts.append((*ref, original_data, max(original_version, flushed_version) + 1))
+
+            self.repository.apply_changes(upserts, deletes)
+            self._entries.clear()
+            self._originals.clear()
+            self._flushed_versions.clear()
+
+    def commit(self):
+        """Flushes pending changes and forgets rollback information."""
+        with self._lock:
+            self.flush()
+            self._originals.clear()
+            self._flushed_versions.clear()
@@ -2,6 +2,7 @@ from .base_repository import BaseRepository
 from .game_state_repository import GameStateRepository
 from .manifest_repository import ManifestRepository
 from .memory_repository import MemoryRepository
+from .message_repository import MessageRepository
 from .prompt_repository import PromptRepository
 from .ruleset_repository import RulesetRepository
 from .session_repository import SessionRepository
@@ -13,6 +14,7 @@ __all__ = [
     "GameStateRepository",
     "ManifestRepository",
     "MemoryRepository",
+    "MessageRepository",
     "PromptRepository",
     "RulesetRepository",
     "SessionRepository",
@@ -2,6 +2,25 @@
 
 import sqlite3
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
+
+
+@contextmanager
+def transaction(conn: sqlite3.Connection):
+    """
+    Groups statements into one write transaction (the connection runs in autocommit).
+    Joins the outer transaction if one is already open.
+    """
+    if conn.in_transaction:
+        yield
+        return
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
 
 
 class BaseRepository(ABC):
@@ -33,5 +52,13 @@ class BaseRepository(ABC):
         return cursor.fetchall()
 
     def _commit(self):
-        """Commit transaction."""
-        self.conn.commit()
+        """Commit transaction. Inside a grouped `transaction` the outermost block commits instead."""
+        # In autocommit mode an open transaction can only be an explicit BEGIN
+        if self.conn.isolation_level is not None or not self.conn.in_transaction:
+            self.conn.commit()
+
+    @contextmanager
+    def _transaction(self):
+        """See `transaction`."""
+        with transaction(self.conn):
+            yield
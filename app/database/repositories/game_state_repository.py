@@ -1,5 +1,6 @@
 """Repository for game state operations."""
 
+import hashlib
 import json
 from typing import Any
 
@@ -68,6 +69,52 @@ class GameStateRepository(BaseRepository):
         self._commit()
         return row["version"] if row else 1
 
+    def get_entity_with_version(
+        self, session_id: int, entity_type: str, entity_key: str
+    ) -> tuple[dict | None, int]:
+        """Retrieve an entity's state and version. Returns (None, 0) if it does not exist."""
+        row = self._fetchone(
+            """SELECT state_data, version FROM game_state
+               WHERE session_id = ? AND entity_type = ? AND entity_key = ?""",
+            (session_id, entity_type, entity_key),
+        )
+        if not row:
+            return None, 0
+        try:
+            data = json.loads(row["state_data"]) if row["state_data"] else {}
+        except json.JSONDecodeError:
+            data = {}
+        return (data if isinstance(data, dict) else {}), row["version"]
+
+    def apply_changes(
+        self,
+        upserts: list[tuple[int, str, str, dict, int]],
+        deletes: list[tuple[int, str, str]],
+    ):
+        """
+        Writes a batch of entity changes in a single transaction.
+        upserts: (session_id, entity_type, entity_key, state_data, version) with the final version to store.
+        deletes: (session_id, entity_type, entity_key)
+        """
+        with self._transaction():
+            if deletes:
+                self.conn.executemany(
+                    """DELETE FROM game_state
+                       WHERE session_id = ? AND entity_type = ? AND entity_key = ?""",
+                    deletes,
+                )
+            if upserts:
+                self.conn.executemany(
+                    """INSERT INTO game_state (session_id, entity_type, entity_key, state_data, version)
+                       VALUES (?, ?, ?, ?, ?)
+                       ON CONFLICT(session_id, entity_type, entity_key)
+                       DO UPDATE SET
+                           state_data = excluded.state_data,
+                           version = excluded.version,
+                           updated_at = CURRENT_TIMESTAMP""",
+                    [(sid, etype, key, json.dumps(data), version) for sid, etype, key, data, version in upserts],
+                )
+
     def get_versions(self, session_id: int, entity_type: str) -> dict[str, int]:
         """
         Fast query to get just the version numbers for all entities of a type.
@@ -81,6 +128,22 @@ class GameStateRepository(BaseRepository):
         )
         return {row["entity_key"]: row["version"] for row in rows}
 
+    def get_revision(self, session_id: int) -> str:
+        """
+        Digest of every entity's (type, key, version) in the session.
+        Changes whenever any entity is written, created or deleted.
+        """
+        rows = self._fetchall(
+            """SELECT entity_type, entity_key, version FROM game_state
+               WHERE session_id = ?
+               ORDER BY entity_type, entity_key""",
+            (session_id,),
+        )
+        digest = hashlib.sha1()
+        for row in rows:
+            digest.update(f"{row['entity_type']}\x1f{row['entity_key']}\x1f{row['version']}\x1e".encode())
+        return digest.hexdigest()
+
     def get_all_entities_by_type(self, session_id: int, entity_type: str) -> dict:
         """Get all entities of a specific type for a session. Returns {key: data} dict."""
         rows = self._fetchall(
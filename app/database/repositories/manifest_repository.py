@@ -1,18 +1,76 @@
 """Repository for SystemManifest operations."""
 
-from typing import Any
+import logging
+import threading
+from typing import Any, ClassVar
 
 from app.prefabs.manifest import SystemManifest
 
 from .base_repository import BaseRepository
 
+logger = logging.getLogger(__name__)
+
 
 class ManifestRepository(BaseRepository):
     """
     Handles database operations for SystemManifests.
     Stores the configuration for game systems (D&D, CoC, etc).
+
+    Parsed manifests are cached process-wide per database file, keyed by
+    (id, updated_at). Cached instances are shared: treat them as read-only.
     """
 
+    # db file -> {manifest_id: (updated_at, manifest)}
+    _shared_cache: ClassVar[dict[str, dict[int, tuple[str, SystemManifest]]]] = {}
+    _cache_lock: ClassVar[threading.Lock] = threading.Lock()
+
+    def __init__(self, connection):
+        super().__init__(connection)
+        self._cache = self._cache_for_connection()
+
+    def _cache_for_connection(self) -> dict[int, tuple[str, SystemManifest]]:
+        row = self.conn.execute("PRAGMA database_list").fetchone()
+        db_file = row[2] if row else ""
+        if not db_file:
+            # In-memory/temporary database: private to this connection
+            return {}
+        with self._cache_lock:
+            return self._shared_cache.setdefault(db_file, {})
+
+    def invalidate(self, manifest_id: int | None = None):
+        """Drops cached manifests (all of them if no id is given)."""
+        with self._cache_lock:
+            if manifest_id is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(manifest_id, None)
+
+    def _load(self, manifest_id: int) -> SystemManifest | None:
+        row = self._fetchone("SELECT updated_at FROM manifests WHERE id = ?", (manifest_id,))
+        if not row:
+            self.invalidate(manifest_id)
+            return None
+
+        updated_at = str(row["updated_at"])
+        with self._cache_lock:
+            cached = self._cache.get(manifest_id)
+        if cached and cached[0] == updated_at:
+            return cached[1]
+
+        data = self._fetchone("SELECT data_json FROM manifests WHERE id = ?", (manifest_id,))
+        if not data:
+            return None
+        try:
+            manifest = SystemManifest.from_json(data["data_json"])
+        except Exception as e:
+            logger.warning(f"Failed to parse manifest {manifest_id}: {e}")
+            return None
+
+        _ = manifest.index  # Build lookup tables and prompt strings once, before the instance is shared
+        with self._cache_lock:
+            self._cache[manifest_id] = (updated_at, manifest)
+        return manifest
+
     def create_table(self):
         """Creates the manifests table."""
         cursor = self.conn.cursor()
@@ -56,48 +114,35 @@ class ManifestRepository(BaseRepository):
             (manifest.id, manifest.name, data_str, manifest_id),
         )
         self._commit()
+        # updated_at has one-second resolution; do not rely on it for our own writes
+        self.invalidate(manifest_id)
 
     def upsert_builtin(self, manifest: SystemManifest) -> int:
         """
         Update a built-in manifest if it exists, or create it if not.
         Uses system_id as the key.
         """
-        existing = self.get_by_system_id(manifest.id)
-        if existing:
-            # We need the numeric ID to update
-            row = self._fetchone("SELECT id FROM manifests WHERE system_id = ?", (manifest.id,))
-            if row:
-                self.update(int(row["id"]), manifest)
-                return int(row["id"])
+        row = self._fetchone("SELECT id FROM manifests WHERE system_id = ?", (manifest.id,))
+        if row:
+            self.update(int(row["id"]), manifest)
+            return int(row["id"])
 
         return self.create(manifest, is_builtin=True)
 
     def get_by_id(self, manifest_id: int) -> SystemManifest | None:
         """Retrieve a Manifest by numeric ID."""
-        row = self._fetchone(
-            "SELECT data_json FROM manifests WHERE id = ?", (manifest_id,)
-        )
-        if row:
-            try:
-                return SystemManifest.from_json(row["data_json"])
-            except Exception:
-                return None
-        return None
+        return self._load(manifest_id)
 
     def get_by_system_id(self, system_id: str) -> dict | None:
         """
         Retrieve a Manifest row by string system_id.
         Returns {'id': int, 'manifest': SystemManifest} or None.
         """
-        row = self._fetchone(
-            "SELECT id, data_json FROM manifests WHERE system_id = ?", (system_id,)
-        )
+        row = self._fetchone("SELECT id FROM manifests WHERE system_id = ?", (system_id,))
         if row:
-            try:
-                man = SystemManifest.from_json(row["data_json"])
+            man = self._load(int(row["id"]))
+            if man:
                 return {"id": row["id"], "manifest": man}
-            except Exception:
-                return None
         return None
 
     def get_all(self) -> list[dict[str, Any]]:
@@ -112,3 +157,4 @@ class ManifestRepository(BaseRepository):
         """Delete a manifest."""
         self._execute("DELETE FROM manifests WHERE id = ?", (manifest_id,))
         self._commit()
+        self.invalidate(manifest_id)
@@ -1,5 +1,6 @@
 """Repository for memory operations."""
 
+import hashlib
 import json
 from typing import Any
 
@@ -7,6 +8,9 @@ from app.models.memory import Memory
 
 from .base_repository import BaseRepository
 
+# Stays under SQLite's default bound-parameter limit (999 on older builds)
+MAX_IDS_PER_QUERY = 500
+
 
 class MemoryRepository(BaseRepository):
     """Handles all memory-related database operations."""
@@ -71,6 +75,63 @@ class MemoryRepository(BaseRepository):
             WHERE id NOT IN (SELECT rowid FROM memories_fts);
             """
         )
+
+        # 4. Normalized tag index: one lowercase row per (memory, tag), synced by triggers like the FTS table
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS memory_tags (
+                memory_id INTEGER NOT NULL,
+                session_id INTEGER NOT NULL,
+                kind TEXT NOT NULL,
+                tag TEXT NOT NULL,
+                PRIMARY KEY (memory_id, tag)
+            ) WITHOUT ROWID;
+            """
+        )
+        # Covers tag lookups and overlap counts without touching the memories table
+        cursor.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_memory_tags_lookup
+            ON memory_tags (session_id, kind, tag, memory_id);
+            """
+        )
+        # Malformed or missing tag JSON yields no rows
+        cursor.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS memories_tags_ai AFTER INSERT ON memories BEGIN
+              INSERT OR IGNORE INTO memory_tags (memory_id, session_id, kind, tag)
+              SELECT new.id, new.session_id, new.kind, lower(value)
+              FROM json_each(CASE WHEN json_valid(new.tags) THEN new.tags ELSE '[]' END) WHERE type = 'text';
+            END;
+            """
+        )
+        cursor.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS memories_tags_ad AFTER DELETE ON memories BEGIN
+              DELETE FROM memory_tags WHERE memory_id = old.id;
+            END;
+            """
+        )
+        cursor.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS memories_tags_au AFTER UPDATE OF tags, kind, session_id ON memories BEGIN
+              DELETE FROM memory_tags WHERE memory_id = old.id;
+              INSERT OR IGNORE INTO memory_tags (memory_id, session_id, kind, tag)
+              SELECT new.id, new.session_id, new.kind, lower(value)
+              FROM json_each(CASE WHEN json_valid(new.tags) THEN new.tags ELSE '[]' END) WHERE type = 'text';
+            END;
+            """
+        )
+
+        # 5. One-time backfill for databases created before the tag index
+        cursor.execute(
+            """
+            INSERT OR IGNORE INTO memory_tags (memory_id, session_id, kind, tag)
+            SELECT m.id, m.session_id, m.kind, lower(t.value)
+            FROM memories AS m, json_each(CASE WHEN json_valid(m.tags) THEN m.tags ELSE '[]' END) AS t
+            WHERE t.type = 'text' AND m.id NOT IN (SELECT memory_id FROM memory_tags);
+            """
+        )
         self.conn.commit()
 
     def create(
@@ -101,6 +162,18 @@ class MemoryRepository(BaseRepository):
         row = self._fetchone("""SELECT * FROM memories WHERE id = ?""", (memory_id,))
         return Memory(**dict(row)) if row else None
 
+    def get_many(self, memory_ids: list[int]) -> dict[int, Memory]:
+        """Fetches several memories in one query per chunk of ids. Missing ids are absent."""
+        ids = list(dict.fromkeys(memory_ids))
+        memories: dict[int, Memory] = {}
+        for start in range(0, len(ids), MAX_IDS_PER_QUERY):
+            chunk = ids[start : start + MAX_IDS_PER_QUERY]
+            placeholders = ",".join(["?"] * len(chunk))
+            rows = self._fetchall(f"SELECT * FROM memories WHERE id IN ({placeholders})", tuple(chunk))
+            for row in rows:
+                memories[row["id"]] = Memory(**dict(row))
+        return memories
+
     def get_by_session(self, session_id: int) -> list[Memory]:
         rows = self._fetchall(
             """SELECT * FROM memories WHERE session_id = ? ORDER BY created_at DESC""",
@@ -134,10 +207,10 @@ class MemoryRepository(BaseRepository):
             params.append(f"%{query_text}%")
 
         if tags:
-            tag_conditions = " OR ".join(["tags LIKE ?" for _ in tags])
-            query += f" AND ({tag_conditions})"
-            for tag in tags:
-                params.append(f'%"{tag}"%')
+            placeholders = ",".join(["?"] * len(tags))
+            query += f" AND id IN (SELECT memory_id FROM memory_tags WHERE session_id = ? AND tag IN ({placeholders}))"
+            params.append(session_id)
+            params.extend(tag.lower() for tag in tags)
 
         query += " ORDER BY priority DESC, last_accessed DESC LIMIT ?"
         params.append(limit)
@@ -145,6 +218,76 @@ class MemoryRepository(BaseRepository):
         rows = self._fetchall(query, tuple(params))
         return [Memory(**dict(row)) for row in rows]
 
+    def query_per_kind(
+        self,
+        session_id: int,
+        limits: dict[str, int],
+        tags: list[str] | None = None,
+    ) -> dict[str, list[Memory]]:
+        """
+        `query` for several kinds in one statement: the top `limits[kind]` memories of each kind,
+        ordered like `query` (priority, then most recently accessed). With tags, only memories
+        sharing at least one of them are returned, most shared tags first.
+        """
+        if not limits:
+            return {}
+        kinds = list(limits)
+        kind_marks = ",".join(["?"] * len(kinds))
+        params: list[Any] = [session_id, *kinds]
+
+        if tags:
+            # Overlap counts come from the tag index alone; memories rows are read only for matches
+            tag_list = list(dict.fromkeys(tag.lower() for tag in tags))
+            source = f"""(
+                SELECT memory_id, COUNT(*) AS tag_overlap FROM memory_tags
+                WHERE session_id = ? AND kind IN ({kind_marks}) AND tag IN ({",".join(["?"] * len(tag_list))})
+                GROUP BY memory_id
+            ) AS o JOIN memories AS m ON m.id = o.memory_id"""
+            order = "o.tag_overlap DESC, m.priority DESC, m.last_accessed DESC"
+            params.extend(tag_list)
+        else:
+            source = f"memories AS m WHERE m.session_id = ? AND m.kind IN ({kind_marks})"
+            order = "m.priority DESC, m.last_accessed DESC"
+
+        cutoff = " ".join("WHEN ? THEN ?" for _ in kinds)
+        for kind in kinds:
+            params.extend([kind, limits[kind]])
+
+        rows = self._fetchall(
+            f"""SELECT * FROM (
+                SELECT m.*, ROW_NUMBER() OVER (PARTITION BY m.kind ORDER BY {order}) AS kind_rank
+                FROM {source}
+            ) WHERE kind_rank <= CASE kind {cutoff} END
+            ORDER BY kind, kind_rank""",
+            tuple(params),
+        )
+        by_kind: dict[str, list[Memory]] = {kind: [] for kind in kinds}
+        for row in rows:
+            data = dict(row)
+            data.pop("kind_rank")
+            by_kind[data["kind"]].append(Memory(**data))
+        return by_kind
+
+    def tag_overlap_counts(self, memory_ids: list[int], tags: list[str]) -> dict[int, int]:
+        """Number of the given tags each memory carries (case-insensitive). Memories with none are absent."""
+        tag_list = list(dict.fromkeys(tag.lower() for tag in tags))
+        ids = list(dict.fromkeys(memory_ids))
+        if not tag_list or not ids:
+            return {}
+        tag_marks = ",".join(["?"] * len(tag_list))
+        counts: dict[int, int] = {}
+        step = max(1, MAX_IDS_PER_QUERY - len(tag_list))
+        for start in range(0, len(ids), step):
+            chunk = ids[start : start + step]
+            rows = self._fetchall(
+                f"""SELECT memory_id, COUNT(*) AS overlap FROM memory_tags
+                WHERE memory_id IN ({",".join(["?"] * len(chunk))}) AND tag IN ({tag_marks})
+                GROUP BY memory_id""",
+                (*chunk, *tag_list),
+            )
+            counts.update({row["memory_id"]: row["overlap"] for row in rows})
+        return counts
+
     def update_access(self, memory_id: int):
         self._execute(
             """UPDATE memories SET last_accessed = CURRENT_TIMESTAMP, access_count = access_count + 1 WHERE id = ?""",
@@ -185,6 +328,24 @@ class MemoryRepository(BaseRepository):
         by_kind = {row["kind"]: row["count"] for row in rows}
         return {"by_kind": by_kind}
 
+    def get_revision(self, session_id: int) -> str:
+        """
+        Digest of every memory's (id, kind, content, tags, priority) in the session.
+        Changes whenever a memory is created, edited or deleted.
+        """
+        rows = self._fetchall(
+            """SELECT id, kind, content, COALESCE(tags, '') AS tags, priority FROM memories
+               WHERE session_id = ?
+               ORDER BY id""",
+            (session_id,),
+        )
+        digest = hashlib.sha1()
+        for row in rows:
+            digest.update(
+                f"{row['id']}\x1f{row['kind']}\x1f{row['content']}\x1f{row['tags']}\x1f{row['priority']}\x1e".encode()
+            )
+        return digest.hexdigest()
+
     def search_bm25(
         self, session_id: int, query_text: str, limit: int = 15
     ) -> list[tuple[Memory, float]]:
@@ -0,0 +1,160 @@
+"""Repository for the append-only chat message log."""
+
+import json
+import logging
+
+from app.models.message import Message
+
+from .base_repository import BaseRepository
+
+logger = logging.getLogger(__name__)
+
+
+class MessageRepository(BaseRepository):
+    """
+    Stores session history one row per message, ordered by (session_id, seq).
+    seq is the message's position in the history (0-based), so UI indexes map 1:1.
+    """
+
+    def create_table(self):
+        """Creates the messages table and explodes legacy history blobs into it."""
+        cursor = self.conn.cursor()
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id INTEGER NOT NULL,
+                seq INTEGER NOT NULL,
+                role TEXT NOT NULL,
+                data TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (session_id) REFERENCES sessions (id) ON DELETE CASCADE
+            );
+            """
+        )
+        cursor.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_messages_session_seq ON messages(session_id, seq);"
+        )
+        self.conn.commit()
+
+        self.migrate_session_blobs()
+
+    # --- Writes ---
+
+    def append(self, session_id: int, messages: list[Message]) -> int:
+        """Appends messages to the end of the session log. Returns the seq of the first one."""
+        with self._transaction():
+            start = self.count(session_id)
+            self.conn.executemany(
+                "INSERT INTO messages (session_id, seq, role, data) VALUES (?, ?, ?, ?)",
+                [
+                    (session_id, start + i, str(m.role), m.model_dump_json())
+                    for i, m in enumerate(messages)
+                ],
+            )
+        return start
+
+    def update(self, session_id: int, seq: int, message: Message):
+        """Overwrites a single message in place (e.g. a user edit)."""
+        self._execute(
+            "UPDATE messages SET role = ?, data = ? WHERE session_id = ? AND seq = ?",
+            (str(message.role), message.model_dump_json(), session_id, seq),
+        )
+        self._commit()
+
+    def truncate(self, session_id: int, from_seq: int):
+        """Drops every message at or after from_seq (undo / reroll / regenerate)."""
+        self._execute(
+            "DELETE FROM messages WHERE session_id = ? AND seq >= ?",
+            (session_id, from_seq),
+        )
+        self._commit()
+
+    def replace_all(self, session_id: int, messages: list[Message]):
+        """Rewrites the whole log. Only for rare edits that shift positions (deleting a middle message)."""
+        with self._transaction():
+            self._execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+            self.append(session_id, messages)
+
+    def copy_session(self, source_session_id: int, target_session_id: int):
+        """Duplicates a session's log into another session (cloning)."""
+        self._execute(
+            """INSERT INTO messages (session_id, seq, role, data)
+               SELECT ?, seq, role, data FROM messages
+               WHERE session_id = ? ORDER BY seq""",
+            (target_session_id, source_session_id),
+        )
+        self._commit()
+
+    # --- Reads ---
+
+    def count(self, session_id: int) -> int:
+        row = self._fetchone(
+            "SELECT COALESCE(MAX(seq) + 1, 0) AS n FROM messages WHERE session_id = ?",
+            (session_id,),
+        )
+        return int(row["n"]) if row else 0
+
+    def tail(self, session_id: int, n: int) -> list[Message]:
+        """Returns the last n messages in chronological order."""
+        rows = self._fetchall(
+            """SELECT data FROM messages
+               WHERE session_id = ?
+               ORDER BY seq DESC LIMIT ?""",
+            (session_id, n),
+        )
+        return [Message.model_validate_json(r["data"]) for r in reversed(rows)]
+
+    def range(self, session_id: int, start_seq: int, end_seq: int) -> list[Message]:
+        """Returns messages with start_seq <= seq < end_seq."""
+        rows = self._fetchall(
+            """SELECT data FROM messages
+               WHERE session_id = ? AND seq >= ? AND seq < ?
+               ORDER BY seq ASC""",
+            (session_id, start_seq, end_seq),
+        )
+        return [Message.model_validate_json(r["data"]) for r in rows]
+
+    def get_all(self, session_id: int) -> list[Message]:
+        rows = self._fetchall(
+            "SELECT data FROM messages WHERE session_id = ? ORDER BY seq ASC",
+            (session_id,),
+        )
+        return [Message.model_validate_json(r["data"]) for r in rows]
+
+    # --- Migration ---
+
+    def migrate_session_blobs(self) -> int:
+        """
+        One-time migration: moves `history` out of sessions.session_data into this table
+        and rewrites the blob without it. Returns the number of sessions migrated.
+        """
+        rows = self._fetchall(
+            "SELECT id, session_data FROM sessions WHERE session_data LIKE '%\"history\"%'"
+        )
+        migrated = 0
+        for row in rows:
+            try:
+                data = json.loads(row["session_data"])
+            except (TypeError, json.JSONDecodeError):
+                continue
+            history = data.pop("history", None)
+            if history is None:
+                continue
+
+            try:
+                with self._transaction():
+                    # Rows win if both exist (a partially migrated session)
+                    if history and self.count(row["id"]) == 0:
+                        self.append(row["id"], [Message(**item) for item in history])
+                    self._execute(
+                        "UPDATE sessions SET session_data = ? WHERE id = ?",
+                        (json.dumps(data), row["id"]),
+                    )
+                migrated += 1
+            except Exception as e:
+                logger.error(f"Failed to migrate history for session {row['id']}: {e}")
+
+        if migrated:
+            logger.info(f"Migrated message history of {migrated} session(s) into the messages table")
+        return migrated
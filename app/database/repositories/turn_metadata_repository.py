@@ -22,6 +22,7 @@ class TurnMetadataRepository(BaseRepository):
                 summary TEXT NOT NULL,
                 tags TEXT NOT NULL,
                 importance INTEGER NOT NULL,
+                turn_id TEXT,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 FOREIGN KEY (session_id) REFERENCES sessions (id) ON DELETE CASCADE,
@@ -29,6 +30,10 @@ class TurnMetadataRepository(BaseRepository):
             );
             """
         )
+        # Older databases predate the turn_id column (used to match summaries to history turns)
+        columns = {row["name"] for row in self._fetchall("PRAGMA table_info(turn_metadata)")}
+        if "turn_id" not in columns:
+            self._execute("ALTER TABLE turn_metadata ADD COLUMN turn_id TEXT")
 
         # Scene History table (Logically linked to turns)
         self._execute(
@@ -60,15 +65,16 @@ class TurnMetadataRepository(BaseRepository):
         summary: str,
         tags: list[str],
         importance: int,
+        turn_id: str | None = None,
     ) -> int:
         """Create a turn metadata entry and return its ID."""
         tags_json = json.dumps(tags)
 
         cursor = self._execute(
             """INSERT INTO turn_metadata
-            (session_id, prompt_id, round_number, summary, tags, importance)
-            VALUES (?, ?, ?, ?, ?, ?)""",
-            (session_id, prompt_id, round_number, summary, tags_json, importance),
+            (session_id, prompt_id, round_number, summary, tags, importance, turn_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?)""",
+            (session_id, prompt_id, round_number, summary, tags_json, importance, turn_id),
         )
         self._commit()
         turn_id = cursor.lastrowid
@@ -99,10 +105,32 @@ class TurnMetadataRepository(BaseRepository):
             )
         return results
 
+    def get_summaries(self, session_id: int, turn_ids: list[str]) -> dict[str, str]:
+        """Chronicler summaries of the given turns, keyed by turn_id (turns without one are absent)."""
+        if not turn_ids:
+            return {}
+        placeholders = ", ".join("?" for _ in turn_ids)
+        rows = self._fetchall(
+            f"""SELECT turn_id, summary
+            FROM turn_metadata
+            WHERE session_id = ? AND turn_id IN ({placeholders})
+            ORDER BY id ASC""",
+            (session_id, *turn_ids),
+        )
+        return {row["turn_id"]: row["summary"] for row in rows if row["summary"]}
+
+    def get_revision(self, session_id: int) -> tuple[int, int]:
+        """Cheap change marker for a session's turn metadata: (count, max id)."""
+        row = self._fetchone(
+            "SELECT COUNT(*) AS n, COALESCE(MAX(id), 0) AS max_id FROM turn_metadata WHERE session_id = ?",
+            (session_id,),
+        )
+        return (row["n"], row["max_id"]) if row else (0, 0)
+
     def get_all(self, session_id: int) -> list[dict[str, Any]]:
         """Get all metadata for a session."""
         rows = self._fetchall(
-            """SELECT round_number, summary, tags, importance
+            """SELECT round_number, summary, tags, importance, turn_id
             FROM turn_metadata
             WHERE session_id = ?
             ORDER BY round_number ASC""",
@@ -116,6 +144,7 @@ class TurnMetadataRepository(BaseRepository):
                     "summary": row["summary"],
                     "tags": json.loads(row["tags"]),
                     "importance": row["importance"],
+                    "turn_id": row["turn_id"],
                 }
             )
         return results
@@ -27,6 +27,7 @@ class UIMessage(TypedDict, total=False):
     new_time: str
     new_mode: str
     message: str
+    kind: str
 
 
 class MockElement:
@@ -148,6 +149,10 @@ class NiceGUIBridge:
                     message_data=msg.get("message_data")
                 )
 
+        elif msg_type == UIEventType.STREAM_DELTA:
+            if self.chat_component:
+                self.chat_component.stream_delta(msg.get("kind", "content"), msg.get("text", ""))
+
         elif msg_type == UIEventType.TOOL_CALL:
             if self.chat_component:
                 self.chat_component.add_tool_log(msg.get("name"), msg.get("args"))
@@ -214,6 +219,7 @@ class NiceGUIBridge:
 
             # Only stop "generating" when the turn is actually complete
             if msg_type == UIEventType.TURN_COMPLETE and self.chat_component:
+                self.chat_component.end_stream()
                 self.chat_component.set_generating(False)
 
         elif msg_type == UIEventType.PLANNING_STARTED:
@@ -232,6 +238,7 @@ class NiceGUIBridge:
 
         elif msg_type == UIEventType.ERROR:
             if self.chat_component:
+                self.chat_component.end_stream()
                 self.chat_component.add_message("Error", msg.get("message"), MessageRole.SYSTEM)
                 self.chat_component.set_generating(False)
 
@@ -30,6 +30,13 @@ class ChatComponent:
         self.send_btn: ui.button | None = None
         self.stop_btn: ui.button | None = None
 
+        # Live bubbles for a response that is still streaming, by kind ("content"/"thought")
+        self._stream_rows: dict[str, ui.row] = {}
+        self._stream_markdown: dict[str, ui.markdown] = {}
+        self._stream_text: dict[str, str] = {}
+        # Live bubbles whose step already finished; the next delta of that kind starts a new bubble
+        self._stream_closed: set[str] = set()
+
         self.bridge.register_chat(self)
 
     def render(self):
@@ -250,9 +257,8 @@ class ChatComponent:
             session.history[index].content = new_content
             game_session = self.session_manager.get_active_session()
             if game_session:
-                game_session.session_data = session.to_json()
-                if self.session_manager.db and self.session_manager.db.sessions:
-                    self.session_manager.db.sessions.update(game_session)
+                if self.session_manager.db and self.session_manager.db.messages:
+                    self.session_manager.db.messages.update(game_session.id, index, session.history[index])
                     ui.notify("Message updated")
             self.load_history()
 
@@ -266,9 +272,10 @@ class ChatComponent:
             session.history.pop(index)
             game_session = self.session_manager.get_active_session()
             if game_session:
-                game_session.session_data = session.to_json()
-                if self.session_manager.db and self.session_manager.db.sessions:
-                    self.session_manager.db.sessions.update(game_session)
+                # Deleting shifts every later position, so the log is rewritten (rare, user-driven)
+                if self.session_manager.db and self.session_manager.db.messages:
+                    self.session_manager.db.messages.replace_all(game_session.id, session.history)
+                    session.mark_persisted()
                     ui.notify("Message deleted")
             self.load_history()
 
@@ -283,10 +290,82 @@ class ChatComponent:
             self.orchestrator.regenerate_from_index(game_session, index)
 
 
+    def stream_delta(self, kind: str, text: str):
+        """Appends streamed text to the live bubble of this kind, creating it on first delta."""
+        if not self.container or not text:
+            return
+        if kind in self._stream_closed:
+            self._forget_stream(kind)
+        self._stream_text[kind] = self._stream_text.get(kind, "") + text
+
+        markdown = self._stream_markdown.get(kind)
+        if markdown is None:
+            with self.container:
+                if kind == "thought":
+                    with ui.row().classes("w-full justify-start") as row:
+                        with ui.card().classes("bg-yellow-900/20 border border-yellow-700/50 p-2 w-full max-w-3xl"):
+                            ui.label("💭 Thinking...").classes("text-xs text-yellow-500 font-bold mb-1")
+                            markdown = ui.markdown("").classes("text-sm text-yellow-200 italic chat-markdown")
+                else:
+                    with ui.row().classes("w-full justify-start gap-2") as row:
+                        ui.label("Game Master").classes("text-xs font-bold text-gray-400 mt-1 self-start")
+                        with ui.column().classes("max-w-[80%] items-start"):
+                            with ui.element("div").classes("p-3 rounded-2xl shadow-sm " + Theme.chat_bubble_received + " rounded-tl-none"):
+                                markdown = ui.markdown("").classes(
+                                    "w-full min-w-0 break-words break-all chat-markdown prose prose-invert max-w-none text-sm [&_*]:text-inherit"
+                                )
+            self._stream_rows[kind] = row
+            self._stream_markdown[kind] = markdown
+
+        markdown.set_content(self._stream_text[kind])
+        self._scroll_down()
+
+    def end_stream(self):
+        """Forgets live bubbles; whatever was streamed stays on screen."""
+        self._stream_rows.clear()
+        self._stream_markdown.clear()
+        self._stream_text.clear()
+        self._stream_closed.clear()
+
+    def _forget_stream(self, kind: str) -> ui.row | None:
+        self._stream_closed.discard(kind)
+        self._stream_markdown.pop(kind, None)
+        self._stream_text.pop(kind, None)
+        return self._stream_rows.pop(kind, None)
+
+    def _replace_stream_row(self, kind: str, first_new_child: int):
+        """Moves elements rendered from `first_new_child` on into the live bubble's slot, then drops the bubble."""
+        row = self._forget_stream(kind)
+        if row is None or not self.container:
+            return
+        children = list(self.container.default_slot.children)
+        if row not in children:
+            return
+        position = children.index(row)
+        for offset, element in enumerate(children[first_new_child:]):
+            element.move(target_index=position + offset)
+        row.delete()
+
     def add_message(self, name: str, text: str, role: str, index: int | None = None, message_data: dict | None = None):
         if not self.container:
             return
 
+        # A finished streamed message takes the place of its live bubble
+        stream_kind = "thought" if role == MessageRole.THOUGHT else "content" if role == MessageRole.ASSISTANT else None
+        if stream_kind in self._stream_rows:
+            first_new_child = len(self.container.default_slot.children)
+            self._add_message(name, text, role, index, message_data)
+            self._replace_stream_row(stream_kind, first_new_child)
+            if stream_kind == "content" and "thought" in self._stream_rows:
+                # A final thought bubble only follows for tool-calling steps; otherwise keep the streamed one
+                self._stream_closed.add("thought")
+            return
+        self._add_message(name, text, role, index, message_data)
+
+    def _add_message(self, name: str, text: str, role: str, index: int | None = None, message_data: dict | None = None):
+        if not self.container:
+            return
+
         # Sync history if message_data is provided (ensures index is valid for interactive rendering)
         if message_data and self.orchestrator.session:
             history = self.orchestrator.session.history
@@ -253,6 +253,10 @@ class PromptListComponent:
             )
 
 
+            # Message history lives in its own table
+            if self.db.messages:
+                self.db.messages.copy_session(session.id, new_sess.id)
+
             # 2. Clone Game State
             if not self.db.game_state:
                 raise ValueError("GameStateRepository not initialized")
@@ -268,8 +272,8 @@ class PromptListComponent:
             mems = self.db.memories.get_by_session(session.id)
             vs = self.orchestrator.vector_store
 
-            for m in mems:
-                new_mem = self.db.memories.create(
+            new_mems = [
+                self.db.memories.create(
                     session_id=new_sess.id,
                     kind=m.kind,
                     content=m.content,
@@ -277,47 +281,44 @@ class PromptListComponent:
                     tags=m.tags_list(),
                     fictional_time=m.fictional_time,
                 )
-
-                if vs:
-                    try:
-                        vs.upsert_memory(
-                            new_sess.id,
-                            new_mem.id,
-                            new_mem.content,
-                            new_mem.kind,
-                            new_mem.tags_list(),
-                            new_mem.priority,
-                        )
-                    except Exception as e:
-                        logger.error(f"Failed to re-index memory {new_mem.id}: {e}")
+                for m in mems
+            ]
+
+            if vs:
+                try:
+                    vs.upsert_memories_bulk(new_sess.id, [
+                        {
+                            "memory_id": new_mem.id,
+                            "text": new_mem.content,
+                            "kind": new_mem.kind,
+                            "tags": new_mem.tags_list(),
+                            "priority": new_mem.priority,
+                        }
+                        for new_mem in new_mems
+                    ])
+                except Exception as e:
+                    logger.error(f"Failed to re-index memories for session {new_sess.id}: {e}")
 
             # 4. Clone & Re-Index Turn Metadata
             if not self.db.turn_metadata:
                 raise ValueError("TurnMetadataRepository not initialized")
             turns = self.db.turn_metadata.get_all(session.id)
             for t in turns:
-                new_turn_id = self.db.turn_metadata.create(
+                self.db.turn_metadata.create(
                     session_id=new_sess.id,
                     prompt_id=session.prompt_id,
                     round_number=t["round_number"],
                     summary=t["summary"],
                     tags=t["tags"],
                     importance=t["importance"],
+                    turn_id=t["turn_id"],
                 )
 
-
-                if vs:
-                    try:
-                        vs.add_turn(
-                            new_sess.id,
-                            session.prompt_id,
-                            t["round_number"],
-                            t["summary"],
-                            t["tags"],
-                            t["importance"],
-                        )
-                    except Exception as e:
-                        logger.error(f"Failed to re-index turn {new_turn_id}: {e}")
+            if vs:
+                try:
+                    vs.add_turns_bulk(new_sess.id, session.prompt_id, turns)
+                except Exception as e:
+                    logger.error(f"Failed to re-index turns for session {new_sess.id}: {e}")
 
             ui.notify(f"Cloned to '{new_name}'")
             self.refresh()
@@ -10,11 +10,13 @@ from collections.abc import AsyncGenerator
 from typing import Any, cast
 
 from google import genai
-from google.genai import types
+from google.genai import errors, types
 from google.genai.types import HttpOptions
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
 
-from app.llm.llm_connector import LLMConnector, LLMResponse
+from app.llm.gemini_context_cache import GeminiContextCache
+from app.llm.llm_connector import LLMConnector, LLMResponse, LLMStreamEvent, StreamEventKind
+from app.llm.resilience import StructuredOutputError, resilient_call, resilient_stream, resilient_structured
 from app.models.message import Message
 from app.models.vocabulary import MessageRole
 
@@ -35,6 +37,12 @@ class GeminiConnector(LLMConnector):
         self._api_key = api_key
         self._async_clients: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, genai.Client] = weakref.WeakKeyDictionary()
         self.default_max_tokens = 65535
+        # API-side caching of the static system instruction + tool declarations for tool calls
+        self.context_cache: GeminiContextCache | None = None
+        if os.environ.get("GEMINI_CONTEXT_CACHE", "true").lower() == "true":
+            self.context_cache = GeminiContextCache(
+                ttl_seconds=int(os.environ.get("GEMINI_CONTEXT_CACHE_TTL", 900))
+            )
         self.default_thinking_budget = 12000
         self.default_safety_settings = [
             types.SafetySetting(
@@ -56,21 +64,19 @@ class GeminiConnector(LLMConnector):
         ]
 
     def _get_async_client(self) -> genai.Client:
-        """Returns a genai.Client associated with the current event loop."""
-        try:
-            loop = asyncio.get_running_loop()
-        except RuntimeError:
-            # Fallback for sync contexts or before loop starts
-            return genai.Client(
-                api_key=self._api_key,
-                http_options=HttpOptions(timeout=self.timeout)
-            )
-
+        """
+        Returns the genai.Client for the current event loop. Sync callers always run on the
+        connector's persistent I/O loop, so in practice this is one pooled keep-alive client.
+        """
+        loop = asyncio.get_running_loop()
         if loop not in self._async_clients:
             logger.debug(f"Creating new Gemini client for loop {id(loop)}")
             self._async_clients[loop] = genai.Client(
                 api_key=self._api_key,
-                http_options=HttpOptions(timeout=self.timeout)
+                http_options=HttpOptions(
+                    timeout=int(self.timeout * 1000),  # milliseconds
+                    httpx_async_client=self._create_http_client(),
+                ),
             )
         return self._async_clients[loop]
 
@@ -159,6 +165,7 @@ class GeminiConnector(LLMConnector):
 
         return contents
 
+    @resilient_stream("streaming")
     async def async_get_streaming_response(
         self, system_prompt: str, chat_history: list[Message]
     ) -> AsyncGenerator[str, None]:
@@ -197,6 +204,7 @@ class GeminiConnector(LLMConnector):
                 if chunk_text:
                     yield str(chunk_text)
 
+    @resilient_structured
     async def async_get_structured_response(
         self,
         system_prompt: str,
@@ -238,24 +246,66 @@ class GeminiConnector(LLMConnector):
             )
 
         if response.parsed:
-            return output_schema.model_validate(response.parsed)
+            try:
+                return output_schema.model_validate(response.parsed)
+            except ValidationError as e:
+                raise StructuredOutputError(str(e), raw=response.text) from e
 
         if response.text:
             try:
                 data = json.loads(response.text)
                 return output_schema.model_validate(data)
             except Exception as e:
-                logger.error(f"Gemini structured response failure. Raw text: {response.text}")
-                raise ValueError(f"Failed to parse Gemini response: {e}") from e
+                logger.warning(f"Gemini structured response failure. Raw text: {response.text}")
+                raise StructuredOutputError(f"Failed to parse Gemini response: {e}", raw=response.text) from e
 
-        raise ValueError("Gemini returned empty response (blocked or error).")
+        raise StructuredOutputError("Gemini returned empty response (blocked or error).")
 
-    async def async_chat_with_tools(
+    def _tool_config(
         self,
+        model: str,
         system_prompt: str,
+        dynamic_context: str | None,
+        gemini_tools: list[types.Tool],
+        cached_content: str | None,
+    ) -> types.GenerateContentConfig:
+        config_args: dict[str, Any] = {
+            "temperature": 0.5,
+            "max_output_tokens": self.default_max_tokens,
+            "safety_settings": self.default_safety_settings,
+        }
+        if cached_content:
+            # System instruction and tools live in the cache; the request may not repeat them
+            config_args["cached_content"] = cached_content
+        else:
+            config_args["system_instruction"] = [
+                types.Part.from_text(text=self.join_system_prompt(system_prompt, dynamic_context))
+            ]
+            config_args["tools"] = gemini_tools
+
+        # Check for model thinking capabilities
+        model_lower = model.lower()
+        if "flash" in model_lower or "thought" in model_lower:
+            config_args["thinking_config"] = types.ThinkingConfig(
+                thinking_budget=self.default_thinking_budget
+            )
+        return types.GenerateContentConfig(**config_args)
+
+    @staticmethod
+    def _tool_contents(
+        contents: list[types.Content], dynamic_context: str | None, cached_content: str | None
+    ) -> list[types.Content]:
+        if cached_content and dynamic_context:
+            # Per-turn context stays out of the cache, ahead of the conversation
+            context_turn = types.Content(role="user", parts=[types.Part.from_text(text=dynamic_context)])
+            return [context_turn, *contents]
+        return contents
+
+    def _tool_request(
+        self,
         chat_history: list[Message],
         tools: list[dict[str, Any]],
-    ) -> LLMResponse:
+    ) -> tuple[str, list[types.Content], list[types.Tool]]:
         contents = self._convert_chat_history_to_contents(chat_history)
         if not contents:
             contents.append(types.Content(role="user", parts=[types.Part.from_text(text="Please proceed.")]))
@@ -263,41 +313,59 @@ class GeminiConnector(LLMConnector):
         function_declarations = [
             types.FunctionDeclaration(**t["function"]) for t in tools
         ]
-        gemini_tool = types.Tool(function_declarations=function_declarations)
+        gemini_tools = [types.Tool(function_declarations=function_declarations)]
+        return self.model_name or "gemini-flash-latest", contents, gemini_tools
 
-        config_args = {
-            "system_instruction": [types.Part.from_text(text=system_prompt)],
-            "tools": [gemini_tool],
-            "temperature": 0.5,
-            "max_output_tokens": self.default_max_tokens,
-            "safety_settings": self.default_safety_settings,
-        }
-
-        # Check for model thinking capabilities
-        model_lower = (self.model_name or "").lower()
-        if "flash" in model_lower or "thought" in model_lower:
-             config_args["thinking_config"] = types.ThinkingConfig(
-                thinking_budget=self.default_thinking_budget
-            )
+    async def _cached_prefix(
+        self,
+        client: genai.Client,
+        model: str,
+        system_prompt: str,
+        dynamic_context: str | None,
+        tools: list[dict[str, Any]],
+        gemini_tools: list[types.Tool],
+    ) -> tuple[str | None, str | None]:
+        if self.context_cache and dynamic_context is not None:
+            return await self.context_cache.get_or_create(client, model, system_prompt, tools, gemini_tools)
+        return None, None
 
-        generation_config = types.GenerateContentConfig(**config_args)
+    @resilient_call("chat_with_tools")
+    async def async_chat_with_tools(
+        self,
+        system_prompt: str,
+        chat_history: list[Message],
+        tools: list[dict[str, Any]],
+        dynamic_context: str | None = None,
+    ) -> LLMResponse:
+        model, contents, gemini_tools = self._tool_request(chat_history, tools)
 
-        async with self.semaphore:
-            client = self._get_async_client()
-            response = await asyncio.wait_for(
+        async def generate(client: genai.Client, cached_content: str | None):
+            return await asyncio.wait_for(
                 client.aio.models.generate_content(
-                    model=self.model_name or "gemini-flash-latest",
-                    contents=cast(Any, contents),
-                    config=generation_config
+                    model=model,
+                    contents=cast(Any, self._tool_contents(contents, dynamic_context, cached_content)),
+                    config=self._tool_config(model, system_prompt, dynamic_context, gemini_tools, cached_content),
                 ),
-                timeout=self.timeout
+                timeout=self.timeout,
             )
 
-        content_text = ""
-        thought_text = ""
-        thought_sig = None
-        tool_calls = []
+        async with self.semaphore:
+            client = self._get_async_client()
+            cache_key, cached_content = await self._cached_prefix(
+                client, model, system_prompt, dynamic_context, tools, gemini_tools
+            )
 
+            try:
+                response = await generate(client, cached_content)
+            except errors.ClientError as e:
+                if not (cached_content and self.context_cache and cache_key):
+                    raise
+                # Most likely the cache expired or was deleted server-side
+                logger.warning(f"Request with Gemini context cache {cached_content} failed ({e}); retrying uncached")
+                self.context_cache.invalidate(cache_key)
+                response = await generate(client, None)
+
+        parts = _ResponseParts()
         if (
             response.candidates
             and len(response.candidates) > 0
@@ -305,37 +373,103 @@ class GeminiConnector(LLMConnector):
             and response.candidates[0].content.parts
         ):
             for part in response.candidates[0].content.parts:
-                if part is None:
+                parts.add(part)
+
+        return parts.to_response(getattr(response, "usage_metadata", None))
+
+    @resilient_stream("stream_chat_with_tools")
+    async def async_stream_chat_with_tools(
+        self,
+        system_prompt: str,
+        chat_history: list[Message],
+        tools: list[dict[str, Any]],
+        dynamic_context: str | None = None,
+    ) -> AsyncGenerator[LLMStreamEvent, None]:
+        model, contents, gemini_tools = self._tool_request(chat_history, tools)
+
+        async def open_stream(client: genai.Client, cached_content: str | None):
+            return await cast(Any, client.aio.models).generate_content_stream(
+                model=model,
+                contents=cast(Any, self._tool_contents(contents, dynamic_context, cached_content)),
+                config=self._tool_config(model, system_prompt, dynamic_context, gemini_tools, cached_content),
+            )
+
+        async with self.semaphore:
+            client = self._get_async_client()
+            cache_key, cached_content = await self._cached_prefix(
+                client, model, system_prompt, dynamic_context, tools, gemini_tools
+            )
+
+            try:
+                stream = await open_stream(client, cached_content)
+            except errors.ClientError as e:
+                if not (cached_content and self.context_cache and cache_key):
+                    raise
+                logger.warning(f"Stream with Gemini context cache {cached_content} failed ({e}); retrying uncached")
+                self.context_cache.invalidate(cache_key)
+                stream = await open_stream(client, None)
+
+            parts = _ResponseParts()
+            usage = None
+            async for chunk in stream:
+                usage = getattr(chunk, "usage_metadata", None) or usage
+                candidates = getattr(chunk, "candidates", None)
+                if not candidates or not candidates[0].content or not candidates[0].content.parts:
                     continue
+                # Function calls arrive as whole parts, so each one is complete as soon as it is seen
+                for part in candidates[0].content.parts:
+                    for event in parts.add(part):
+                        yield event
 
-                if getattr(part, "thought", None) and getattr(part, "text", None):
-                    thought_text += str(part.text)
-                elif getattr(part, "text", None):
-                    content_text += str(part.text)
-
-                # Capture thought_signature (bytes) from any part that has it
-                t_sig = getattr(part, "thought_signature", None)
-                if t_sig and thought_sig is None:
-                    thought_sig = base64.b64encode(cast(bytes, t_sig)).decode(
-                        "ascii"
-                    )
-
-                if part.function_call:
-                    tool_calls.append(
-                        {
-                            "name": part.function_call.name,
-                            "arguments": dict(part.function_call.args)
-                            if part.function_call.args
-                            else {},
-                            "id": "call_gemini_" + str(part.function_call.name),
-                        }
-                    )
+        yield LLMStreamEvent(StreamEventKind.DONE, response=parts.to_response(usage))
 
 
+class _ResponseParts:
+    """Accumulates Gemini response parts into an LLMResponse, emitting stream events on the way."""
+
+    def __init__(self):
+        self.content = ""
+        self.thought = ""
+        self.thought_signature: str | None = None
+        self.tool_calls: list[dict[str, Any]] = []
+
+    def add(self, part: types.Part | None) -> list[LLMStreamEvent]:
+        if part is None:
+            return []
+        events = []
+
+        if getattr(part, "thought", None) and getattr(part, "text", None):
+            self.thought += str(part.text)
+            events.append(LLMStreamEvent(StreamEventKind.THOUGHT, text=str(part.text)))
+        elif getattr(part, "text", None):
+            self.content += str(part.text)
+            events.append(LLMStreamEvent(StreamEventKind.CONTENT, text=str(part.text)))
+
+        # Capture thought_signature (bytes) from any part that has it
+        t_sig = getattr(part, "thought_signature", None)
+        if t_sig and self.thought_signature is None:
+            self.thought_signature = base64.b64encode(cast(bytes, t_sig)).decode("ascii")
+
+        if part.function_call:
+            call = {
+                "name": part.function_call.name,
+                "arguments": dict(part.function_call.args) if part.function_call.args else {},
+                "id": "call_gemini_" + str(part.function_call.name),
+            }
+            self.tool_calls.append(call)
+            events.append(LLMStreamEvent(StreamEventKind.TOOL_CALL, tool_call=call))
+        return events
+
+    def to_response(self, usage: Any) -> LLMResponse:
+        if usage and usage.cached_content_token_count:
+            logger.debug(
+                f"Gemini prompt tokens: {usage.prompt_token_count}, from cache: {usage.cached_content_token_count}"
+            )
         return LLMResponse(
-            content=content_text,
-            thought=thought_text if thought_text else None,
-            thought_signature=thought_sig,
-            tool_calls=tool_calls if tool_calls else None
+            content=self.content,
+            thought=self.thought if self.thought else None,
+            thought_signature=self.thought_signature,
+            tool_calls=self.tool_calls if self.tool_calls else None,
+            prompt_tokens=usage.prompt_token_count if usage else None,
+            cached_tokens=usage.cached_content_token_count if usage else None,
         )
-
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+from google import genai
+from google.genai import types
+
+logger = logging.getLogger(__name__)
+
+# Refresh the TTL when less than this is left, so a cache never expires mid-turn
+REFRESH_MARGIN_SECONDS = 60
+# After a failed create (e.g. prefix below the model's minimum cacheable size), don't retry for a while
+FAILURE_BACKOFF_SECONDS = 600
+
+
+@dataclass
+class _CacheEntry:
+    name: str
+    expires_at: float
+
+
+class GeminiContextCache:
+    """
+    Server-side cached contents for the static part of a tool-calling request:
+    the system instruction and the tool declarations.
+
+    Entries are keyed by a hash of (model, system instruction, tools), so any change to
+    the static prefix creates a new cache. Old ones fall out of the LRU (and are deleted)
+    or simply expire.
+    """
+
+    def __init__(self, ttl_seconds: int = 900, max_entries: int = 8):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, _CacheEntry] = OrderedDict()
+        self._failed_until: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(model: str, system_instruction: str, tools: list[dict[str, Any]]) -> str:
+        payload = json.dumps([model, system_instruction, tools], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def invalidate(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    async def get_or_create(
+        self,
+        client: genai.Client,
+        model: str,
+        system_instruction: str,
+        tools: list[dict[str, Any]],
+        gemini_tools: list[types.Tool],
+    ) -> tuple[str, str | None]:
+        """Returns (key, cached content name); the name is None if caching is unavailable."""
+        key = self.make_key(model, system_instruction, tools)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry.expires_at - now > REFRESH_MARGIN_SECONDS:
+                self._entries.move_to_end(key)
+                return key, entry.name
+            if self._failed_until.get(key, 0.0) > now:
+                return key, None
+
+        if entry:
+            try:
+                await client.aio.caches.update(
+                    name=entry.name,
+                    config=types.UpdateCachedContentConfig(ttl=f"{self.ttl_seconds}s"),
+                )
+                with self._lock:
+                    entry.expires_at = now + self.ttl_seconds
+                return key, entry.name
+            except Exception as e:
+                logger.debug(f"Failed to refresh Gemini context cache {entry.name}: {e}")
+                self.invalidate(key)
+
+        try:
+            cached = await client.aio.caches.create(
+                model=model,
+                config=types.CreateCachedContentConfig(
+                    system_instruction=system_instruction,
+                    tools=gemini_tools,
+                    ttl=f"{self.ttl_seconds}s",
+                    display_name=f"static-prefix-{key[:12]}",
+                ),
+            )
+        except Exception as e:
+            logger.info(f"Gemini context cache unavailable, sending static prefix uncached: {e}")
+            with self._lock:
+                self._failed_until[key] = now + FAILURE_BACKOFF_SECONDS
+            return key, None
+
+        if not cached.name:
+            return key, None
+
+        evicted: list[str] = []
+        with self._lock:
+            existing = self._entries.get(key)
+            if existing:
+                # Another thread created the same cache concurrently; keep theirs
+                evicted.append(cached.name)
+                name = existing.name
+            else:
+                self._entries[key] = _CacheEntry(name=cached.name, expires_at=now + self.ttl_seconds)
+                name = cached.name
+                logger.info(f"Created Gemini context cache {name} (ttl {self.ttl_seconds}s)")
+                while len(self._entries) > self.max_entries:
+                    _, old = self._entries.popitem(last=False)
+                    evicted.append(old.name)
+
+        for old_name in evicted:
+            try:
+                await client.aio.caches.delete(name=old_name)
+            except Exception as e:
+                logger.debug(f"Failed to delete Gemini context cache {old_name}: {e}")
+
+        return key, name
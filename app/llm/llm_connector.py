@@ -4,13 +4,17 @@ import asyncio
 import logging
 import os
 import threading
+import weakref
 from abc import ABC, abstractmethod
-from collections.abc import AsyncGenerator, Generator
+from collections.abc import AsyncGenerator, Coroutine, Generator
 from dataclasses import dataclass
-from typing import Any, cast
+from enum import StrEnum
+from typing import Any, TypeVar, cast
 
+import httpx
 from pydantic import BaseModel
 
+from app.llm.resilience import LLMResilience
 from app.models.message import Message
 
 logger = logging.getLogger(__name__)
@@ -22,26 +26,143 @@ class LLMResponse:
     tool_calls: list[dict[str, Any]] | None
     thought: str | None = None
     thought_signature: str | None = None
+    # Prompt-cache accounting as reported by the provider (None if not reported)
+    prompt_tokens: int | None = None
+    cached_tokens: int | None = None
+
+
+T = TypeVar("T")
+
+
+class StreamEventKind(StrEnum):
+    CONTENT = "content"  # Narrative text delta
+    THOUGHT = "thought"  # Reasoning text delta
+    TOOL_CALL = "tool_call"  # A tool call whose arguments are complete
+    DONE = "done"  # End of the response; carries the assembled LLMResponse
+
+
+@dataclass
+class LLMStreamEvent:
+    kind: StreamEventKind
+    text: str = ""
+    tool_call: dict[str, Any] | None = None
+    response: LLMResponse | None = None
+
+
+def events_from_response(response: LLMResponse) -> list[LLMStreamEvent]:
+    """Replays a complete response as stream events (for providers without incremental output)."""
+    events = []
+    if response.thought:
+        events.append(LLMStreamEvent(StreamEventKind.THOUGHT, text=response.thought))
+    if response.content:
+        events.append(LLMStreamEvent(StreamEventKind.CONTENT, text=response.content))
+    for call in response.tool_calls or []:
+        events.append(LLMStreamEvent(StreamEventKind.TOOL_CALL, tool_call=call))
+    events.append(LLMStreamEvent(StreamEventKind.DONE, response=response))
+    return events
+
+
+class LLMIOLoop:
+    """
+    A long-lived event loop on a daemon thread. Synchronous callers submit coroutines
+    here instead of spinning up a fresh loop (and fresh HTTP clients) per request.
+    """
+
+    def __init__(self, name: str):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, daemon=True, name=name)
+        self._thread.start()
+
+    def run(self, coro: Coroutine[Any, Any, T]) -> T:
+        """Runs a coroutine on the I/O loop and blocks until it finishes."""
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("LLMIOLoop.run() called from the I/O loop itself; await the coroutine instead.")
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+
+class ConnectionStats:
+    """Counts HTTP requests vs. newly opened connections, to show keep-alive reuse."""
+
+    def __init__(self):
+        self.requests = 0
+        self.new_connections = 0
+
+    async def on_request(self, request: httpx.Request):
+        self.requests += 1
+        request.extensions["trace"] = self._trace
+
+    async def _trace(self, event_name: str, info: dict):
+        if event_name == "connection.connect_tcp.complete":
+            self.new_connections += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        reused = max(self.requests - self.new_connections, 0)
+        return {
+            "requests": self.requests,
+            "new_connections": self.new_connections,
+            "reused": reused,
+            "reuse_ratio": round(reused / self.requests, 3) if self.requests else 0.0,
+        }
 
 
 class LLMConnector(ABC):
     def __init__(self):
         # Concurrency limit for parallel setup tasks (World/Char Gen)
         self._max_workers = int(os.environ.get("SETUP_MAX_WORKERS", 5))
-        self._semaphore: asyncio.Semaphore | None = None
+        self._semaphore_override: asyncio.Semaphore | None = None
+        self._semaphores: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore] = weakref.WeakKeyDictionary()
         # Global timeout for any single LLM call (default 5 minutes)
         self.timeout = float(os.environ.get("LLM_TIMEOUT", 300))
 
+        self._io_loop: LLMIOLoop | None = None
+        self._io_loop_lock = threading.Lock()
+        self.connection_stats = ConnectionStats()
+        # Retries, hedging and circuit breaking for this provider (see app/llm/resilience.py)
+        self.resilience = LLMResilience.from_env(type(self).__name__)
+
     @property
     def semaphore(self) -> asyncio.Semaphore:
-        """Lazy initialization of the semaphore to ensure it's bound to the correct event loop."""
-        if self._semaphore is None:
-            self._semaphore = asyncio.Semaphore(self._max_workers)
-        return self._semaphore
+        """One semaphore per event loop; asyncio primitives cannot be shared across loops."""
+        if self._semaphore_override is not None:
+            return self._semaphore_override
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self._max_workers)
+            self._semaphores[loop] = semaphore
+        return semaphore
 
     @semaphore.setter
     def semaphore(self, value: asyncio.Semaphore):
-        self._semaphore = value
+        self._semaphore_override = value
+
+    @property
+    def io_loop(self) -> LLMIOLoop:
+        """The connector's persistent I/O loop, started on first use."""
+        if self._io_loop is None:
+            with self._io_loop_lock:
+                if self._io_loop is None:
+                    self._io_loop = LLMIOLoop(name=f"{type(self).__name__}-IO")
+        return self._io_loop
+
+    def _create_http_client(self) -> httpx.AsyncClient:
+        """A keep-alive, pooled HTTP client that records connection reuse."""
+        return httpx.AsyncClient(
+            timeout=self.timeout,
+            limits=httpx.Limits(
+                max_connections=max(self._max_workers * 2, 10),
+                max_keepalive_connections=max(self._max_workers, 5),
+            ),
+            event_hooks={"request": [self.connection_stats.on_request]},
+        )
+
+    def get_connection_stats(self) -> dict[str, Any]:
+        return self.connection_stats.snapshot()
+
+    def get_call_stats(self) -> dict[str, Any]:
+        """Attempts per operation and outcome (ok/retry/error/repair/hedge/rejected), latencies and breaker state."""
+        return {"breaker": self.resilience.breaker.state, **self.resilience.metrics.snapshot()}
 
     # --- Synchronous Interface (for Turn Manager) ---
 
@@ -51,20 +172,22 @@ class LLMConnector(ABC):
         chat_history: list[Message],
         stop_event: threading.Event | None = None,
     ) -> Generator[str, None, None]:
-        """Synchronous wrapper for streaming."""
-        # Note: Implementation might vary by provider for sync streaming
-        loop = asyncio.new_event_loop()
+        """Synchronous wrapper for streaming. Chunks are pulled through the I/O loop."""
         async_gen = self.async_get_streaming_response(system_prompt, chat_history)
+
+        async def next_chunk() -> str:
+            return await async_gen.__anext__()
+
         try:
             while True:
                 if stop_event and stop_event.is_set():
                     break
                 try:
-                    yield loop.run_until_complete(async_gen.__anext__())
+                    yield self.io_loop.run(next_chunk())
                 except StopAsyncIteration:
                     break
         finally:
-            loop.close()
+            self.io_loop.run(async_gen.aclose())
 
     def get_structured_response(
         self,
@@ -78,7 +201,7 @@ class LLMConnector(ABC):
         """Synchronous wrapper for structured output."""
         return cast(
             BaseModel,
-            asyncio.run(
+            self.io_loop.run(
                 self._run_with_interrupt(
                     self.async_get_structured_response(
                         system_prompt, chat_history, output_schema, temperature, top_p
@@ -94,18 +217,60 @@ class LLMConnector(ABC):
         chat_history: list[Message],
         tools: list[dict[str, Any]],
         stop_event: threading.Event | None = None,
+        dynamic_context: str | None = None,
     ) -> LLMResponse:
-        """Synchronous wrapper for tool calls."""
+        """
+        Synchronous wrapper for tool calls.
+        `dynamic_context` is per-turn context kept apart from the (stable) system prompt,
+        so providers can cache the static prefix.
+        """
         return cast(
             LLMResponse,
-            asyncio.run(
+            self.io_loop.run(
                 self._run_with_interrupt(
-                    self.async_chat_with_tools(system_prompt, chat_history, tools),
+                    self.async_chat_with_tools(system_prompt, chat_history, tools, dynamic_context),
                     stop_event,
                 )
             ),
         )
 
+    def stream_chat_with_tools(
+        self,
+        system_prompt: str,
+        chat_history: list[Message],
+        tools: list[dict[str, Any]],
+        stop_event: threading.Event | None = None,
+        dynamic_context: str | None = None,
+    ) -> Generator[LLMStreamEvent, None, None]:
+        """
+        Synchronous wrapper for streaming tool calls. Yields text/thought deltas and tool calls
+        as they complete, then a DONE event with the assembled response.
+        Raises InterruptedError if the stop_event is set while waiting.
+        """
+        async_gen = self.async_stream_chat_with_tools(system_prompt, chat_history, tools, dynamic_context)
+
+        async def next_event() -> LLMStreamEvent:
+            return await asyncio.wait_for(async_gen.__anext__(), timeout=self.timeout)
+
+        try:
+            while True:
+                try:
+                    event = self.io_loop.run(self._run_with_interrupt(next_event(), stop_event))
+                except StopAsyncIteration:
+                    break
+                yield event
+                if event.kind == StreamEventKind.DONE:
+                    break
+        finally:
+            self.io_loop.run(async_gen.aclose())
+
+    @staticmethod
+    def join_system_prompt(system_prompt: str, dynamic_context: str | None) -> str:
+        """The combined system prompt for providers that don't separate static and dynamic context."""
+        if not dynamic_context:
+            return system_prompt
+        return f"{system_prompt}\n\n{dynamic_context}"
+
     async def _run_with_interrupt(
         self, coro, stop_event: threading.Event | None
     ) -> Any:
@@ -154,12 +319,25 @@ class LLMConnector(ABC):
     ) -> BaseModel:
         pass
 
+    async def async_stream_chat_with_tools(
+        self,
+        system_prompt: str,
+        chat_history: list[Message],
+        tools: list[dict[str, Any]],
+        dynamic_context: str | None = None,
+    ) -> AsyncGenerator[LLMStreamEvent, None]:
+        """Streaming tool calls. Default: a single non-streaming request replayed as events."""
+        response = await self.async_chat_with_tools(system_prompt, chat_history, tools, dynamic_context)
+        for event in events_from_response(response):
+            yield event
+
     @abstractmethod
     async def async_chat_with_tools(
         self,
         system_prompt: str,
         chat_history: list[Message],
         tools: list[dict[str, Any]],
+        dynamic_context: str | None = None,
     ) -> LLMResponse:
         pass
 
@@ -8,11 +8,11 @@ import weakref
 from collections.abc import AsyncGenerator
 from typing import TYPE_CHECKING, Any, cast
 
-import httpx
 import openai
 from pydantic import BaseModel, ValidationError
 
-from app.llm.llm_connector import LLMConnector, LLMResponse
+from app.llm.llm_connector import LLMConnector, LLMResponse, LLMStreamEvent, StreamEventKind
+from app.llm.resilience import StructuredOutputError, resilient_call, resilient_stream, resilient_structured
 from app.models.message import Message
 from app.models.vocabulary import MessageRole
 
@@ -34,6 +34,9 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+PROMPT_LAYOUT_CLASSIC = "classic"
+PROMPT_LAYOUT_PREFIX_STABLE = "prefix_stable"
+
 
 class OpenAIConnector(LLMConnector):
     """
@@ -56,37 +59,23 @@ class OpenAIConnector(LLMConnector):
             raise ValueError("OPENAI_API_MODEL environment variable not set.")
         self.client = openai.OpenAI(base_url=self.base_url, api_key=self.api_key, timeout=self.timeout)
         self._async_clients: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, openai.AsyncOpenAI] = weakref.WeakKeyDictionary()
+        # prefix_stable: keep the system message byte-identical across turns and move the
+        # per-turn context next to the latest user message, so server-side prompt/KV caches hit
+        self.prompt_layout = os.environ.get("PROMPT_LAYOUT", PROMPT_LAYOUT_CLASSIC).lower()
 
     def _get_async_client(self) -> openai.AsyncOpenAI:
-        """Returns an AsyncOpenAI client associated with the current event loop."""
-
-        try:
-            loop = asyncio.get_running_loop()
-        except RuntimeError:
-            # Fallback for sync contexts or before loop starts
-            # Note: We don't cache this as it's not tied to a loop
-            http_client = httpx.AsyncClient(
-                timeout=self.timeout,
-                limits=httpx.Limits(max_keepalive_connections=0)
-            )
-            return openai.AsyncOpenAI(
-                base_url=self.base_url,
-                api_key=self.api_key,
-                max_retries=3,
-                http_client=http_client
-            )
-
+        """
+        Returns the AsyncOpenAI client for the current event loop. Sync callers always run on
+        the connector's persistent I/O loop, so in practice this is one pooled keep-alive client.
+        """
+        loop = asyncio.get_running_loop()
         if loop not in self._async_clients:
             logger.debug(f"Creating new AsyncOpenAI client for loop {id(loop)}")
-            http_client = httpx.AsyncClient(
-                timeout=self.timeout,
-                limits=httpx.Limits(max_keepalive_connections=0)
-            )
             self._async_clients[loop] = openai.AsyncOpenAI(
                 base_url=self.base_url,
                 api_key=self.api_key,
-                max_retries=3,
-                http_client=http_client
+                max_retries=0,  # Retries are handled (and counted) by self.resilience
+                http_client=self._create_http_client(),
             )
         return self._async_clients[loop]
 
@@ -237,6 +226,7 @@ class OpenAIConnector(LLMConnector):
 
         return None
 
+    @resilient_stream("streaming")
     async def async_get_streaming_response(
         self, system_prompt: str, chat_history: list[Message]
     ) -> AsyncGenerator[str, None]:
@@ -291,6 +281,7 @@ class OpenAIConnector(LLMConnector):
                             has_started_content = True
                         yield delta.content
 
+    @resilient_structured
     async def async_get_structured_response(
         self,
         system_prompt: str,
@@ -352,33 +343,19 @@ class OpenAIConnector(LLMConnector):
         message = typed_resp.choices[0].message
         content = message.content
         if content is None:
-            raise ValueError("OpenAI returned empty content.")
-
-        # Capture reasoning even in structured response if available
-        # Note: most providers don't support reasoning+json_schema yet, but some do.
-        # We don't have a place to return 'thought' here as we return the validated model,
-        # but we can log it or let the caller handle it if LLMResponse was returned.
-        # For now, capturing content for validation.
-
+            raise StructuredOutputError("OpenAI returned empty content.")
 
         try:
             # Parse and validate
-            validated = output_schema.model_validate_json(content)
-            return validated
-
+            return output_schema.model_validate_json(content)
         except ValidationError as e:
-            logger.error(f"Validation error in OpenAI response: {e}", exc_info=True)
-            logger.error(f"Raw content: {content}")
-            raise
-
+            logger.warning(f"Validation error in OpenAI response: {e}")
+            logger.debug(f"Raw content: {content}")
+            raise StructuredOutputError(str(e), raw=content) from e
         except json.JSONDecodeError as e:
-            logger.error(f"JSON decode error in OpenAI response: {e}", exc_info=True)
-            logger.error(f"Raw content: {content}")
-            raise
-        except Exception as e:
-            logger.error(f"An unexpected error occurred in get_structured_response: {e}", exc_info=True)
-            logger.error(f"Raw content: {content}")
-            raise
+            logger.warning(f"JSON decode error in OpenAI response: {e}")
+            logger.debug(f"Raw content: {content}")
+            raise StructuredOutputError(str(e), raw=content) from e
 
     def _clean_schema(self, schema: dict[str, Any]):
         """
@@ -433,14 +410,18 @@ class OpenAIConnector(LLMConnector):
             for item in schema:
                 self._recursive_clean(item)
 
-    async def async_chat_with_tools(
-        self,
-        system_prompt: str,
-        chat_history: list[Message],
-        tools: list[dict[str, Any]],
-    ) -> LLMResponse:
+    def _build_tool_messages(
+        self, system_prompt: str, chat_history: list[Message], dynamic_context: str | None
+    ) -> list[ChatCompletionMessageParam]:
+        prefix_stable = self.prompt_layout == PROMPT_LAYOUT_PREFIX_STABLE and bool(dynamic_context)
+        if prefix_stable:
+            system_content = system_prompt
+            chat_history = self._insert_dynamic_context(chat_history, cast(str, dynamic_context))
+        else:
+            system_content = self.join_system_prompt(system_prompt, dynamic_context)
+
         messages: list[ChatCompletionMessageParam] = [
-            cast("ChatCompletionSystemMessageParam", {"role": MessageRole.SYSTEM, "content": system_prompt})
+            cast("ChatCompletionSystemMessageParam", {"role": MessageRole.SYSTEM, "content": system_content})
         ]
         converted_history = self._convert_chat_history_to_messages(chat_history)
         if not converted_history:
@@ -448,6 +429,20 @@ class OpenAIConnector(LLMConnector):
                 cast("ChatCompletionUserMessageParam", {"role": MessageRole.USER, "content": "Please proceed."})
             )
         messages.extend(converted_history)
+        if prefix_stable:
+            prefix_chars = self.stable_prefix_length(messages, cast(str, dynamic_context))
+            logger.debug(f"Prefix-stable layout: {prefix_chars} stable prefix chars of {len(json.dumps(messages))}")
+        return messages
+
+    @resilient_call("chat_with_tools")
+    async def async_chat_with_tools(
+        self,
+        system_prompt: str,
+        chat_history: list[Message],
+        tools: list[dict[str, Any]],
+        dynamic_context: str | None = None,
+    ) -> LLMResponse:
+        messages = self._build_tool_messages(system_prompt, chat_history, dynamic_context)
 
         extra_params={
                 # "chat_template_kwargs": {"enable_thinking": False},
@@ -494,8 +489,175 @@ class OpenAIConnector(LLMConnector):
                 except json.JSONDecodeError:
                     logger.error(f"Failed to decode arguments for {tool_call.function.name}")
 
+        prompt_tokens, cached_tokens = self._usage_cache_stats(getattr(typed_resp, "usage", None))
+        if cached_tokens is not None:
+            logger.debug(f"Prompt tokens: {prompt_tokens}, from server cache: {cached_tokens}")
+
         return LLMResponse(
             content=message.content,
             thought=thought_text if thought_text else None,
-            tool_calls=tool_calls_data if tool_calls_data else None
+            tool_calls=tool_calls_data if tool_calls_data else None,
+            prompt_tokens=prompt_tokens,
+            cached_tokens=cached_tokens,
         )
+
+    @resilient_stream("stream_chat_with_tools")
+    async def async_stream_chat_with_tools(
+        self,
+        system_prompt: str,
+        chat_history: list[Message],
+        tools: list[dict[str, Any]],
+        dynamic_context: str | None = None,
+    ) -> AsyncGenerator[LLMStreamEvent, None]:
+        messages = self._build_tool_messages(system_prompt, chat_history, dynamic_context)
+        extra_params = {
+            "top_k": 50,
+            "include_thoughts": True,
+            "stop": ["<|im_end|>", "<|im_end|"],
+        }
+
+        content_parts: list[str] = []
+        thought_parts: list[str] = []
+        assembler = _ToolCallAssembler()
+        usage = None
+
+        async with self.semaphore:
+            client = self._get_async_client()
+            stream = await cast(Any, client.chat.completions).create(
+                model=self.model or "gpt-4o",
+                messages=messages,
+                tools=tools,
+                tool_choice="auto" if tools else None,
+                temperature=0.5,
+                extra_body=extra_params,
+                stream=True,
+                stream_options={"include_usage": True},
+            )
+            try:
+                async for chunk in stream:
+                    typed_chunk = cast("ChatCompletionChunk", chunk)
+                    usage = getattr(typed_chunk, "usage", None) or usage
+                    if not typed_chunk.choices:
+                        continue
+                    choice = typed_chunk.choices[0]
+                    delta = choice.delta
+
+                    reasoning = self._extract_reasoning(delta)
+                    if reasoning:
+                        thought_parts.append(reasoning)
+                        yield LLMStreamEvent(StreamEventKind.THOUGHT, text=reasoning)
+
+                    if delta.content:
+                        content_parts.append(delta.content)
+                        yield LLMStreamEvent(StreamEventKind.CONTENT, text=delta.content)
+
+                    for call in assembler.add(delta.tool_calls or []):
+                        yield LLMStreamEvent(StreamEventKind.TOOL_CALL, tool_call=call)
+
+                    if choice.finish_reason:
+                        for call in assembler.finish():
+                            yield LLMStreamEvent(StreamEventKind.TOOL_CALL, tool_call=call)
+            finally:
+                await stream.close()
+
+        # Streams that end without a finish_reason still release their last calls
+        for call in assembler.finish():
+            yield LLMStreamEvent(StreamEventKind.TOOL_CALL, tool_call=call)
+
+        prompt_tokens, cached_tokens = self._usage_cache_stats(usage)
+        thought_text = "".join(thought_parts)
+        yield LLMStreamEvent(
+            StreamEventKind.DONE,
+            response=LLMResponse(
+                content="".join(content_parts) or None,
+                thought=thought_text if thought_text else None,
+                tool_calls=assembler.completed if assembler.completed else None,
+                prompt_tokens=prompt_tokens,
+                cached_tokens=cached_tokens,
+            ),
+        )
+
+    @staticmethod
+    def _insert_dynamic_context(chat_history: list[Message], dynamic_context: str) -> list[Message]:
+        """
+        Places the per-turn context right before the latest user message. Everything earlier
+        (system prompt and older history) stays byte-identical between turns, and within a
+        turn only new assistant/tool messages are appended after it.
+        """
+        context_msg = Message(role=MessageRole.USER, content=dynamic_context)
+        for i in range(len(chat_history) - 1, -1, -1):
+            if chat_history[i].role == MessageRole.USER:
+                return [*chat_history[:i], context_msg, *chat_history[i:]]
+        return [context_msg, *chat_history]
+
+    @staticmethod
+    def stable_prefix_length(messages: list[ChatCompletionMessageParam], dynamic_context: str) -> int:
+        """Characters of serialized messages ahead of the dynamic context (the cacheable prefix)."""
+        length = 0
+        for msg in messages:
+            content = cast(dict[str, Any], msg).get("content")
+            if isinstance(content, str) and dynamic_context in content:
+                return length + content.index(dynamic_context)
+            length += len(json.dumps(msg))
+        return length
+
+    @staticmethod
+    def _usage_cache_stats(usage: Any) -> tuple[int | None, int | None]:
+        """(prompt_tokens, cached_tokens) from usage; llama.cpp and vLLM report these like OpenAI."""
+        if usage is None:
+            return None, None
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = getattr(details, "cached_tokens", None) if details is not None else None
+        return getattr(usage, "prompt_tokens", None), cached
+
+
+class _ToolCallAssembler:
+    """
+    Rebuilds tool calls from streamed `delta.tool_calls` fragments. Fragments are keyed by
+    index; a call is complete once a later index starts, a fragment with a different call id
+    arrives at its index (servers that omit or repeat the index), or the choice finishes.
+    """
+
+    def __init__(self):
+        self._pending: dict[int, dict[str, Any]] = {}
+        self.completed: list[dict[str, Any]] = []
+
+    def add(self, fragments: list[Any]) -> list[dict[str, Any]]:
+        ready = []
+        for fragment in fragments:
+            index = getattr(fragment, "index", None) or 0
+            for done_index in sorted(i for i in self._pending if i < index):
+                ready.extend(self._complete(done_index))
+
+            call_id = getattr(fragment, "id", None)
+            pending = self._pending.get(index)
+            if call_id and pending and pending["id"] and pending["id"] != call_id:
+                ready.extend(self._complete(index))
+
+            entry = self._pending.setdefault(index, {"id": None, "name": "", "arguments": ""})
+            if call_id:
+                entry["id"] = call_id
+            function = getattr(fragment, "function", None)
+            if function is not None:
+                if function.name and not entry["name"]:
+                    entry["name"] = function.name
+                if function.arguments:
+                    entry["arguments"] += function.arguments
+        return ready
+
+    def finish(self) -> list[dict[str, Any]]:
+        ready = []
+        for index in sorted(self._pending):
+            ready.extend(self._complete(index))
+        return ready
+
+    def _complete(self, index: int) -> list[dict[str, Any]]:
+        entry = self._pending.pop(index)
+        try:
+            arguments = json.loads(entry["arguments"] or "{}")
+        except json.JSONDecodeError:
+            logger.error(f"Failed to decode arguments for {entry['name']}")
+            return []
+        call = {"name": entry["name"], "arguments": arguments, "id": entry["id"] or f"call_{index}"}
+        self.completed.append(call)
+        return [call]
@@ -0,0 +1,346 @@
+"""
+Record/replay connectors for offline benchmarking and tests.
+
+RecordingConnector wraps a live connector and appends every tool-call, structured and streaming
+request to a JSONL cassette: the request fingerprint, the response (or stream events with their
+arrival times) and the latency. ReplayConnector serves a cassette back deterministically, with
+no network, optionally sleeping for the recorded latency / time to first token.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from collections.abc import AsyncGenerator
+from typing import Any
+
+from pydantic import BaseModel
+
+from app.llm.llm_connector import LLMConnector, LLMResponse, LLMStreamEvent, StreamEventKind, events_from_response
+from app.models.message import Message
+
+logger = logging.getLogger(__name__)
+
+KIND_CHAT = "chat_with_tools"
+KIND_STREAM_CHAT = "stream_chat_with_tools"
+KIND_STRUCTURED = "structured"
+KIND_STREAMING = "streaming"
+
+# Per-turn values that differ between a recording and its replay
+VOLATILE_MESSAGE_FIELDS = {"turn_id"}
+
+
+def request_fingerprint(kind: str, system_prompt: str, chat_history: list[Message], **extra: Any) -> str:
+    """
+    Stable hash of a request: kind, prompt, history (minus turn ids) and extra parameters.
+    Streamed and non-streamed tool calls share KIND_CHAT, so either recording can serve both.
+    """
+    payload = {
+        "kind": kind,
+        "system_prompt": system_prompt,
+        "history": [m.model_dump(mode="json", exclude=VOLATILE_MESSAGE_FIELDS, exclude_none=True) for m in chat_history],
+        **extra,
+    }
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def _tool_names(tools: list[dict[str, Any]]) -> list[str]:
+    return [t.get("function", {}).get("name", "") for t in tools]
+
+
+def _response_to_dict(response: LLMResponse) -> dict[str, Any]:
+    return dataclasses.asdict(response)
+
+
+def _response_from_dict(data: dict[str, Any]) -> LLMResponse:
+    return LLMResponse(**data)
+
+
+def _event_to_dict(event: LLMStreamEvent, offset: float) -> dict[str, Any]:
+    entry: dict[str, Any] = {"kind": str(event.kind), "t": round(offset, 4)}
+    if event.text:
+        entry["text"] = event.text
+    if event.tool_call is not None:
+        entry["tool_call"] = event.tool_call
+    if event.response is not None:
+        entry["response"] = _response_to_dict(event.response)
+    return entry
+
+
+def _event_from_dict(data: dict[str, Any]) -> LLMStreamEvent:
+    response = data.get("response")
+    return LLMStreamEvent(
+        StreamEventKind(data["kind"]),
+        text=data.get("text", ""),
+        tool_call=data.get("tool_call"),
+        response=_response_from_dict(response) if response is not None else None,
+    )
+
+
+class RecordingConnector(LLMConnector):
+    """Delegates to `inner` and appends each completed call to the cassette at `path`."""
+
+    def __init__(self, inner: LLMConnector, path: str):
+        super().__init__()
+        self.inner = inner
+        self.path = path
+        self._lock = threading.Lock()
+        self._seq = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        logger.info(f"Recording LLM calls of {type(inner).__name__} to {path}")
+
+    def get_connection_stats(self) -> dict[str, Any]:
+        return self.inner.get_connection_stats()
+
+    def get_call_stats(self) -> dict[str, Any]:
+        return self.inner.get_call_stats()
+
+    def _write(self, entry: dict[str, Any]):
+        with self._lock:
+            entry = {"seq": self._seq, **entry}
+            self._seq += 1
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+
+    async def async_chat_with_tools(
+        self,
+        system_prompt: str,
+        chat_history: list[Message],
+        tools: list[dict[str, Any]],
+        dynamic_context: str | None = None,
+    ) -> LLMResponse:
+        started = time.monotonic()
+        response = await self.inner.async_chat_with_tools(system_prompt, chat_history, tools, dynamic_context)
+        self._write(
+            {
+                "kind": KIND_CHAT,
+                "hash": request_fingerprint(
+                    KIND_CHAT, system_prompt, chat_history, tools=_tool_names(tools), dynamic_context=dynamic_context
+                ),
+                "latency": round(time.monotonic() - started, 4),
+                "response": _response_to_dict(response),
+            }
+        )
+        return response
+
+    async def async_stream_chat_with_tools(
+        self,
+        system_prompt: str,
+        chat_history: list[Message],
+        tools: list[dict[str, Any]],
+        dynamic_context: str | None = None,
+    ) -> AsyncGenerator[LLMStreamEvent, None]:
+        started = time.monotonic()
+        events: list[dict[str, Any]] = []
+        async for event in self.inner.async_stream_chat_with_tools(system_prompt, chat_history, tools, dynamic_context):
+            events.append(_event_to_dict(event, time.monotonic() - started))
+            if event.kind == StreamEventKind.DONE:
+                # Written before yielding: consumers stop reading at DONE
+                self._write(
+                    {
+                        "kind": KIND_STREAM_CHAT,
+                        "hash": request_fingerprint(
+                            KIND_CHAT, system_prompt, chat_history, tools=_tool_names(tools), dynamic_context=dynamic_context
+                        ),
+                        "latency": round(time.monotonic() - started, 4),
+                        "ttft": events[0]["t"],
+                        "events": events,
+                    }
+                )
+            yield event
+
+    async def async_get_structured_response(
+        self,
+        system_prompt: str,
+        chat_history: list[Message],
+        output_schema: type[BaseModel],
+        temperature: float = 0.7,
+        top_p: float = 0.9,
+    ) -> BaseModel:
+        started = time.monotonic()
+        result = await self.inner.async_get_structured_response(system_prompt, chat_history, output_schema, temperature, top_p)
+        self._write(
+            {
+                "kind": KIND_STRUCTURED,
+                "hash": request_fingerprint(KIND_STRUCTURED, system_prompt, chat_history, schema=output_schema.__name__),
+                "schema": output_schema.__name__,
+                "latency": round(time.monotonic() - started, 4),
+                "response": result.model_dump(mode="json"),
+            }
+        )
+        return result
+
+    async def async_get_streaming_response(
+        self, system_prompt: str, chat_history: list[Message]
+    ) -> AsyncGenerator[str, None]:
+        started = time.monotonic()
+        chunks: list[dict[str, Any]] = []
+        async for chunk in self.inner.async_get_streaming_response(system_prompt, chat_history):
+            chunks.append({"text": chunk, "t": round(time.monotonic() - started, 4)})
+            yield chunk
+        self._write(
+            {
+                "kind": KIND_STREAMING,
+                "hash": request_fingerprint(KIND_STREAMING, system_prompt, chat_history),
+                "latency": round(time.monotonic() - started, 4),
+                "ttft": chunks[0]["t"] if chunks else None,
+                "chunks": chunks,
+            }
+        )
+
+
+class CassetteMissError(LookupError):
+    """No recorded response for a request (strict replay, or the cassette has none of its kind)."""
+
+
+class ReplayConnector(LLMConnector):
+    """
+    Serves responses from a cassette. Requests are matched by fingerprint; repeated identical
+    requests get their recordings in order. Without a match, the next unused recording of the
+    same kind is served (unless `strict`), so small prompt drift does not break a benchmark.
+    With `simulate_latency`, calls sleep for the recorded latency and streams reproduce the
+    recorded event timing (TTFT included), scaled by 1/`speed`.
+    """
+
+    def __init__(self, path: str, simulate_latency: bool = False, speed: float = 1.0, strict: bool = False):
+        super().__init__()
+        self.path = path
+        self.simulate_latency = simulate_latency
+        self.speed = speed if speed > 0 else 1.0
+        self.strict = strict
+        self._by_hash: dict[tuple[str, str], deque[dict[str, Any]]] = defaultdict(deque)
+        self._by_kind: dict[str, deque[dict[str, Any]]] = defaultdict(deque)
+        self._used: set[int] = set()
+        self._lock = threading.Lock()
+        self.misses = 0
+
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                self._by_hash[(entry["kind"], entry["hash"])].append(entry)
+                self._by_kind[entry["kind"]].append(entry)
+        logger.info(f"Replaying {sum(len(q) for q in self._by_kind.values())} recorded LLM calls from {path}")
+
+    @classmethod
+    def from_env(cls) -> ReplayConnector:
+        path = os.environ.get("LLM_CASSETTE")
+        if not path:
+            raise ValueError("LLM_CASSETTE environment variable not set (required for LLM_PROVIDER=REPLAY).")
+        return cls(
+            path,
+            simulate_latency=os.environ.get("LLM_REPLAY_LATENCY", "false").lower() == "true",
+            speed=float(os.environ.get("LLM_REPLAY_SPEED", 1.0)),
+            strict=os.environ.get("LLM_REPLAY_STRICT", "false").lower() == "true",
+        )
+
+    def _take(self, kinds: tuple[str, ...], fingerprint: str, schema: str | None = None) -> dict[str, Any]:
+        """
+        The recording for a request: exact match first (any of `kinds`), then the next unused one
+        (of the same output schema, for structured calls).
+        """
+        with self._lock:
+            for kind in kinds:
+                matches = self._by_hash.get((kind, fingerprint))
+                if matches:
+                    entry = matches.popleft() if len(matches) > 1 else matches[0]
+                    self._used.add(id(entry))
+                    return entry
+            self.misses += 1
+            if not self.strict:
+                for kind in kinds:
+                    for entry in self._by_kind.get(kind, ()):
+                        if id(entry) not in self._used and entry.get("schema") == schema:
+                            self._used.add(id(entry))
+                            logger.warning(f"No recording matches this {kinds[0]} request; serving recording #{entry.get('seq')}")
+                            return entry
+        raise CassetteMissError(f"No recorded {kinds[0]} response for request {fingerprint[:12]} in {self.path}")
+
+    async def _sleep(self, seconds: float | None):
+        if self.simulate_latency and seconds:
+            await asyncio.sleep(seconds / self.speed)
+
+    @staticmethod
+    def _events(entry: dict[str, Any]) -> list[dict[str, Any]]:
+        if "events" in entry:
+            return entry["events"]
+        # A non-streamed recording replayed as a stream: all events arrive at the end
+        return [
+            _event_to_dict(event, entry.get("latency") or 0.0)
+            for event in events_from_response(_response_from_dict(entry["response"]))
+        ]
+
+    @staticmethod
+    def _final_response(entry: dict[str, Any]) -> LLMResponse:
+        if "response" in entry:
+            return _response_from_dict(entry["response"])
+        done = next(e for e in entry["events"] if e["kind"] == StreamEventKind.DONE)
+        return _response_from_dict(done["response"])
+
+    async def async_chat_with_tools(
+        self,
+        system_prompt: str,
+        chat_history: list[Message],
+        tools: list[dict[str, Any]],
+        dynamic_context: str | None = None,
+    ) -> LLMResponse:
+        entry = self._take(
+            (KIND_CHAT, KIND_STREAM_CHAT),
+            request_fingerprint(KIND_CHAT, system_prompt, chat_history, tools=_tool_names(tools), dynamic_context=dynamic_context),
+        )
+        await self._sleep(entry.get("latency"))
+        return self._final_response(entry)
+
+    async def async_stream_chat_with_tools(
+        self,
+        system_prompt: str,
+        chat_history: list[Message],
+        tools: list[dict[str, Any]],
+        dynamic_context: str | None = None,
+    ) -> AsyncGenerator[LLMStreamEvent, None]:
+        entry = self._take(
+            (KIND_STREAM_CHAT, KIND_CHAT),
+            request_fingerprint(
+                KIND_CHAT, system_prompt, chat_history, tools=_tool_names(tools), dynamic_context=dynamic_context
+            ),
+        )
+        elapsed = 0.0
+        for data in self._events(entry):
+            await self._sleep(data.get("t", 0.0) - elapsed)
+            elapsed = max(elapsed, data.get("t", 0.0))
+            yield _event_from_dict(data)
+
+    async def async_get_structured_response(
+        self,
+        system_prompt: str,
+        chat_history: list[Message],
+        output_schema: type[BaseModel],
+        temperature: float = 0.7,
+        top_p: float = 0.9,
+    ) -> BaseModel:
+        entry = self._take(
+            (KIND_STRUCTURED,),
+            request_fingerprint(KIND_STRUCTURED, system_prompt, chat_history, schema=output_schema.__name__),
+            schema=output_schema.__name__,
+        )
+        await self._sleep(entry.get("latency"))
+        return output_schema.model_validate(entry["response"])
+
+    async def async_get_streaming_response(
+        self, system_prompt: str, chat_history: list[Message]
+    ) -> AsyncGenerator[str, None]:
+        entry = self._take((KIND_STREAMING,), request_fingerprint(KIND_STREAMING, system_prompt, chat_history))
+        elapsed = 0.0
+        for chunk in entry.get("chunks", []):
+            await self._sleep(chunk["t"] - elapsed)
+            elapsed = max(elapsed, chunk["t"])
+            yield chunk["text"]
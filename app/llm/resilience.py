@@ -0,0 +1,381 @@
+"""
+Resilience for LLM calls: jittered exponential backoff on 429/5xx and transport errors,
+repair-retries for invalid structured output, optional hedged requests past the p95
+latency, a per-provider circuit breaker, and per-attempt metrics.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import logging
+import os
+import random
+import threading
+import time
+from collections import defaultdict, deque
+from collections.abc import AsyncGenerator, Awaitable, Callable
+from typing import Any, TypeVar
+
+import httpx
+from pydantic import ValidationError
+
+from app.models.message import Message
+from app.models.vocabulary import MessageRole
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS = {408, 429}
+RETRYABLE_ERROR_NAMES = {"APIConnectionError", "APITimeoutError", "InternalServerError", "ServerError", "RateLimitError"}
+REPAIR_RAW_CHARS = 2000
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised without calling the backend while its circuit breaker is open."""
+
+
+class StructuredOutputError(ValueError):
+    """The model's structured output could not be parsed or validated; `raw` is what it sent."""
+
+    def __init__(self, message: str, raw: str | None = None):
+        super().__init__(message)
+        self.raw = raw
+
+
+def status_code(error: BaseException) -> int | None:
+    """HTTP status of a provider error (openai, google-genai and httpx spell it differently)."""
+    for attr in ("status_code", "code"):
+        value = getattr(error, attr, None)
+        if isinstance(value, int):
+            return value
+    response = getattr(error, "response", None)
+    value = getattr(response, "status_code", None)
+    return value if isinstance(value, int) else None
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Rate limits, server errors, timeouts and dropped connections; never client errors."""
+    if isinstance(error, (InterruptedError, CircuitOpenError, StructuredOutputError, ValidationError)):
+        return False
+    if isinstance(error, (TimeoutError, ConnectionError, httpx.TransportError)):
+        return True
+    code = status_code(error)
+    if code is not None:
+        return code in RETRYABLE_STATUS or code >= 500
+    return any(cls.__name__ in RETRYABLE_ERROR_NAMES for cls in type(error).__mro__)
+
+
+def retry_after(error: BaseException) -> float | None:
+    """Seconds requested by a Retry-After header, if the error carries one."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive retryable failures and rejects calls for `cooldown`
+    seconds. After that, calls are let through again; the first result closes or reopens it.
+    """
+
+    def __init__(self, threshold: int = 5, cooldown: float = 30.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            return "open" if time.monotonic() - self._opened_at < self.cooldown else "half_open"
+
+    def before_call(self, name: str):
+        if self.threshold > 0 and self.state == "open":
+            raise CircuitOpenError(f"{name} is unavailable (circuit open after {self._failures} consecutive failures)")
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.threshold > 0 and self._failures >= self.threshold:
+                self._opened_at = time.monotonic()
+
+
+class LLMCallMetrics:
+    """Counts every attempt by operation and outcome, and keeps recent successful latencies."""
+
+    OUTCOMES = ("ok", "retry", "error", "repair", "hedge", "rejected")
+
+    def __init__(self, window: int = 200):
+        self._counts: dict[str, dict[str, int]] = defaultdict(lambda: dict.fromkeys(self.OUTCOMES, 0))
+        self._latencies: dict[str, deque[float]] = defaultdict(lambda: deque(maxlen=window))
+        self._lock = threading.Lock()
+
+    def record(self, operation: str, outcome: str, latency: float | None = None, error: BaseException | None = None):
+        with self._lock:
+            self._counts[operation][outcome] += 1
+            if outcome == "ok" and latency is not None:
+                self._latencies[operation].append(latency)
+        if error is not None:
+            logger.debug(f"LLM {operation} attempt {outcome}: {type(error).__name__}: {error}")
+
+    def percentile(self, operation: str, q: float, min_samples: int = 1) -> float | None:
+        with self._lock:
+            samples = sorted(self._latencies[operation])
+        if len(samples) < max(min_samples, 1):
+            return None
+        return samples[min(int(q * len(samples)), len(samples) - 1)]
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            operations = list(self._counts)
+            counts = {op: dict(self._counts[op]) for op in operations}
+        for op in operations:
+            p50, p95 = self.percentile(op, 0.5), self.percentile(op, 0.95)
+            counts[op]["p50"] = round(p50, 3) if p50 is not None else None
+            counts[op]["p95"] = round(p95, 3) if p95 is not None else None
+        return counts
+
+
+class LLMResilience:
+    """Retry, hedging and circuit-breaking policy for one connector (one provider)."""
+
+    def __init__(
+        self,
+        name: str,
+        max_retries: int = 3,
+        base_delay: float = 1.0,
+        max_delay: float = 20.0,
+        repair_attempts: int = 2,
+        hedge: bool = False,
+        hedge_percentile: float = 0.95,
+        hedge_min_samples: int = 20,
+        hedge_after: float | None = None,
+        breaker: CircuitBreaker | None = None,
+    ):
+        self.name = name
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.repair_attempts = repair_attempts
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_after = hedge_after
+        self.breaker = breaker or CircuitBreaker()
+        self.metrics = LLMCallMetrics()
+
+    @classmethod
+    def from_env(cls, name: str) -> LLMResilience:
+        hedge_after = os.environ.get("LLM_HEDGE_AFTER")
+        return cls(
+            name,
+            max_retries=int(os.environ.get("LLM_MAX_RETRIES", 3)),
+            base_delay=float(os.environ.get("LLM_RETRY_BASE_DELAY", 1.0)),
+            max_delay=float(os.environ.get("LLM_RETRY_MAX_DELAY", 20.0)),
+            repair_attempts=int(os.environ.get("LLM_REPAIR_ATTEMPTS", 2)),
+            hedge=os.environ.get("LLM_HEDGE", "false").lower() == "true",
+            hedge_percentile=float(os.environ.get("LLM_HEDGE_PERCENTILE", 0.95)),
+            hedge_after=float(hedge_after) if hedge_after else None,
+            breaker=CircuitBreaker(
+                threshold=int(os.environ.get("LLM_BREAKER_THRESHOLD", 5)),
+                cooldown=float(os.environ.get("LLM_BREAKER_COOLDOWN", 30.0)),
+            ),
+        )
+
+    def backoff(self, attempt: int, error: BaseException | None = None) -> float:
+        """Full-jitter exponential backoff, or the server's Retry-After if it asked for one."""
+        requested = retry_after(error) if error is not None else None
+        if requested is not None:
+            return min(requested, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+    def hedge_delay(self, operation: str) -> float | None:
+        if not self.hedge:
+            return None
+        if self.hedge_after is not None:
+            return self.hedge_after
+        return self.metrics.percentile(operation, self.hedge_percentile, self.hedge_min_samples)
+
+    async def call(self, operation: str, factory: Callable[[], Awaitable[T]], hedge: bool = True) -> T:
+        """Runs factory() with backoff on retryable errors; each attempt may be hedged."""
+        attempt = 0
+        while True:
+            try:
+                self.breaker.before_call(self.name)
+            except CircuitOpenError as e:
+                self.metrics.record(operation, "rejected", error=e)
+                raise
+            started = time.monotonic()
+            try:
+                result = await self._attempt(operation, factory, hedge)
+            except Exception as e:
+                if not is_retryable(e):
+                    self.metrics.record(operation, "error", error=e)
+                    raise
+                self.breaker.record_failure()
+                if attempt >= self.max_retries:
+                    self.metrics.record(operation, "error", error=e)
+                    raise
+                delay = self.backoff(attempt, e)
+                self.metrics.record(operation, "retry", error=e)
+                logger.warning(f"{self.name} {operation} failed ({e}); retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            self.breaker.record_success()
+            self.metrics.record(operation, "ok", time.monotonic() - started)
+            return result
+
+    async def _attempt(self, operation: str, factory: Callable[[], Awaitable[T]], hedge: bool) -> T:
+        """One attempt. Past the hedge delay a duplicate request starts; the first success wins."""
+        delay = self.hedge_delay(operation) if hedge else None
+        if delay is None:
+            return await factory()
+
+        primary = asyncio.ensure_future(factory())
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                self.metrics.record(operation, "hedge")
+                logger.info(f"{self.name} {operation} slower than {delay:.2f}s; sending a hedged request")
+                tasks.add(asyncio.ensure_future(factory()))
+            error: BaseException | None = None
+            while tasks:
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    tasks.discard(task)
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error if error is not None else RuntimeError("Hedged request produced no result")
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def stream(self, operation: str, factory: Callable[[], AsyncGenerator[T, None]]) -> AsyncGenerator[T, None]:
+        """
+        Streams factory()'s items. Failures before the first item are retried like call();
+        once items have been delivered the error is raised (the consumer already acted on them).
+        """
+        attempt = 0
+        while True:
+            try:
+                self.breaker.before_call(self.name)
+            except CircuitOpenError as e:
+                self.metrics.record(operation, "rejected", error=e)
+                raise
+            started = time.monotonic()
+            delivered = False
+            stream = factory()
+            try:
+                async for item in stream:
+                    if not delivered:
+                        delivered = True
+                        self.metrics.record(f"{operation}.first_item", "ok", time.monotonic() - started)
+                    yield item
+            except Exception as e:
+                if delivered or not is_retryable(e):
+                    if is_retryable(e):
+                        self.breaker.record_failure()
+                    self.metrics.record(operation, "error", error=e)
+                    raise
+                self.breaker.record_failure()
+                if attempt >= self.max_retries:
+                    self.metrics.record(operation, "error", error=e)
+                    raise
+                delay = self.backoff(attempt, e)
+                self.metrics.record(operation, "retry", error=e)
+                logger.warning(f"{self.name} {operation} failed ({e}); retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            finally:
+                await stream.aclose()
+            self.breaker.record_success()
+            self.metrics.record(operation, "ok", time.monotonic() - started)
+            return
+
+
+def repair_messages(error: BaseException) -> list[Message]:
+    """The failed output and the validation error, sent back so the model can correct itself."""
+    raw = getattr(error, "raw", None)
+    if raw:
+        attempt = raw if len(raw) <= REPAIR_RAW_CHARS else raw[:REPAIR_RAW_CHARS] + "…"
+    else:
+        attempt = "I provided an invalid JSON response."
+    return [
+        Message(role=MessageRole.ASSISTANT, content=attempt),
+        Message(
+            role=MessageRole.USER,
+            content=f"Validation failed: {error}. Please fix the errors and try again. Provide ONLY valid JSON.",
+        ),
+    ]
+
+
+def resilient_call(operation: str):
+    """Decorates a connector's request coroutine with the connector's retry/hedge/breaker policy."""
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            return await self.resilience.call(operation, lambda: func(self, *args, **kwargs))
+
+        return wrapper
+
+    return decorator
+
+
+def resilient_stream(operation: str):
+    """Decorates a connector's async generator: retried only until its first item is delivered."""
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            async for item in self.resilience.stream(operation, lambda: func(self, *args, **kwargs)):
+                yield item
+
+        return wrapper
+
+    return decorator
+
+
+def resilient_structured(func):
+    """
+    Decorates async_get_structured_response: transport retries per request, plus up to
+    `repair_attempts` follow-ups that show the model its invalid output and the error.
+    """
+
+    @functools.wraps(func)
+    async def wrapper(self, system_prompt, chat_history, output_schema, *args, **kwargs):
+        resilience: LLMResilience = self.resilience
+        history = list(chat_history)
+        repairs = 0
+        while True:
+            try:
+                return await resilience.call(
+                    "structured", lambda h=history: func(self, system_prompt, h, output_schema, *args, **kwargs)
+                )
+            except (StructuredOutputError, ValidationError) as e:
+                if repairs >= resilience.repair_attempts:
+                    raise
+                repairs += 1
+                resilience.metrics.record("structured", "repair", error=e)
+                logger.warning(f"{output_schema.__name__} output invalid; repair attempt {repairs}/{resilience.repair_attempts}")
+                history = [*history, *repair_messages(e)]
+
+    return wrapper
@@ -197,6 +197,19 @@ class TurnMetadata(BaseModel):
     ] = 3
 
 
+class TurnWrapUp(TurnMetadata):
+    """Suggestions and chronicler metadata for a finished turn, in one extraction."""
+
+    choices: Annotated[
+        list[str],
+        Field(
+            description="A list of 3-5 action options the player could take next.",
+            min_length=3,
+            max_length=5,
+        ),
+    ]
+
+
 class CharacterBasicInfo(BaseModel):
     """Basic identity info for a character."""
 
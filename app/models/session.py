@@ -21,6 +21,13 @@ class Session:
             Message
         ] = []  # ✅ Start empty - only user/assistant messages
         self.setup_phase_data = setup_phase_data
+        # History may be a window over the messages table: history[0] is message #history_offset,
+        # and the first persisted_count entries are already stored.
+        self.history_offset = 0
+        self.persisted_count = 0
+        # Absolute index of the first message sent to the LLM verbatim; older turns are sent as
+        # their chronicler summaries (see HistoryCompactor). Only ever advances, except on rewind.
+        self.compacted_seq = 0
 
     def add_message(self, role: str, content: str):
         """Adds a message to the session history."""
@@ -34,18 +41,32 @@ class Session:
         """Returns the entire conversation history (user/assistant only)."""
         return self.history
 
+    def next_index(self) -> int:
+        """Absolute index the next appended message will have."""
+        return self.history_offset + len(self.history)
+
+    def pending_messages(self) -> list[Message]:
+        """Messages appended since the history was loaded or last persisted."""
+        return self.history[self.persisted_count:]
+
+    def mark_persisted(self):
+        self.persisted_count = len(self.history)
+
     def get_system_prompt(self) -> str:
         """Returns the system prompt."""
         return self.system_prompt
 
     def to_json(self) -> str:
-        """Serializes the session to a JSON string."""
+        """
+        Serializes the session header to a JSON string.
+        History lives in the messages table (see MessageRepository), not in this blob.
+        """
         return json.dumps(
             {
                 "session_id": self.session_id,
                 "system_prompt": self.system_prompt,  # ✅ Store separately
-                "history": [message.model_dump() for message in self.history],
                 "setup_phase_data": self.setup_phase_data,
+                "compacted_seq": self.compacted_seq,
             }
         )
 
@@ -58,5 +79,7 @@ class Session:
             system_prompt=data.get("system_prompt", "You are a helpful assistant."),
             setup_phase_data=data.get("setup_phase_data", "{}"),
         )
-        session.history = [Message(**item) for item in data["history"]]
+        session.compacted_seq = int(data.get("compacted_seq", 0))
+        # Legacy blobs still carry the full history until migrated
+        session.history = [Message(**item) for item in data.get("history", [])]
         return session
@@ -222,6 +222,7 @@ class UIEventType(StrEnum):
     TOOL_CALL = "tool_call"
     MESSAGE_BUBBLE = "message_bubble"
     THOUGHT_BUBBLE = "thought_bubble"
+    STREAM_DELTA = "stream_delta"
     DICE_ROLL = "dice_roll"
     CHOICES = "choices"
     RAG_CONTEXT = "rag_context"
@@ -2,7 +2,8 @@
 Formula Evaluation Engine
 =========================
 Safe evaluation of mathematical formulas for derived stats and constraints.
-Uses simpleeval for sandboxed execution.
+Formulas are compiled once (whitelisted AST -> code object) and cached; path
+references become identifier slots at compile time.
 
 Supports:
 - Arithmetic: +, -, *, /, //, %
@@ -11,13 +12,15 @@ Supports:
 - Aliases: str_mod, proficiency (pre-resolved before evaluation)
 """
 
+import ast
+import functools
 import logging
 import math
+import operator
 import re
+from collections.abc import Mapping, Sequence
 from typing import Any
 
-from simpleeval import simple_eval
-
 logger = logging.getLogger(__name__)
 
 
@@ -34,13 +37,103 @@ SAFE_FUNCTIONS = {
     "round": round,
 }
 
+FORMULA_CACHE_SIZE = 4096
+MAX_POWER = 4_000_000  # Same guard as simpleeval: refuse absurd exponents
+
+_DOTTED_PATH_RE = re.compile(r"\b[A-Za-z_][A-Za-z0-9_]*(?:\.[A-Za-z_][A-Za-z0-9_]*)+\b")
+
+
+# =============================================================================
+# FORMULA COMPILATION
+# =============================================================================
+
+
+def _safe_pow(base: float, exponent: float) -> float:
+    if abs(exponent) > MAX_POWER:
+        raise ValueError(f"Exponent {exponent} is too large")
+    return operator.pow(base, exponent)
+
+
+_ALLOWED_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.BoolOp, ast.Compare, ast.IfExp,
+    ast.Call, ast.Name, ast.Load, ast.Constant,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow,
+    ast.UAdd, ast.USub, ast.Not, ast.And, ast.Or,
+    ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE,
+)
+
+
+class _PowToCall(ast.NodeTransformer):
+    def visit_BinOp(self, node: ast.BinOp) -> ast.AST:
+        self.generic_visit(node)
+        if isinstance(node.op, ast.Pow):
+            return ast.copy_location(
+                ast.Call(func=ast.Name(id="__pow", ctx=ast.Load()), args=[node.left, node.right], keywords=[]),
+                node,
+            )
+        return node
+
+
+class CompiledFormula:
+    """
+    A formula parsed and checked once. `slots` are the identifiers it reads
+    (paths already converted, e.g. "attributes.str" -> "attributes_str").
+    """
+
+    __slots__ = ("_code", "formula", "slots")
+
+    def __init__(self, formula: str):
+        self.formula = formula
+        prepared = _DOTTED_PATH_RE.sub(lambda m: path_to_identifier(m.group(0)), formula)
+        tree = ast.parse(prepared, mode="eval")
+
+        names: list[ast.Name] = []
+        for node in ast.walk(tree):
+            if not isinstance(node, _ALLOWED_NODES):
+                raise ValueError(f"Unsupported syntax: {type(node).__name__}")
+            if isinstance(node, ast.Constant) and not isinstance(node.value, int | float):
+                raise ValueError(f"Unsupported constant: {node.value!r}")
+            if isinstance(node, ast.Call):
+                if not isinstance(node.func, ast.Name) or node.func.id not in SAFE_FUNCTIONS or node.keywords:
+                    raise ValueError("Only calls to safe functions are allowed")
+            elif isinstance(node, ast.Name) and node.id not in SAFE_FUNCTIONS:
+                names.append(node)
+
+        # Slots in source order, so positional evaluation follows the formula text
+        names.sort(key=lambda n: n.col_offset)
+        slots = list(dict.fromkeys(n.id for n in names))
+
+        tree = ast.fix_missing_locations(_PowToCall().visit(tree))
+        self._code = compile(tree, "<formula>", "eval")
+        self.slots = tuple(slots)
+
+    def __call__(self, values: Mapping[str, Any]) -> float:
+        """Evaluate against identifier -> value. Raises on missing names or math errors."""
+        names: dict[str, Any] = {slot: values[slot] for slot in self.slots}
+        names.update(SAFE_FUNCTIONS)
+        names["__pow"] = _safe_pow
+        result = eval(self._code, {"__builtins__": {}}, names)
+        if isinstance(result, bool):
+            return 1.0 if result else 0.0
+        return float(result)
+
+    def evaluate_slots(self, values: Sequence[float]) -> float:
+        """Evaluate with values given positionally, in `slots` order."""
+        return self(dict(zip(self.slots, values, strict=True)))
+
+
+@functools.lru_cache(maxsize=FORMULA_CACHE_SIZE)
+def compile_formula(formula: str) -> CompiledFormula:
+    """Compile (and cache) a formula. Raises ValueError/SyntaxError if it is not allowed."""
+    return CompiledFormula(formula)
+
 
 # =============================================================================
 # FORMULA EVALUATION
 # =============================================================================
 
 
-def _path_to_identifier(path: str) -> str:
+def path_to_identifier(path: str) -> str:
     """
     Convert a dot-path to a valid Python identifier.
 
@@ -51,27 +144,38 @@ def _path_to_identifier(path: str) -> str:
     return path.replace(".", "_").replace("-", "_")
 
 
-def _prepare_formula(formula: str, context_keys: set) -> str:
+def flatten_into(context: dict[str, Any], obj: Any, prefix: str = ""):
     """
-    Prepare a formula for evaluation by replacing paths with identifiers.
-
-    Only replaces paths that exist in the context to avoid breaking
-    function names or other valid identifiers.
+    Flatten a (nested) value into a formula context, under both path and identifier keys.
+    Numbers, bools and numeric strings become floats; lists contribute their length.
     """
-    result = formula
-
-    # Sort by length (longest first) to avoid partial replacements
-    sorted_keys = sorted(context_keys, key=len, reverse=True)
-
-    for key in sorted_keys:
-        if "." in key:
-            # This is a path, replace with identifier
-            identifier = _path_to_identifier(key)
-            # Use word boundaries to avoid partial matches
-            pattern = re.escape(key)
-            result = re.sub(rf'\b{pattern}\b', identifier, result)
-
-    return result
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            new_key = f"{prefix}.{key}" if prefix else key
+            flatten_into(context, value, new_key)
+    elif isinstance(obj, int | float):
+        # Store with both path and identifier forms
+        identifier = path_to_identifier(prefix)
+        context[prefix] = float(obj)
+        context[identifier] = float(obj)
+    elif isinstance(obj, bool):
+        identifier = path_to_identifier(prefix)
+        context[prefix] = 1.0 if obj else 0.0
+        context[identifier] = 1.0 if obj else 0.0
+    elif isinstance(obj, str):
+        # Try to parse as number
+        try:
+            val = float(obj)
+            identifier = path_to_identifier(prefix)
+            context[prefix] = val
+            context[identifier] = val
+        except ValueError:
+            pass
+    elif isinstance(obj, list):
+        # Store list length
+        identifier = path_to_identifier(prefix)
+        context[f"{prefix}.length"] = float(len(obj))
+        context[f"{identifier}_length"] = float(len(obj))
 
 
 def build_formula_context(
@@ -95,42 +199,13 @@ def build_formula_context(
     context: dict[str, float] = {}
 
     # 1. Flatten entity values
-    def flatten(obj: Any, prefix: str = ""):
-        if isinstance(obj, dict):
-            for key, value in obj.items():
-                new_key = f"{prefix}.{key}" if prefix else key
-                flatten(value, new_key)
-        elif isinstance(obj, int | float):
-            # Store with both path and identifier forms
-            identifier = _path_to_identifier(prefix)
-            context[prefix] = float(obj)
-            context[identifier] = float(obj)
-        elif isinstance(obj, bool):
-            identifier = _path_to_identifier(prefix)
-            context[prefix] = 1.0 if obj else 0.0
-            context[identifier] = 1.0 if obj else 0.0
-        elif isinstance(obj, str):
-            # Try to parse as number
-            try:
-                val = float(obj)
-                identifier = _path_to_identifier(prefix)
-                context[prefix] = val
-                context[identifier] = val
-            except ValueError:
-                pass
-        elif isinstance(obj, list):
-            # Store list length
-            identifier = _path_to_identifier(prefix)
-            context[f"{prefix}.length"] = float(len(obj))
-            context[f"{identifier}_length"] = float(len(obj))
-
-    flatten(entity)
+    flatten_into(context, entity)
 
     # 2. Add extra values
     if extra_values:
         for key, value in extra_values.items():
             if isinstance(value, int | float):
-                identifier = _path_to_identifier(key)
+                identifier = path_to_identifier(key)
                 context[key] = float(value)
                 context[identifier] = float(value)
 
@@ -182,34 +257,29 @@ def evaluate(
         return default
 
     try:
-        # Prepare formula (replace paths with identifiers)
-        prepared = _prepare_formula(formula, set(context.keys()))
-
-        # Build evaluation context
-        eval_context = {}
-        for key, value in context.items():
-            identifier = _path_to_identifier(key)
+        compiled = compile_formula(formula)
+        names: dict[str, float] = {}
+        for slot in compiled.slots:
+            value = context[slot] if slot in context else _lookup_dotted(context, slot)
             try:
-                eval_context[identifier] = float(value) if value is not None else 0.0
+                names[slot] = float(value) if value is not None else 0.0
             except (ValueError, TypeError):
-                eval_context[identifier] = 0.0
-
-        # Add safe functions
-        eval_context.update(SAFE_FUNCTIONS)  # type: ignore[arg-type]
-
-        # Evaluate
-        result = simple_eval(prepared, names=eval_context)
-
-        # Ensure numeric result
-        if isinstance(result, bool):
-            return 1.0 if result else 0.0
-        return float(result)
+                names[slot] = 0.0
+        return compiled(names)
 
     except Exception as e:
         logger.debug(f"Formula evaluation failed for '{formula}': {e}")
         return default
 
 
+def _lookup_dotted(context: dict[str, Any], identifier: str) -> Any:
+    """Slow path for contexts that only carry dotted keys (e.g. {"attributes.str": 16})."""
+    for key, value in context.items():
+        if path_to_identifier(key) == identifier:
+            return value
+    raise KeyError(identifier)
+
+
 def evaluate_int(
     formula: str,
     context: dict[str, Any],
@@ -256,15 +326,14 @@ def validate_formula(formula: str, available_paths: set) -> str | None:
         if re.search(pattern, formula, re.IGNORECASE):
             return f"Formula contains forbidden pattern: {pattern}"
 
-    # Try to parse (will catch syntax errors)
+    # Try to compile and run (will catch syntax errors and unknown paths)
     try:
-        # Create dummy context with all paths set to 1
-        dummy_context = {path: 1.0 for path in available_paths}
-        dummy_context.update({_path_to_identifier(p): 1.0 for p in available_paths})
-        dummy_context.update(SAFE_FUNCTIONS)  # type: ignore[arg-type]
-
-        prepared = _prepare_formula(formula, set(dummy_context.keys()))
-        simple_eval(prepared, names=dummy_context)
+        compiled = compile_formula(formula)
+        known = {path_to_identifier(p) for p in available_paths}
+        unknown = [slot for slot in compiled.slots if slot not in known]
+        if unknown:
+            raise NameError(f"'{unknown[0]}' is not defined")
+        compiled(dict.fromkeys(compiled.slots, 1.0))
 
     except Exception as e:
         return f"Formula syntax error: {e}"
@@ -118,6 +118,41 @@ class RuleDef:
         )
 
 
+class _ManifestIndex:
+    """Lookup tables and prompt strings derived from a manifest's fields and engine."""
+
+    def __init__(self, fields: list[FieldDef], engine: EngineConfig):
+        self.fingerprint = _index_fingerprint(fields, engine)
+        # Pin the containers so their ids cannot be reused while this index is alive
+        self._sources = (fields, engine)
+
+        self.by_path: dict[str, FieldDef] = {}
+        self.by_category: dict[str, list[FieldDef]] = {}
+        for f in fields:
+            self.by_path.setdefault(f.path, f)  # First definition wins, as with the old linear scan
+            self.by_category.setdefault(f.category, []).append(f)
+        self.categories = sorted(self.by_category)
+
+        self.path_hints = self._build_path_hints()
+        self.engine_table = engine.to_markdown_table()
+
+    def _build_path_hints(self) -> str:
+        lines = ["## VALID PATHS"]
+        for category in self.categories:
+            lines.append(f"\n**{category.title()}:**")
+            for f in self.by_category[category]:
+                prefab = PREFABS.get(f.prefab)
+                hint = prefab.ai_hint if prefab else ""
+                suffix = ".current" if f.prefab == PrefabID.RES_POOL else ""
+                lines.append(f"  `{f.path}{suffix}` - {f.label} ({hint})")
+        return "\n".join(lines)
+
+
+def _index_fingerprint(fields: list[FieldDef], engine: EngineConfig) -> tuple:
+    # Identity-based: manifests are replaced rather than edited in place
+    return (id(fields), len(fields), id(engine))
+
+
 @dataclass
 class SystemManifest:
     id: str
@@ -127,32 +162,28 @@ class SystemManifest:
     fields: list[FieldDef] = field(default_factory=list)
     aliases: dict[str, str] = field(default_factory=dict)
     rules: list[RuleDef] = field(default_factory=list)  # RAG Knowledge Base
+    _index: _ManifestIndex | None = field(default=None, init=False, repr=False, compare=False)
+
+    @property
+    def index(self) -> _ManifestIndex:
+        """Path/category indexes and prompt strings, rebuilt if `fields` or `engine` is replaced."""
+        index = self._index
+        if index is None or index.fingerprint != _index_fingerprint(self.fields, self.engine):
+            index = _ManifestIndex(self.fields, self.engine)
+            self._index = index
+        return index
 
     def get_field(self, path: str) -> FieldDef | None:
-        for f in self.fields:
-            if f.path == path:
-                return f
-        return None
+        return self.index.by_path.get(path)
 
     def get_fields_by_category(self, category: str) -> list[FieldDef]:
-        return [f for f in self.fields if f.category == category]
+        return list(self.index.by_category.get(category, ()))
 
     def get_categories(self) -> list[str]:
-        return sorted(set(f.category for f in self.fields))
+        return list(self.index.categories)
 
     def get_path_hints(self) -> str:
-        lines = ["## VALID PATHS"]
-        for category in self.get_categories():
-            fields = self.get_fields_by_category(category)
-            if not fields:
-                continue
-            lines.append(f"\n**{category.title()}:**")
-            for f in fields:
-                prefab = PREFABS.get(f.prefab)
-                hint = prefab.ai_hint if prefab else ""
-                suffix = ".current" if f.prefab == PrefabID.RES_POOL else ""
-                lines.append(f"  `{f.path}{suffix}` - {f.label} ({hint})")
-        return "\n".join(lines)
+        return self.index.path_hints
 
     def get_procedure(self, mode: str) -> str | None:
         return self.procedures.get(mode.lower())
@@ -160,7 +191,7 @@ class SystemManifest:
 
     def get_engine_table(self) -> str:
         """Returns the engine configuration formatted as a Markdown table."""
-        return self.engine.to_markdown_table()
+        return self.index.engine_table
 
     def to_dict(self) -> dict[str, Any]:
         return {
@@ -4,22 +4,31 @@ Entity Validation Pipeline
 Centralized logic for enforcing SystemManifest rules on Entity state.
 
 Pipeline Steps:
-1.  **Context Build:** Flatten entity data for formula evaluation.
-2.  **Aliases:** Compute system aliases (e.g., "str_mod").
-3.  **Derived Stats:** Calculate fields with `formula` (e.g., AC, Initiative).
-4.  **Dynamic Limits:** Calculate `max_formula` for pools (e.g., Max HP).
-5.  **Prefab Constraints:** Enforce bounds (min/max) and shape (current <= max).
+1.  **Plan:** Compile (once per manifest) a dependency graph of aliases, derived
+    stats (`formula`) and dynamic limits (`max_formula`) in topological order.
+2.  **Formulas:** Evaluate the nodes affected by the changed paths, in order,
+    reading only the entity values they reference (e.g. "str_mod", AC, Max HP).
+3.  **Prefab Constraints:** Enforce bounds (min/max) and shape (current <= max)
+    on the fields that changed.
+
+Without `changed_paths` every node and field is processed (full validation).
+The input entity is never mutated; containers are copied only where written.
 
 Usage:
     entity, changes = validate_entity(entity, manifest)
+    entity, changes = validate_entity(entity, manifest, changed_paths={"resources.hp.current"})
 """
 
 import copy
 import logging
+import re
+from collections import defaultdict
+from collections.abc import Iterable
+from dataclasses import dataclass
 from typing import Any
 
-from app.prefabs.formula import build_formula_context, evaluate, evaluate_int
-from app.prefabs.manifest import SystemManifest
+from app.prefabs.formula import SAFE_FUNCTIONS, evaluate, evaluate_int, extract_path_references, flatten_into, path_to_identifier
+from app.prefabs.manifest import FieldDef, SystemManifest
 from app.prefabs.registry import PREFABS
 
 logger = logging.getLogger(__name__)
@@ -89,20 +98,257 @@ def set_path(data: dict, path: str, value: Any) -> bool:
             return True
     return False
 
+# =============================================================================
+# VALIDATION PLAN
+# =============================================================================
+
+_IDENTIFIER_RE = re.compile(r"\b[A-Za-z_][A-Za-z0-9_]*(?:\.[A-Za-z_][A-Za-z0-9_]*)*\b")
+
+
+def _overlaps(a: str, b: str) -> bool:
+    """True if one path equals or contains the other (e.g. 'attributes.str' / 'attributes.str.score')."""
+    return a == b or a.startswith(b + ".") or b.startswith(a + ".")
+
+
+class _PathIndex:
+    """Maps paths to item ids so overlap lookups do not scan every entry."""
+
+    def __init__(self):
+        self._exact: dict[str, set[int]] = defaultdict(set)
+        self._under: dict[str, set[int]] = defaultdict(set)  # items at or below a prefix
+
+    def add(self, path: str, item: int):
+        self._exact[path].add(item)
+        parts = path.split(".")
+        for i in range(1, len(parts) + 1):
+            self._under[".".join(parts[:i])].add(item)
+
+    def overlapping(self, path: str) -> set[int]:
+        """Items whose path equals, contains, or is contained by `path`."""
+        result = set(self._under.get(path, ()))
+        parts = path.split(".")
+        for i in range(1, len(parts)):
+            result |= self._exact.get(".".join(parts[:i]), set())
+        return result
+
+
+@dataclass
+class _FormulaNode:
+    kind: str  # "alias" | "derived" | "max"
+    output: str  # alias name, field path, or "<pool path>.max"
+    formula: str
+    field: FieldDef | None
+    path_refs: tuple[str, ...]
+    alias_refs: tuple[str, ...]
+
+
+class ValidationPlan:
+    """
+    Compiled, dependency-ordered view of a manifest's formulas.
+    Built once per manifest (see `get_validation_plan`) and reused for every validation.
+    """
+
+    def __init__(self, manifest: SystemManifest):
+        self.fingerprint = _manifest_fingerprint(manifest)
+        self._sources = (manifest.fields, manifest.aliases)
+        self.fields = list(manifest.fields)
+
+        identifier_paths = {path_to_identifier(f.path): f.path for f in self.fields}
+        aliases = manifest.aliases or {}
+
+        def node(kind: str, output: str, formula: str, field_def: FieldDef | None) -> _FormulaNode:
+            path_refs = set(extract_path_references(formula))
+            alias_refs = set()
+            for token in _IDENTIFIER_RE.findall(formula):
+                if "." in token or token in SAFE_FUNCTIONS:
+                    continue
+                if token in aliases:
+                    alias_refs.add(token)
+                elif token.endswith("_length") and token[: -len("_length")] in identifier_paths:
+                    path_refs.add(f"{identifier_paths[token[: -len('_length')]]}.length")
+                else:
+                    # Identifier form of a known path, or a top-level entity key
+                    path_refs.add(identifier_paths.get(token, token))
+            return _FormulaNode(kind, output, formula, field_def, tuple(sorted(path_refs)), tuple(sorted(alias_refs)))
+
+        # Original phase order (aliases, derived, limits) is the tie-break for the topological sort
+        nodes = [node("alias", name, formula, None) for name, formula in aliases.items()]
+        nodes += [node("derived", f.path, f.formula, f) for f in self.fields if f.formula]
+        nodes += [node("max", f"{f.path}.max", f.max_formula, f) for f in self.fields if f.prefab == "RES_POOL" and f.max_formula]
+
+        self.nodes = self._topological_order(nodes)
+        self.aliases = {n.output: n for n in self.nodes if n.kind == "alias"}
+
+        # Lookup tables for incremental validation: which nodes/fields a changed path touches
+        self.node_index = _PathIndex()
+        self.alias_readers: dict[str, set[int]] = defaultdict(set)
+        for i, n in enumerate(self.nodes):
+            for ref in n.path_refs:
+                self.node_index.add(ref, i)
+            for alias in n.alias_refs:
+                self.alias_readers[alias].add(i)
+            if n.kind != "alias":
+                # A directly written read-only output is recomputed
+                self.node_index.add(n.output, i)
+
+        self.field_index = _PathIndex()
+        for i, f in enumerate(self.fields):
+            self.field_index.add(f.path, i)
+
+    @staticmethod
+    def _topological_order(nodes: list[_FormulaNode]) -> list[_FormulaNode]:
+        dependents: dict[int, list[int]] = {i: [] for i in range(len(nodes))}
+        indegree = [0] * len(nodes)
+        alias_index = {n.output: i for i, n in enumerate(nodes) if n.kind == "alias"}
+
+        for i, n in enumerate(nodes):
+            deps = {alias_index[a] for a in n.alias_refs if a in alias_index}
+            for j, m in enumerate(nodes):
+                if m.kind != "alias" and j != i and any(_overlaps(m.output, ref) for ref in n.path_refs):
+                    deps.add(j)
+            deps.discard(i)
+            for j in deps:
+                dependents[j].append(i)
+            indegree[i] = len(deps)
+
+        ready = [i for i in range(len(nodes)) if indegree[i] == 0]
+        order: list[int] = []
+        while ready:
+            i = min(ready)
+            ready.remove(i)
+            order.append(i)
+            for j in dependents[i]:
+                indegree[j] -= 1
+                if indegree[j] == 0:
+                    ready.append(j)
+
+        if len(order) < len(nodes):
+            cyclic = [i for i in range(len(nodes)) if i not in set(order)]
+            logger.warning(f"Formula dependency cycle among: {[nodes[i].output for i in cyclic]}")
+            order.extend(cyclic)
+
+        return [nodes[i] for i in order]
+
+
+def _manifest_fingerprint(manifest: SystemManifest) -> tuple:
+    # Identity-based: manifests are rebuilt (not edited in place) when their definition changes.
+    # The plan keeps references to both containers, so their ids cannot be recycled.
+    return (id(manifest.fields), len(manifest.fields), id(manifest.aliases), len(manifest.aliases or {}))
+
+
+def get_validation_plan(manifest: SystemManifest) -> ValidationPlan:
+    """Returns the cached plan for a manifest, recompiling it if the manifest's formulas changed."""
+    plan: ValidationPlan | None = getattr(manifest, "_validation_plan", None)
+    if plan is None or plan.fingerprint != _manifest_fingerprint(manifest):
+        plan = ValidationPlan(manifest)
+        manifest._validation_plan = plan  # type: ignore[attr-defined]
+    return plan
+
+
+class _CopyOnWrite:
+    """Shallow-copies containers along a path the first time it is written, leaving the input untouched."""
+
+    def __init__(self, entity: dict[str, Any]):
+        self.root = dict(entity)
+        self._owned = {id(self.root)}
+
+    def _own(self, value: Any) -> Any:
+        if id(value) in self._owned or not isinstance(value, dict | list):
+            return value
+        value = dict(value) if isinstance(value, dict) else list(value)
+        self._owned.add(id(value))
+        return value
+
+    def set(self, path: str, value: Any) -> bool:
+        """Same semantics as `set_path`."""
+        if not path:
+            return False
+        keys = path.split(".")
+        current: Any = self.root
+        for i, key in enumerate(keys[:-1]):
+            next_key = keys[i + 1]
+            if isinstance(current, dict):
+                if key not in current:
+                    child: Any = [] if next_key.isdigit() else {}
+                    self._owned.add(id(child))
+                else:
+                    child = self._own(current[key])
+                current[key] = child
+                current = child
+            elif isinstance(current, list) and key.isdigit():
+                idx = int(key)
+                if not 0 <= idx < len(current):
+                    return False
+                current[idx] = self._own(current[idx])
+                current = current[idx]
+            else:
+                return False
+
+        last_key = keys[-1]
+        if isinstance(current, dict):
+            current[last_key] = value
+            return True
+        if isinstance(current, list) and last_key.isdigit():
+            idx = int(last_key)
+            if 0 <= idx < len(current):
+                current[idx] = value
+                return True
+        return False
+
+
+class _LazyContext:
+    """Formula context holding only the values referenced by evaluated nodes."""
+
+    def __init__(self, plan: ValidationPlan, entity: dict[str, Any]):
+        self.plan = plan
+        self.entity = entity
+        self.values: dict[str, Any] = {}
+        self._loaded: set[str] = set()
+
+    def _load_path(self, ref: str):
+        if ref in self._loaded:
+            return
+        self._loaded.add(ref)
+        value = get_path(self.entity, ref)
+        if value is None and ref.endswith(".length"):
+            ref, value = ref[: -len(".length")], get_path(self.entity, ref[: -len(".length")])
+        if value is not None:
+            flatten_into(self.values, value, ref)
+
+    def prepare(self, n: _FormulaNode):
+        for ref in n.path_refs:
+            self._load_path(ref)
+        for alias in n.alias_refs:
+            if alias not in self.values:
+                # Unaffected alias: its inputs did not change, compute it once on demand
+                self.evaluate_alias(self.plan.aliases[alias])
+
+    def evaluate_alias(self, n: _FormulaNode):
+        self.prepare(n)
+        self.values[n.output] = evaluate(n.formula, self.values)
+
+    def update(self, path: str, value: Any):
+        flatten_into(self.values, value, path)
+
+
 # =============================================================================
 # MAIN PIPELINE
 # =============================================================================
 
 def validate_entity(
     entity: dict[str, Any],
-    manifest: SystemManifest | None
+    manifest: SystemManifest | None,
+    changed_paths: Iterable[str] | None = None,
 ) -> tuple[dict[str, Any], list[str]]:
     """
-    Run the full validation pipeline on an entity.
+    Run the validation pipeline on an entity.
 
     Args:
-        entity: The entity state dictionary
+        entity: The entity state dictionary (not mutated)
         manifest: The system manifest (rules)
+        changed_paths: Paths modified since the entity was last validated. Only formulas
+            downstream of them are re-evaluated and only affected fields are clamped.
+            None runs the full pipeline (new or untrusted entities).
 
     Returns:
         (validated_entity, list_of_change_logs)
@@ -110,67 +356,78 @@ def validate_entity(
     if not manifest:
         return entity, []
 
-    # Work on a copy to avoid partial mutation state issues
-    # (Though in tools we often want mutation; for safety we copy here)
-    # Optimization: In a tight loop, we might skip deepcopy, but for RPG turns it's fine.
-    validated = copy.deepcopy(entity)
-    changes = []
+    plan = get_validation_plan(manifest)
+    cow = _CopyOnWrite(entity)
+    validated = cow.root
+    changes: list[str] = []
 
-    # --- PHASE 1: BUILD CONTEXT & RESOLVE ALIASES ---
-    # We need a flat context for math (e.g. {"attributes_str": 18})
-    # We also compute global aliases (e.g. {"str_mod": 4})
-    context = build_formula_context(validated, aliases=manifest.aliases)
+    full = changed_paths is None
+    pending_nodes: set[int] = set()
+    dirty_fields: set[int] = set()
+    context = _LazyContext(plan, validated)
 
-    # --- PHASE 2: COMPUTE DERIVED FIELDS (Formulas) ---
-    # Fields that have a 'formula' are read-only derived values.
-    # e.g. AC = 10 + dex_mod
+    def mark_dirty(path: str):
+        pending_nodes.update(plan.node_index.overlapping(path))
+        dirty_fields.update(plan.field_index.overlapping(path))
 
-    for field in manifest.fields:
-        if field.formula:
-            old_val = get_path(validated, field.path)
+    for path in changed_paths or ():
+        mark_dirty(path)
+
+    # --- PHASE 1: FORMULAS (aliases, derived stats, dynamic limits) in dependency order ---
+    # Dependents always come later in the plan, so marking them while iterating is enough.
+    for i, n in enumerate(plan.nodes):
+        if not full and i not in pending_nodes:
+            continue
 
-            # Evaluate formula
-            # Note: We rely on the context having aliases from Phase 1
-            new_val = evaluate(field.formula, context)
+        if n.kind == "alias":
+            old = context.values.get(n.output)
+            context.evaluate_alias(n)
+            if old != context.values[n.output]:
+                pending_nodes.update(plan.alias_readers.get(n.output, ()))
+            continue
+
+        field = n.field
+        if field is None:
+            continue
+        context.prepare(n)
+
+        if n.kind == "derived":
+            # Derived fields are read-only values, e.g. AC = 10 + dex_mod
+            old_val = get_path(validated, field.path)
+            new_val: Any = evaluate(n.formula, context.values)
 
             # Type coercion based on prefab (mostly Ints for derived stats)
             if field.prefab.startswith("VAL_INT") or field.prefab == "RES_COUNTER":
                 new_val = int(new_val)
 
             if old_val != new_val:
-                set_path(validated, field.path, new_val)
-                # Update context for subsequent dependencies
-                context = build_formula_context(validated, aliases=manifest.aliases)
-                # We don't log derived updates to avoid spam, or we log verbose?
-                # changes.append(f"Derived {field.label}: {old_val} -> {new_val}")
-
-    # --- PHASE 3: COMPUTE DYNAMIC LIMITS (Max Formulas) ---
-    # Fields like HP often have a calculated Max.
-    # e.g. HP Max = 10 + con_mod
-
-    for field in manifest.fields:
-        if field.prefab == "RES_POOL" and field.max_formula:
+                cow.set(field.path, new_val)
+                context.update(field.path, new_val)
+                mark_dirty(field.path)
+        else:
+            # Pools with a calculated Max, e.g. HP Max = 10 + con_mod
             pool = get_path(validated, field.path)
             if not isinstance(pool, dict):
                 # Auto-repair bad shape
                 pool = {"current": 0, "max": 0}
-                set_path(validated, field.path, pool)
+                cow.set(field.path, pool)
+                mark_dirty(field.path)
 
             old_max = pool.get("max", 0)
-            new_max = evaluate_int(field.max_formula, context)
+            new_max = evaluate_int(n.formula, context.values)
 
             if old_max != new_max:
-                pool["max"] = new_max
+                cow.set(f"{field.path}.max", new_max)
+                context.update(f"{field.path}.max", new_max)
+                mark_dirty(f"{field.path}.max")
                 changes.append(f"Updated {field.label} Max: {old_max} -> {new_max}")
-                # Note: We don't write back to 'validated' yet, 'pool' is a reference
-                # (if it was a dict in the original structure).
-                # To be safe with deepcopy/get_path:
-                set_path(validated, field.path, pool)
 
-    # --- PHASE 4: PREFAB VALIDATION (Clamping) ---
+    # --- PHASE 2: PREFAB VALIDATION (Clamping) ---
     # Enforce bounds (min/max), track lengths, pool integrity (cur <= max).
 
-    for field in manifest.fields:
+    field_ids = range(len(plan.fields)) if full else sorted(dirty_fields)
+    for i in field_ids:
+        field = plan.fields[i]
         prefab_def = PREFABS.get(field.prefab)
         if not prefab_def:
             continue
@@ -180,17 +437,16 @@ def validate_entity(
         # If value is missing, insert default
         if current_val is None:
             default_val = prefab_def.get_default(field.config)
-            set_path(validated, field.path, default_val)
+            cow.set(field.path, default_val)
             current_val = default_val
-            # changes.append(f"Initialized {field.label}")
 
-        # Run Prefab Validator
+        # Run Prefab Validator on a private copy (some validators normalize items in place)
         # This handles: HP > Max -> Clamp;  Stat > 20 -> Clamp;
-        corrected_val = prefab_def.validate(current_val, field.config)
+        corrected_val = prefab_def.validate(copy.deepcopy(current_val), field.config)
 
         # Check for change
         if corrected_val != current_val:
-            set_path(validated, field.path, corrected_val)
+            cow.set(field.path, corrected_val)
 
             # Format nice log message
             msg = f"{field.label}: "
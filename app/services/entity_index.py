@@ -16,27 +16,31 @@ INDEX_ENTITY_TYPE = "index"
 INDEX_ENTITY_KEY = "world_index"
 
 
-def _ensure_index(session_id: int, db) -> dict:
-    """Load or create the world index with all expected keys."""
-    index = get_entity(session_id, db, INDEX_ENTITY_TYPE, INDEX_ENTITY_KEY)
-    if index:
-        return index
-
-    # Initialize with fixed + dynamic keys
+def _empty_index() -> dict:
+    # Fixed + dynamic keys
     index = {
         "locations": {},
         "npcs": {},
     }
     for kind in MemoryKind:
         index[kind.value] = []
+    return index
+
+
+def _ensure_index(session_id: int, db) -> dict:
+    """Load or create the world index with all expected keys."""
+    index = get_entity(session_id, db, INDEX_ENTITY_TYPE, INDEX_ENTITY_KEY)
+    if index:
+        return index
 
+    index = _empty_index()
     set_entity(session_id, db, INDEX_ENTITY_TYPE, INDEX_ENTITY_KEY, index)
     return index
 
 
 def get_index(session_id: int, db) -> dict:
-    """Read the current world index."""
-    return _ensure_index(session_id, db)
+    """Read the current world index. Never writes, so context building leaves state untouched."""
+    return get_entity(session_id, db, INDEX_ENTITY_TYPE, INDEX_ENTITY_KEY) or _empty_index()
 
 
 def _save_index(session_id: int, db, index: dict):
@@ -62,6 +62,7 @@ class GameSetupService:
             prompt_id=prompt.id,
             setup_phase_data=json.dumps(setup_snapshot),
         )
+        self.db.messages.append(game_session.id, clean_session.history)
 
         # 1. Resolve Manifest
         manifest = None
@@ -130,26 +131,21 @@ class GameSetupService:
         # 4. Index Rules (RAG) - THE RESTORED LOGIC
         if manifest.rules:
             logger.info(f"Indexing {len(manifest.rules)} rules into Vector Store...")
-            for rule in manifest.rules:
-                mem = self.db.memories.create(
+            rule_mems = [
+                self.db.memories.create(
                     session_id=game_session.id,
                     kind=MemoryKind.RULE,
                     content=f"{rule.name}: {rule.content}",
                     tags=[*rule.tags, "system_rule"],
                     priority=3,
                 )
-                if self.vs:
-                    try:
-                        self.vs.upsert_memory(
-                            session_id=game_session.id,
-                            memory_id=mem.id,
-                            text=mem.content,
-                            kind=mem.kind,
-                            tags=mem.tags_list(),
-                            priority=mem.priority,
-                        )
-                    except Exception as e:
-                        logger.warning(f"VS Indexing failed for rule {mem.id}: {e}")
+                for rule in manifest.rules
+            ]
+            if self.vs:
+                try:
+                    self.vs.upsert_memories_bulk(game_session.id, self._memory_index_items(rule_mems))
+                except Exception as e:
+                    logger.warning(f"VS Indexing failed for rules: {e}")
 
         # 5. World
         self._apply_world_extraction(game_session.id, world_data, manifest_db_id)
@@ -158,6 +154,20 @@ class GameSetupService:
         self.db.sessions.update(game_session)
         return cast(GameSession, game_session)
 
+    @staticmethod
+    def _memory_index_items(memories) -> list[dict[str, Any]]:
+        """Shapes Memory rows for VectorStore.upsert_memories_bulk."""
+        return [
+            {
+                "memory_id": m.id,
+                "text": m.content,
+                "kind": m.kind,
+                "tags": m.tags_list(),
+                "priority": m.priority,
+            }
+            for m in memories
+        ]
+
     def _map_legacy_char_data(self, char_data) -> dict[str, Any]:
         values: dict[str, Any] = {
             CategoryName.IDENTITY: {"name": getattr(char_data, "name", "Player")},
@@ -209,6 +219,7 @@ class GameSetupService:
             scene["members"].append(f"{EntityType.CHARACTER}:{key}")
         set_entity(session_id, self.db, EntityType.SCENE, EntityKey.ACTIVE_SCENE, scene)
 
+        lore_mems = []
         for mem in world_data.lore:
             try:
                 # Prepend name to content for better RAG context (matches Rule pattern)
@@ -222,26 +233,18 @@ class GameSetupService:
                     else:
                         tags.append(mem.name)
 
-                created_mem = self.db.memories.create(
+                lore_mems.append(self.db.memories.create(
                     session_id, mem.kind, full_content, mem.priority, tags
-                )
-
-                # Index in Vector Store for RAG
-                if self.vs:
-                    try:
-                        self.vs.upsert_memory(
-                            session_id=session_id,
-                            memory_id=created_mem.id,
-                            text=created_mem.content,
-                            kind=created_mem.kind,
-                            tags=created_mem.tags_list(),
-                            priority=created_mem.priority,
-                        )
-                    except Exception as e:
-                        logger.warning(f"VS Indexing failed for lore {created_mem.id}: {e}")
+                ))
+            except Exception as e:
+                logger.error(f"Failed to create lore memory {mem.name}: {e}")
 
+        # Index in Vector Store for RAG (single batched embedding pass)
+        if self.vs and lore_mems:
+            try:
+                self.vs.upsert_memories_bulk(session_id, self._memory_index_items(lore_mems))
             except Exception as e:
-                logger.error(f"Failed to create/index lore memory {mem.name}: {e}")
+                logger.warning(f"VS Indexing failed for lore: {e}")
 
         # 6. Seed Entity Index
         from app.services.entity_index import _ensure_index, add_location, add_memory, add_npc
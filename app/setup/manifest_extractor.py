@@ -131,36 +131,24 @@ class ManifestExtractor:
             lines.append(f"- **{pid}**: {prefab.ai_hint}")
         return "\n".join(lines)
 
+    # Invalid JSON is repaired by the connector (it shows the model its output and the
+    # validation error); whatever still fails falls back to an empty/default extraction.
+
     def _extract_mechanics(self, prompt: str) -> MechanicsExtraction:
         messages = [Message(role="user", content=EXTRACT_MECHANICS_PROMPT)]
-        for attempt in range(3):
-            try:
-                return cast(MechanicsExtraction, self.llm.get_structured_response(prompt, messages, MechanicsExtraction, 0.3))
-            except Exception as e:
-
-                logger.warning(f"Mechanics extraction failed (attempt {attempt+1}/3): {e}")
-                if attempt == 2:
-                    return MechanicsExtraction(
-                        system_name="Extracted System",
-                        dice_notation="1d20",
-                        resolution_mechanic="Unknown",
-                        success_condition="Unknown",
-                        crit_rules="None",
-                        fumble_rules="",
-                        aliases={},
-                    )
-                messages.append(Message(role="assistant", content="I provided an invalid JSON response."))
-                messages.append(Message(role="user", content=f"Validation failed: {e}. Please fix the errors and try again. Provide ONLY valid JSON."))
-
-        return MechanicsExtraction(
-            system_name="Extracted System",
-            dice_notation="1d20",
-            resolution_mechanic="Unknown",
-            success_condition="Unknown",
-            crit_rules="None",
-            fumble_rules="",
-            aliases={},
-        )
+        try:
+            return cast(MechanicsExtraction, self.llm.get_structured_response(prompt, messages, MechanicsExtraction, 0.3))
+        except Exception as e:
+            logger.warning(f"Mechanics extraction failed: {e}")
+            return MechanicsExtraction(
+                system_name="Extracted System",
+                dice_notation="1d20",
+                resolution_mechanic="Unknown",
+                success_condition="Unknown",
+                crit_rules="None",
+                fumble_rules="",
+                aliases={},
+            )
 
 
     def _extract_field_group(
@@ -177,58 +165,40 @@ class ManifestExtractor:
         )
         messages = [Message(role="user", content=p)]
 
-        for attempt in range(3):
-            try:
-                result = cast(ExtractedFieldList, self.llm.get_structured_response(prompt, messages, ExtractedFieldList, 0.4))
-                allowed = {str(c) for c in cats}
-                filtered = [f for f in result.fields if str(f.category) in allowed]
+        try:
+            result = cast(ExtractedFieldList, self.llm.get_structured_response(prompt, messages, ExtractedFieldList, 0.4))
+        except Exception as e:
+            logger.warning(f"Field extraction failed for cats {cats}: {e}")
+            return []
 
-                dropped = [f.path for f in result.fields if str(f.category) not in allowed]
-                if dropped:
-                    logger.info(f"Dropped out-of-batch fields for cats {cats}: {dropped}")
+        allowed = {str(c) for c in cats}
+        filtered = [f for f in result.fields if str(f.category) in allowed]
 
-                return filtered
+        dropped = [f.path for f in result.fields if str(f.category) not in allowed]
+        if dropped:
+            logger.info(f"Dropped out-of-batch fields for cats {cats}: {dropped}")
 
-            except Exception as e:
-                logger.warning(f"Field extraction failed for cats {cats} (attempt {attempt+1}/3): {e}")
-                if attempt == 2:
-                    return []
-                messages.append(Message(role="assistant", content="I provided an invalid JSON response."))
-                messages.append(Message(role="user", content=f"Validation failed: {e}. Please fix the errors and try again. Provide ONLY valid JSON."))
-
-        return []
+        return filtered
 
 
     def _extract_procedures(self, prompt: str) -> dict[str, str]:
         messages = [Message(role="user", content=EXTRACT_PROCEDURES_PROMPT)]
-        for attempt in range(3):
-            try:
-                res = cast(ProceduresExtraction, self.llm.get_structured_response(prompt, messages, ProceduresExtraction, 0.5))
-                return res.model_dump()
-            except Exception as e:
-                logger.warning(f"Procedures extraction failed (attempt {attempt+1}/3): {e}")
-                if attempt == 2:
-                    return {}
-                messages.append(Message(role="assistant", content="I provided an invalid JSON response."))
-                messages.append(Message(role="user", content=f"Validation failed: {e}. Please fix the errors and try again. Provide ONLY valid JSON."))
-
-        return {}
+        try:
+            res = cast(ProceduresExtraction, self.llm.get_structured_response(prompt, messages, ProceduresExtraction, 0.5))
+            return res.model_dump()
+        except Exception as e:
+            logger.warning(f"Procedures extraction failed: {e}")
+            return {}
 
 
     def _extract_rules(self, prompt: str) -> list[RuleDef]:
         messages = [Message(role="user", content=EXTRACT_RULES_PROMPT)]
-        for attempt in range(3):
-            try:
-                res = cast(RuleListExtraction, self.llm.get_structured_response(prompt, messages, RuleListExtraction, 0.5))
-                return [RuleDef(name=r.name, content=r.content, tags=r.tags) for r in res.rules]
-            except Exception as e:
-                logger.warning(f"Rule extraction failed (attempt {attempt+1}/3): {e}")
-                if attempt == 2:
-                    return []
-                messages.append(Message(role="assistant", content="I provided an invalid JSON response."))
-                messages.append(Message(role="user", content=f"Validation failed: {e}. Please fix the errors and try again. Provide ONLY valid JSON."))
-
-        return []
+        try:
+            res = cast(RuleListExtraction, self.llm.get_structured_response(prompt, messages, RuleListExtraction, 0.5))
+            return [RuleDef(name=r.name, content=r.content, tags=r.tags) for r in res.rules]
+        except Exception as e:
+            logger.warning(f"Rule extraction failed: {e}")
+            return []
 
 
     def _assemble(self, mech, fields, procs, rules) -> SystemManifest:
@@ -1,11 +1,32 @@
 import logging
+import os
 import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Any
 
 from pydantic import BaseModel
 
+from app.database.db_manager import DBManager
+from app.database.game_state_unit_of_work import GameStateUnitOfWork
 from app.models.vocabulary import UIEventType
-from app.tools.schemas import Note, Roll
+from app.tools.result_encoder import encode_result
+from app.tools.schemas import Note, Roll, is_read_only
+
+_tool_pool: ThreadPoolExecutor | None = None
+_tool_pool_lock = threading.Lock()
+
+
+def _get_tool_pool() -> ThreadPoolExecutor:
+    """Process-wide pool for read-only tool calls, shared by all turns."""
+    global _tool_pool
+    with _tool_pool_lock:
+        if _tool_pool is None:
+            _tool_pool = ThreadPoolExecutor(
+                max_workers=max(1, int(os.environ.get("TOOL_POOL_SIZE", 4))),
+                thread_name_prefix="ToolWorker",
+            )
+        return _tool_pool
 
 
 class ToolExecutor:
@@ -21,12 +42,14 @@ class ToolExecutor:
         vector_store,
         ui_queue: queue.Queue | None = None,
         logger: logging.Logger | None = None,
+        retrieval_engine=None,
     ):
         self.tools = tool_registry
         self.db = db_manager
         self.vs = vector_store
         self.ui_queue = ui_queue
         self.logger = logger or logging.getLogger(__name__)
+        self.retrieval_engine = retrieval_engine
 
     def execute(
         self,
@@ -44,10 +67,67 @@ class ToolExecutor:
         if not tool_calls:
             return results, memory_tool_used
 
+        ctx = self._build_context(session, manifest, current_game_time, extra_context)
+
+        calls = list(tool_calls[:tool_budget])
+        for group in self._plan_groups(calls):
+            for call in group:
+                self._notify_call(call, turn_id)
+            if len(group) > 1:
+                outcomes = self._run_concurrently(group, ctx)
+            else:
+                outcomes = [self._run_call(group[0], ctx)]
+
+            for call, (result, error) in zip(group, outcomes, strict=True):
+                # Check if a memory tool was used (for refreshing context)
+                if self._record_outcome(call, result, error, session, turn_id, results) and isinstance(call, Note):
+                    memory_tool_used = True
+
+        return results, memory_tool_used
+
+    def start(
+        self,
+        tool_call: BaseModel,
+        session,
+        manifest: dict[str, Any],
+        current_game_time: str | None = None,
+        extra_context: dict[str, Any] | None = None,
+        turn_id: str | None = None,
+    ) -> Future:
+        """
+        Starts one read-only call on the tool pool and returns at once, so a streaming caller
+        can keep reading the model's output. Hand the futures to `collect`, in call order,
+        before the next mutating call. Mutating calls must go through `execute`.
+        """
+        if not is_read_only(tool_call):
+            raise ValueError(f"Tool '{self._tool_name(tool_call)}' is not read-only.")
+        ctx = self._build_context(session, manifest, current_game_time, extra_context)
+        self._notify_call(tool_call, turn_id)
+
+        db_path = getattr(self.db, "db_path", None)
+        if not isinstance(db_path, str) or db_path in ("", ":memory:"):
+            # A private in-memory database cannot be opened from another thread
+            future: Future = Future()
+            future.set_result(self._run_call(tool_call, ctx))
+            return future
+        return _get_tool_pool().submit(self._run_isolated, tool_call, ctx, db_path)
+
+    def collect(self, started: list[tuple[BaseModel, Future]], session, turn_id: str | None = None) -> list[dict[str, Any]]:
+        """Waits for calls begun with `start` and records their outcomes in call order, on the caller's thread."""
+        results: list[dict[str, Any]] = []
+        for call, future in started:
+            result, error = future.result()
+            self._record_outcome(call, result, error, session, turn_id, results)
+        return results
+
+    def _build_context(
+        self, session, manifest: dict[str, Any], current_game_time: str | None, extra_context: dict[str, Any] | None
+    ) -> dict[str, Any]:
         ctx = {
             "session_id": session.id,
             "db_manager": self.db,
             "vector_store": self.vs,
+            "retrieval_engine": self.retrieval_engine,
             "manifest": manifest,  # This needs to be the SystemManifest object ideally
             "current_game_time": current_game_time,
             "ui_queue": self.ui_queue,
@@ -55,84 +135,152 @@ class ToolExecutor:
 
         if extra_context:
             ctx.update(extra_context)
+        return ctx
 
-        for _i, call in enumerate(tool_calls[:tool_budget]):
-            tool_name = getattr(call, "name", "unknown")
-            if isinstance(tool_name, property): # Fallback for some Pydantic versions
-                 tool_name = call.__class__.model_fields["name"].default
+    def _record_outcome(
+        self, call: BaseModel, result: Any, error: Exception | None, session, turn_id: str | None, results: list[dict[str, Any]]
+    ) -> bool:
+        """Appends the call's result or error entry; True if it succeeded."""
+        if error is None:
+            try:
+                # Each tool call is atomic: persist its state changes before the UI is told to refresh
+                self._flush_state()
+                self._handle_result(call, result, session, turn_id, results)
+            except Exception as e:
+                error = e
+        if error is not None:
+            self._discard_state()
+            self._handle_error(call, error, turn_id, results)
+            return False
+        return True
 
-            # Notify UI
-            if self.ui_queue:
-                try:
-                    self.ui_queue.put(
-                        {
-                            "type": UIEventType.TOOL_CALL,
-                            "name": tool_name,
-                            "args": call.model_dump(exclude={"name"}),
-                            "turn_id": turn_id,
-                        }
-                    )
-                except Exception:
-                    pass
+    @staticmethod
+    def _tool_name(call: BaseModel) -> str:
+        tool_name = getattr(call, "name", "unknown")
+        if isinstance(tool_name, property): # Fallback for some Pydantic versions
+            tool_name = call.__class__.model_fields["name"].default
+        return tool_name
+
+    def _plan_groups(self, calls: list[BaseModel]) -> list[list[BaseModel]]:
+        """
+        Splits a batch into execution groups, in call order. Consecutive read-only calls share
+        a group and may run concurrently; every mutating call is a group of its own, so
+        mutations keep the model's order and reads never straddle a write.
+        """
+        groups: list[list[BaseModel]] = []
+        for call in calls:
+            if is_read_only(call) and groups and is_read_only(groups[-1][0]):
+                groups[-1].append(call)
+            else:
+                groups.append([call])
+        return groups
+
+    def _run_call(self, call: BaseModel, ctx: dict[str, Any]) -> tuple[Any, Exception | None]:
+        try:
+            return self.tools.execute(call, context=ctx), None
+        except Exception as e:
+            return None, e
+
+    def _run_isolated(self, call: BaseModel, ctx: dict[str, Any], db_path: str) -> tuple[Any, Exception | None]:
+        # SQLite connections are bound to their thread; workers read through their own.
+        # Pending state is flushed after every tool, so they see the same data.
+        try:
+            with DBManager(db_path) as worker_db:
+                return self._run_call(call, {**ctx, "db_manager": worker_db})
+        except Exception as e:
+            return None, e
+
+    def _run_concurrently(self, calls: list[BaseModel], ctx: dict[str, Any]) -> list[tuple[Any, Exception | None]]:
+        """Runs read-only calls on the shared tool pool; outcomes come back in call order."""
+        db_path = getattr(self.db, "db_path", None)
+        if not isinstance(db_path, str) or db_path in ("", ":memory:"):
+            # A private in-memory database cannot be opened from another thread
+            return [self._run_call(call, ctx) for call in calls]
+
+        pool = _get_tool_pool()
+        futures = [pool.submit(self._run_isolated, call, ctx, db_path) for call in calls]
+        self.logger.debug(f"Running {len(calls)} read-only tool calls concurrently")
+        return [f.result() for f in futures]
 
+    def _notify_call(self, call: BaseModel, turn_id: str | None):
+        if self.ui_queue:
             try:
-                # EXECUTE
-                result = self.tools.execute(call, context=ctx)
-
-                # Special UI Events
-                if isinstance(call, Roll) and self.ui_queue:
-                    self.ui_queue.put(
-                        {
-                            "type": UIEventType.DICE_ROLL,
-                            "spec": call.formula,
-                            "rolls": result.get("rolls", []),
-                            "total": result.get("total", 0),
-                            "turn_id": turn_id,
-                        }
-                    )
-
-                results.append(
+                self.ui_queue.put(
                     {
-                        "name": tool_name,
-                        "arguments": call.model_dump(exclude={"name"}),
-                        "result": result,
+                        "type": UIEventType.TOOL_CALL,
+                        "name": self._tool_name(call),
+                        "args": call.model_dump(exclude={"name"}),
+                        "turn_id": turn_id,
                     }
                 )
+            except Exception:
+                pass
 
-                # UI Success
-                if self.ui_queue:
-                    self.ui_queue.put(
-                        {
-                            "type": UIEventType.TOOL_RESULT,
-                            "name": tool_name,
-                            "result": result,
-                            "is_error": False,
-                            "turn_id": turn_id,
-                        }
-                    )
-
-                # Post Hooks
-                self._post_hook(tool_name, result, session, turn_id)
+    def _handle_result(self, call: BaseModel, result: Any, session, turn_id: str | None, results: list[dict[str, Any]]):
+        tool_name = self._tool_name(call)
 
-                # Check if a memory tool was used (for refreshing context)
-                if isinstance(call, Note):
-                    memory_tool_used = True
+        # Special UI Events
+        if isinstance(call, Roll) and self.ui_queue:
+            self.ui_queue.put(
+                {
+                    "type": UIEventType.DICE_ROLL,
+                    "spec": call.formula,
+                    "rolls": result.get("rolls", []),
+                    "total": result.get("total", 0),
+                    "turn_id": turn_id,
+                }
+            )
 
-            except Exception as e:
-                self.logger.error(f"Tool error {tool_name}: {e}", exc_info=True)
-                results.append({"name": tool_name, "error": str(e)})
-                if self.ui_queue:
-                    self.ui_queue.put(
-                        {
-                            "type": UIEventType.TOOL_RESULT,
-                            "name": tool_name,
-                            "result": str(e),
-                            "is_error": True,
-                            "turn_id": turn_id,
-                        }
-                    )
+        arguments = call.model_dump(exclude={"name"})
+        results.append(
+            {
+                "name": tool_name,
+                "arguments": arguments,
+                "result": result,
+                # Compact form for the transcript; the UI gets the full result below
+                "content": encode_result(tool_name, result, arguments),
+            }
+        )
 
-        return results, memory_tool_used
+        # UI Success
+        if self.ui_queue:
+            self.ui_queue.put(
+                {
+                    "type": UIEventType.TOOL_RESULT,
+                    "name": tool_name,
+                    "result": result,
+                    "is_error": False,
+                    "turn_id": turn_id,
+                }
+            )
+
+        # Post Hooks
+        self._post_hook(tool_name, result, session, turn_id)
+
+    def _handle_error(self, call: BaseModel, error: Exception, turn_id: str | None, results: list[dict[str, Any]]):
+        tool_name = self._tool_name(call)
+        self.logger.error(f"Tool error {tool_name}: {error}", exc_info=error)
+        results.append({"name": tool_name, "error": str(error), "content": encode_result(tool_name, {"error": str(error)})})
+        if self.ui_queue:
+            self.ui_queue.put(
+                {
+                    "type": UIEventType.TOOL_RESULT,
+                    "name": tool_name,
+                    "result": str(error),
+                    "is_error": True,
+                    "turn_id": turn_id,
+                }
+            )
+
+    def _flush_state(self):
+        state = getattr(self.db, "game_state", None)
+        if isinstance(state, GameStateUnitOfWork):
+            state.flush()
+
+    def _discard_state(self):
+        state = getattr(self.db, "game_state", None)
+        if isinstance(state, GameStateUnitOfWork):
+            state.discard()
 
     def _post_hook(self, tool_name: str, result: Any, session, turn_id: str | None):
         """Update UI based on tool results."""
@@ -14,7 +14,7 @@ logger = logging.getLogger(__name__)
 def handler(path: str, delta: int | float, target: str = EntityKey.PLAYER, reason: str = "", **context: Any) -> dict:
     """
     Handler for 'adjust' tool.
-    Applies delta to a numeric field, then runs full validation pipeline.
+    Applies delta to a numeric field, then revalidates everything downstream of it.
     """
     session_id = context.get("session_id")
     db = context.get("db_manager")
@@ -61,7 +61,7 @@ def handler(path: str, delta: int | float, target: str = EntityKey.PLAYER, reaso
 
     # 4. RUN VALIDATION PIPELINE (The Lego Protocol)
     # This recalculates derived stats and clamps values (e.g. HP <= Max)
-    validated_entity, corrections = validate_entity(entity, manifest)
+    validated_entity, corrections = validate_entity(entity, manifest, changed_paths=[actual_path])
 
     # 5. Save
     set_entity(session_id, db, entity_type, entity_key, validated_entity)
@@ -11,11 +11,13 @@ def handler(
     session_id = context.get("session_id")
     db = context.get("db_manager")
     vs = context.get("vector_store")
+    engine = context.get("retrieval_engine")
 
     if not session_id or not db:
         return {"error": "Missing session context"}
 
-    mr = MemoryRetriever(db, vs)
+    # Reuse the process-wide engine instead of reloading NLTK/reranker per call
+    mr = MemoryRetriever(db, vs, engine=engine)
 
     sess = Session("synthetic_retrieval")
     sess.id = session_id
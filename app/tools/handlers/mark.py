@@ -57,7 +57,7 @@ def handler(path: str, count: int = 1, target: str = EntityKey.PLAYER, **context
     set_path(entity, path, track)
 
     # 2. RUN VALIDATION PIPELINE
-    validated_entity, corrections = validate_entity(entity, manifest)
+    validated_entity, corrections = validate_entity(entity, manifest, changed_paths=[path])
 
     # 3. Save
     set_entity(session_id, db, entity_type, entity_key, validated_entity)
@@ -14,7 +14,7 @@ logger = logging.getLogger(__name__)
 def handler(path: str, value: Any, target: str = EntityKey.PLAYER, reason: str = "", **context: Any) -> dict:
     """
     Handler for 'set' tool.
-    Sets value directly, then runs full validation pipeline.
+    Sets value directly, then revalidates everything downstream of it.
     """
     session_id = context.get("session_id")
     db = context.get("db_manager")
@@ -50,7 +50,7 @@ def handler(path: str, value: Any, target: str = EntityKey.PLAYER, reason: str =
         return {"error": f"Failed to set path: {relative_path}"}
 
     # 2. RUN VALIDATION PIPELINE
-    validated_entity, corrections = validate_entity(entity, manifest)
+    validated_entity, corrections = validate_entity(entity, manifest, changed_paths=[relative_path])
 
     # 3. Save
     set_entity(session_id, db, entity_type, entity_key, validated_entity)
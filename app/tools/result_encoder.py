@@ -0,0 +1,123 @@
+"""Compact encoding of tool results for the ReAct transcript."""
+
+import json
+import os
+from collections.abc import Callable
+from typing import Any
+
+DEFAULT_MAX_ITEMS = 20
+
+# Continuation handle a summarizer hands back; capping it would lose the keys it points to
+CONTINUATION_FIELD = "more"
+
+# (result, arguments, max_items) -> result to encode
+Summarizer = Callable[[dict[str, Any], dict[str, Any], int], dict[str, Any]]
+
+
+def _is_empty(value: Any) -> bool:
+    return value is None or value == "" or value == [] or value == {}
+
+
+def prune(value: Any) -> Any:
+    """Drops null and empty fields from nested dicts."""
+    if isinstance(value, dict):
+        pruned = {k: prune(v) for k, v in value.items()}
+        return {k: v for k, v in pruned.items() if not _is_empty(v)}
+    if isinstance(value, list):
+        return [prune(v) for v in value]
+    return value
+
+
+def cap_lists(value: Any, max_items: int) -> Any:
+    """Shortens lists to max_items, noting how many entries were left out."""
+    if isinstance(value, dict):
+        return {k: cap_lists(v, max_items) for k, v in value.items()}
+    if isinstance(value, list):
+        capped = [cap_lists(v, max_items) for v in value[:max_items]]
+        if len(value) > max_items:
+            capped.append(f"…(+{len(value) - max_items} more)")
+        return capped
+    return value
+
+
+# --- Per-tool summarizers ---
+
+
+def _summarize_state_query(result: dict[str, Any], arguments: dict[str, Any], max_items: int) -> dict[str, Any]:
+    value = result.get("value")
+    if arguments.get("key") != "*" or not isinstance(value, dict) or len(value) <= max_items:
+        return result
+    # Whole collection: show the first entities and hand back the keys of the rest
+    keys = list(value)
+    return {
+        "value": {k: value[k] for k in keys[:max_items]},
+        CONTINUATION_FIELD: {
+            "total": len(keys),
+            "keys": keys[max_items:],
+            "next": f"Query the remaining keys individually with state.query(entity_type='{arguments.get('entity_type')}', key=...)",
+        },
+    }
+
+
+def _summarize_context_retrieve(result: dict[str, Any], arguments: dict[str, Any], max_items: int) -> dict[str, Any]:
+    # The formatted text is what the model reads; memory ids only matter to the UI
+    return {"text": result.get("text"), "count": len(result.get("memory_ids") or [])}
+
+
+def _exits(location: dict[str, Any]) -> dict[str, str]:
+    exits = {}
+    for direction, conn in (location.get("connections") or {}).items():
+        if not isinstance(conn, dict):
+            exits[direction] = str(conn)
+            continue
+        label = conn.get("display_name") or conn.get("target_key") or direction
+        flags = [flag for flag in ("hidden", "locked") if conn.get(f"is_{flag}")]
+        exits[direction] = f"{label} ({', '.join(flags)})" if flags else label
+    return exits
+
+
+def _summarize_move(result: dict[str, Any], arguments: dict[str, Any], max_items: int) -> dict[str, Any]:
+    summary = {k: v for k, v in result.items() if k not in ("location_data", "ui_event")}
+    location = result.get("location_data")
+    if isinstance(location, dict):
+        summary["location"] = {
+            **{k: v for k, v in location.items() if k != "connections"},
+            "exits": _exits(location),
+        }
+    return summary
+
+
+SUMMARIZERS: dict[str, Summarizer] = {
+    "state.query": _summarize_state_query,
+    "context.retrieve": _summarize_context_retrieve,
+    "move": _summarize_move,
+}
+
+
+def encode_result(
+    tool_name: str,
+    result: Any,
+    arguments: dict[str, Any] | None = None,
+    max_items: int | None = None,
+) -> str:
+    """
+    Encodes a tool result for the model: per-tool summary, top-level fields that merely echo
+    an argument removed, nested nulls and empties dropped, lists capped, minified JSON.
+    The full result still goes to the UI.
+    """
+    arguments = arguments or {}
+    if max_items is None:
+        max_items = int(os.environ.get("TOOL_RESULT_MAX_ITEMS", DEFAULT_MAX_ITEMS))
+
+    if isinstance(result, dict) and "error" not in result:
+        summarizer = SUMMARIZERS.get(tool_name)
+        if summarizer:
+            result = summarizer(result, arguments, max_items)
+        echoed = {k for k, v in result.items() if k in arguments and arguments[k] == v}
+        # Top-level keys stay even when empty: {"value": null} means "not found"
+        result = {k: prune(v) for k, v in result.items() if k not in echoed}
+        result = {k: v if k == CONTINUATION_FIELD else cap_lists(v, max_items) for k, v in result.items()}
+    else:
+        result = cap_lists(result, max_items)
+
+    return json.dumps(result, separators=(",", ":"), ensure_ascii=False, default=str)
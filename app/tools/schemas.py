@@ -1,9 +1,18 @@
-from typing import Literal
+from typing import ClassVar, Literal
 
 from pydantic import BaseModel, Field
 
 from app.models.vocabulary import MemoryKind
 
+# Tools are mutating unless their schema sets `read_only = True`. Read-only tools never
+# write game state or memories, so the executor may run them concurrently.
+
+
+def is_read_only(tool: BaseModel | type[BaseModel]) -> bool:
+    tool_type = tool if isinstance(tool, type) else type(tool)
+    return getattr(tool_type, "read_only", False)
+
+
 # --- ATOMIC GAMEPLAY TOOLS ---
 
 
@@ -74,6 +83,7 @@ class Roll(BaseModel):
     """
 
     name: Literal["roll"] = "roll"
+    read_only: ClassVar[bool] = True
     formula: str = Field(
         ..., description="Dice notation (e.g. '1d20+5', '2d6', '1d100')."
     )
@@ -117,6 +127,7 @@ class StateQuery(BaseModel):
     Use the World Index to find valid keys. Use json_path="." for full data.
     """
     name: Literal["state.query"] = "state.query"
+    read_only: ClassVar[bool] = True
     entity_type: str = Field(..., description="Entity type: 'character', 'location', 'quest', etc.")
     key: str = Field(..., description="Entity key from the World Index (e.g. 'npc_captain_voss', 'tavern_rusty_nail'). Use '*' for all of a type.")
     json_path: str = Field(".", description="JSON path to drill into (use '.' for full entity data).")
@@ -154,6 +165,7 @@ class ContextRetrieve(BaseModel):
     """
 
     name: Literal["context.retrieve"] = "context.retrieve"
+    read_only: ClassVar[bool] = True
     query: str = Field(
         ..., description="Query text (tags, natural language, etc)."
     )
@@ -0,0 +1,36 @@
+import pytest
+
+from app.prefabs.formula import build_formula_context, compile_formula, evaluate, validate_formula
+
+
+def test_compiled_formula_resolves_paths_to_slots():
+    compiled = compile_formula("floor((attributes.str.score - 10) / 2) + level")
+    assert compiled.slots == ("attributes_str_score", "level")
+    assert compiled({"attributes_str_score": 15, "level": 3}) == 5.0
+    assert compiled.evaluate_slots([8, 1]) == 0.0
+
+
+def test_compiled_formula_is_cached():
+    assert compile_formula("max(a, b)") is compile_formula("max(a, b)")
+
+
+def test_evaluate_uses_safe_functions_and_dotted_context():
+    context = build_formula_context({"attributes": {"dex": 13}})
+    assert evaluate("floor((attributes.dex - 10) / 2)", context) == 1.0
+    assert evaluate("min(attributes.dex, 10)", {"attributes.dex": 13}) == 10.0
+    assert evaluate("attributes.dex > 12", context) == 1.0
+
+
+def test_evaluate_returns_default_on_error():
+    assert evaluate("missing.path + 1", {}, default=-1.0) == -1.0
+    assert evaluate("1 / 0", {}, default=7.0) == 7.0
+
+
+@pytest.mark.parametrize("formula", ["__import__('os')", "a.__class__", "'x' * 3", "[1, 2]", "2 ** 10000000"])
+def test_unsafe_formulas_are_rejected(formula):
+    assert evaluate(formula, {"a": 1.0}, default=-1.0) == -1.0
+
+
+def test_validate_formula_reports_unknown_paths():
+    assert validate_formula("floor(attributes.str / 2)", {"attributes.str"}) is None
+    assert validate_formula("attributes.wis + 1", {"attributes.str"}) is not None
@@ -0,0 +1,112 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+from app.core.react_turn_manager import ReActTurnManager
+from app.database.db_manager import DBManager
+from app.database.game_state_unit_of_work import GameStateUnitOfWork
+from app.models.message import Message
+from app.models.session import Session
+
+
+class TestGameStateUnitOfWork(unittest.TestCase):
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.addCleanup(os.remove, self.db_path)
+
+        self.db = DBManager(self.db_path).__enter__()
+        self.addCleanup(self.db.__exit__, None, None, None)
+        self.db.create_tables()
+        self.db.conn.execute("INSERT INTO prompts (id, name, content) VALUES (1, 'p', 'c')")
+        self.sid = self.db.sessions.create("s", Session("s").to_json(), 1).id
+
+        self.repo = self.db.game_state
+        self.repo.set_entity(self.sid, "character", "player", {"hp": 10})
+        self.uow = GameStateUnitOfWork(self.repo)
+
+    def test_writes_are_deferred_until_flush(self):
+        entity = self.uow.get_entity(self.sid, "character", "player")
+        entity["hp"] = 7
+        self.assertEqual(self.uow.set_entity(self.sid, "character", "player", entity), 2)
+        self.assertEqual(self.uow.set_entity(self.sid, "character", "player", {"hp": 5}), 3)
+
+        self.assertEqual(self.repo.get_entity(self.sid, "character", "player"), {"hp": 10})
+        self.assertEqual(self.uow.get_entity(self.sid, "character", "player"), {"hp": 5})
+        self.assertEqual(self.uow.get_versions(self.sid, "character"), {"player": 3})
+
+        self.uow.flush()
+        self.assertEqual(self.repo.get_entity(self.sid, "character", "player"), {"hp": 5})
+        self.assertEqual(self.repo.get_versions(self.sid, "character"), {"player": 3})
+        # The repository keeps counting from the flushed version
+        self.assertEqual(self.repo.set_entity(self.sid, "character", "player", {"hp": 4}), 4)
+
+    def test_returned_entities_are_isolated_copies(self):
+        entity = self.uow.get_entity(self.sid, "character", "player")
+        entity["hp"] = 0
+        self.assertEqual(self.uow.get_entity(self.sid, "character", "player"), {"hp": 10})
+        self.assertFalse(self.uow.has_pending)
+
+    def test_type_listing_overlays_pending_changes(self):
+        self.uow.set_entity(self.sid, "character", "goblin", {"hp": 3})
+        self.uow.delete_entity(self.sid, "character", "player")
+        self.assertEqual(self.uow.get_all_entities_by_type(self.sid, "character"), {"goblin": {"hp": 3}})
+
+    def test_rollback_restores_flushed_and_pending_changes(self):
+        self.uow.set_entity(self.sid, "character", "player", {"hp": 1})
+        self.uow.set_entity(self.sid, "character", "goblin", {"hp": 3})
+        self.uow.flush()
+        self.uow.set_entity(self.sid, "character", "player", {"hp": 0})
+
+        self.uow.rollback()
+
+        self.assertEqual(self.repo.get_all_entities_by_type(self.sid, "character"), {"player": {"hp": 10}})
+        self.assertEqual(self.repo.get_versions(self.sid, "character")["player"], 3)
+
+    def test_rollback_skips_entities_changed_concurrently(self):
+        self.uow.set_entity(self.sid, "character", "player", {"hp": 1})
+        self.uow.flush()
+        self.repo.set_entity(self.sid, "character", "player", {"hp": 99})
+
+        self.uow.rollback()
+        self.assertEqual(self.repo.get_entity(self.sid, "character", "player"), {"hp": 99})
+
+    def test_commit_forgets_rollback_state(self):
+        self.uow.set_entity(self.sid, "character", "player", {"hp": 1})
+        self.uow.commit()
+        self.uow.rollback()
+        self.assertEqual(self.repo.get_entity(self.sid, "character", "player"), {"hp": 1})
+
+    def test_turn_that_is_not_persisted_is_rolled_back(self):
+        orchestrator = MagicMock()
+        orchestrator.stop_event.is_set.return_value = False
+        manager = ReActTurnManager(orchestrator)
+
+        def no_narrative(game_session, db, turn_id, state_uow):
+            db.game_state.set_entity(self.sid, "character", "player", {"hp": 1})
+            state_uow.flush()  # As after a tool call
+            return False
+
+        def failed_write(game_session, db, turn_id, state_uow):
+            db.game_state.set_entity(self.sid, "character", "player", {"hp": 2})
+            state_uow.flush()
+            with db.transaction():
+                db.messages.append(self.sid, [Message(role="assistant", content="You fall.")])
+                db.sessions.update(db.sessions.get_by_id(self.sid))  # Its commit must not end the transaction
+                raise sqlite3.OperationalError("disk I/O error")
+
+        with patch.object(manager, "_run_turn", side_effect=no_narrative):
+            manager.execute_turn(MagicMock(id=self.sid), self.db, "t1")
+        self.assertIs(self.db.game_state, self.repo)
+        self.assertEqual(self.repo.get_entity(self.sid, "character", "player"), {"hp": 10})
+
+        with patch.object(manager, "_run_turn", side_effect=failed_write), self.assertRaises(sqlite3.OperationalError):
+            manager.execute_turn(MagicMock(id=self.sid), self.db, "t2")
+        self.assertEqual(self.repo.get_entity(self.sid, "character", "player"), {"hp": 10})
+        self.assertEqual(self.db.messages.count(self.sid), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from google.genai import types
+
+from app.llm.gemini_context_cache import GeminiContextCache
+
+TOOLS = [{"type": "function", "function": {"name": "roll", "description": "Roll dice", "parameters": {}}}]
+
+
+class TestGeminiContextCache(unittest.TestCase):
+    def setUp(self):
+        self.client = MagicMock()
+        self.client.aio.caches.create = AsyncMock(
+            side_effect=lambda **kw: types.CachedContent(name=f"cachedContents/{self.client.aio.caches.create.call_count}")
+        )
+        self.client.aio.caches.update = AsyncMock()
+        self.client.aio.caches.delete = AsyncMock()
+
+    def _get(self, cache, instruction="static", tools=TOOLS):
+        return asyncio.run(cache.get_or_create(self.client, "gemini-test", instruction, tools, []))
+
+    def test_reuses_cache_for_same_prefix(self):
+        cache = GeminiContextCache(ttl_seconds=900)
+        _, first = self._get(cache)
+        _, second = self._get(cache)
+
+        self.assertEqual(first, "cachedContents/1")
+        self.assertEqual(first, second)
+        self.assertEqual(self.client.aio.caches.create.call_count, 1)
+
+    def test_changed_prefix_creates_new_cache_and_evicts_oldest(self):
+        cache = GeminiContextCache(ttl_seconds=900, max_entries=1)
+        _, first = self._get(cache)
+        _, second = self._get(cache, instruction="static v2")
+
+        self.assertNotEqual(first, second)
+        self.client.aio.caches.delete.assert_awaited_once_with(name=first)
+
+    def test_refreshes_ttl_near_expiry(self):
+        cache = GeminiContextCache(ttl_seconds=30)  # Below the refresh margin: every hit refreshes
+        _, first = self._get(cache)
+        _, second = self._get(cache)
+
+        self.assertEqual(first, second)
+        self.assertEqual(self.client.aio.caches.create.call_count, 1)
+        self.client.aio.caches.update.assert_awaited_once()
+
+    def test_failed_create_backs_off(self):
+        self.client.aio.caches.create.side_effect = RuntimeError("too few tokens")
+        cache = GeminiContextCache()
+
+        self.assertIsNone(self._get(cache)[1])
+        self.assertIsNone(self._get(cache)[1])
+        self.assertEqual(self.client.aio.caches.create.call_count, 1)
+
+    def test_connector_keeps_dynamic_context_out_of_cache(self):
+        from app.llm.gemini_connector import GeminiConnector
+
+        with patch.dict("os.environ", {"GEMINI_API_KEY": "k", "GEMINI_API_MODEL": "gemini-test"}):
+            connector = GeminiConnector()
+        connector.context_cache = MagicMock()
+        connector.context_cache.get_or_create = AsyncMock(return_value=("key", "cachedContents/1"))
+        self.client.aio.models.generate_content = AsyncMock(return_value=MagicMock(candidates=[], usage_metadata=None))
+        connector._get_async_client = lambda: self.client
+
+        asyncio.run(connector.async_chat_with_tools("static", [], TOOLS, dynamic_context="scene: tavern"))
+
+        kwargs = self.client.aio.models.generate_content.call_args.kwargs
+        self.assertEqual(kwargs["config"].cached_content, "cachedContents/1")
+        self.assertIsNone(kwargs["config"].system_instruction)
+        self.assertEqual(kwargs["contents"][0].parts[0].text, "scene: tavern")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import unittest
+
+from app.context.history_compactor import COMPACTED_HEADER, HistoryCompactor, split_turns, turn_key
+from app.context.token_budget import ApproxTokenizer, TokenBudget
+from app.models.message import Message
+from app.models.session import Session
+
+
+def _turn(n: int) -> list[Message]:
+    tid = f"t{n}"
+    return [
+        Message(role="user", content="u" * 400),
+        Message(role="assistant", content=None, tool_calls=[{"id": f"c{n}", "name": "roll", "arguments": {}}], turn_id=tid),
+        Message(role="tool", tool_call_id=f"c{n}", name="roll", content="t" * 400, turn_id=tid),
+        Message(role="assistant", content="a" * 400, turn_id=tid),
+    ]
+
+
+class TestHistoryCompactor(unittest.TestCase):
+    def setUp(self):
+        self.budget = TokenBudget(ApproxTokenizer(), context_window=100_000, output_reserve=0)
+        self.lookups: list[list[str]] = []
+        self.summaries = {f"t{n}": f"summary {n}" for n in range(20)}
+
+    def _get_summaries(self, turn_ids):
+        self.lookups.append(turn_ids)
+        return {t: self.summaries[t] for t in turn_ids if t in self.summaries}
+
+    def _session(self, turns: int) -> Session:
+        session = Session("s")
+        for n in range(turns):
+            session.history.extend(_turn(n))
+        session.history.append(Message(role="user", content="now"))
+        return session
+
+    def test_split_turns(self):
+        history = _turn(0)[2:] + _turn(1)
+        turns = split_turns(history)
+        self.assertEqual([len(t) for t in turns], [2, 4])
+        self.assertEqual([turn_key(t) for t in turns], ["t0", "t1"])
+
+    def test_below_trigger_is_untouched(self):
+        session = self._session(3)
+        compactor = HistoryCompactor(trigger_tokens=10_000, target_tokens=5_000)
+        self.assertEqual(compactor.compact(session, session.history, self._get_summaries, self.budget), session.history)
+        self.assertEqual(session.compacted_seq, 0)
+
+    def test_folds_oldest_turns_into_summaries(self):
+        session = self._session(10)  # ~310 tokens per turn
+        compactor = HistoryCompactor(trigger_tokens=2000, target_tokens=1000, keep_turns=2)
+        compacted = compactor.compact(session, session.history, self._get_summaries, self.budget)
+
+        self.assertEqual(compacted[0].role, "assistant")
+        self.assertTrue(compacted[0].content.startswith(COMPACTED_HEADER))
+        self.assertIn("summary 0", compacted[0].content)
+        self.assertEqual(compacted[1].role, "user")
+        live = compacted[1:]
+        self.assertLessEqual(sum(self.budget.message_tokens(m) for m in live), 1000)
+        self.assertEqual(session.compacted_seq, len(session.history) - len(live))
+        # The stored transcript is unchanged
+        self.assertEqual(len(session.history), 41)
+
+    def test_fold_point_is_incremental_and_stable(self):
+        session = self._session(10)
+        compactor = HistoryCompactor(trigger_tokens=2000, target_tokens=1000, keep_turns=2)
+        first = compactor.compact(session, session.history, self._get_summaries, self.budget)
+        seq = session.compacted_seq
+
+        # One more turn: still under the trigger, so the same prefix is sent
+        session.history[-1:] = _turn(10)
+        session.history.append(Message(role="user", content="next"))
+        second = compactor.compact(session, session.history, self._get_summaries, self.budget)
+        self.assertEqual(session.compacted_seq, seq)
+        self.assertEqual(second[0].content, first[0].content)
+
+    def test_unsummarized_turns_do_not_block_folding(self):
+        session = self._session(10)
+        del self.summaries["t2"]
+        # A player message the model never answered: a turn with no turn id
+        session.history[4:4] = [Message(role="user", content="u" * 400)]
+        compactor = HistoryCompactor(trigger_tokens=2000, target_tokens=1000, keep_turns=2)
+        compacted = compactor.compact(session, session.history, self._get_summaries, self.budget)
+
+        # The lone message and t0-t6 are folded; t2 leaves no line behind
+        self.assertEqual(session.compacted_seq, 29)
+        self.assertEqual(compacted[0].content.splitlines()[1:], [f"- summary {n}" for n in (0, 1, 3, 4, 5, 6)])
+        self.assertEqual(compacted[1].role, "user")
+
+    def test_rewind_before_fold_point_starts_over(self):
+        session = self._session(10)
+        session.compacted_seq = 1000
+        compactor = HistoryCompactor(trigger_tokens=100_000)
+        self.assertEqual(compactor.compact(session, session.history, self._get_summaries, self.budget), session.history)
+        self.assertEqual(session.compacted_seq, 0)
+
+    def test_window_offset(self):
+        session = self._session(10)
+        session.history_offset = 100
+        window = session.history[-21:]
+        compactor = HistoryCompactor(trigger_tokens=1000, target_tokens=500, keep_turns=1)
+        compactor.compact(session, window, self._get_summaries, self.budget)
+        self.assertGreater(session.compacted_seq, 100 + len(session.history) - len(window))
+
+    def test_compacted_seq_round_trips(self):
+        session = Session("s")
+        session.compacted_seq = 42
+        self.assertEqual(Session.from_json(session.to_json()).compacted_seq, 42)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import asyncio
+import threading
+import unittest
+
+from app.llm.llm_connector import ConnectionStats, LLMConnector, LLMResponse
+
+
+class FakeConnector(LLMConnector):
+    def __init__(self):
+        super().__init__()
+        self.loops: list[asyncio.AbstractEventLoop] = []
+
+    async def async_get_streaming_response(self, system_prompt, chat_history):
+        for chunk in ("a", "b", "c"):
+            await asyncio.sleep(0)
+            yield chunk
+
+    async def async_get_structured_response(self, system_prompt, chat_history, output_schema, temperature=0.7, top_p=0.9):
+        raise NotImplementedError
+
+    async def async_chat_with_tools(self, system_prompt, chat_history, tools, dynamic_context=None):
+        async with self.semaphore:
+            self.loops.append(asyncio.get_running_loop())
+            if system_prompt == "slow":
+                await asyncio.sleep(5)
+            return LLMResponse(content=system_prompt, tool_calls=None)
+
+
+class TestLLMIOLoop(unittest.TestCase):
+    def test_sync_calls_share_one_persistent_loop(self):
+        connector = FakeConnector()
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(connector.chat_with_tools("hi", [], []).content))
+            for _ in range(4)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(results, ["hi"] * 4)
+        self.assertEqual(len(set(map(id, connector.loops))), 1)
+        self.assertFalse(connector.loops[0].is_closed())
+
+    def test_sync_streaming_runs_on_io_loop(self):
+        connector = FakeConnector()
+        self.assertEqual("".join(connector.get_streaming_response("s", [])), "abc")
+
+    def test_default_tool_stream_replays_response(self):
+        connector = FakeConnector()
+        events = list(connector.stream_chat_with_tools("hi", [], []))
+        self.assertEqual([e.kind for e in events], ["content", "done"])
+        self.assertEqual(events[-1].response.content, "hi")
+
+    def test_stop_event_interrupts_call(self):
+        connector = FakeConnector()
+        stop_event = threading.Event()
+        threading.Timer(0.1, stop_event.set).start()
+        with self.assertRaises(InterruptedError):
+            connector.chat_with_tools("slow", [], [], stop_event=stop_event)
+
+    def test_connection_stats_count_reuse(self):
+        stats = ConnectionStats()
+
+        async def simulate():
+            for i in range(4):
+                request = type("Req", (), {"extensions": {}})()
+                await stats.on_request(request)
+                if i == 0:
+                    await request.extensions["trace"]("connection.connect_tcp.complete", {})
+
+        asyncio.run(simulate())
+        self.assertEqual(stats.snapshot(), {"requests": 4, "new_connections": 1, "reused": 3, "reuse_ratio": 0.75})
+
+
+if __name__ == "__main__":
+    unittest.main()
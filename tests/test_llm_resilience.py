@@ -0,0 +1,193 @@
+import asyncio
+import unittest
+
+from pydantic import BaseModel
+
+from app.llm.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    LLMResilience,
+    StructuredOutputError,
+    is_retryable,
+    resilient_stream,
+    resilient_structured,
+)
+
+
+class StatusError(Exception):
+    def __init__(self, status_code: int):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class Answer(BaseModel):
+    value: int
+
+
+def _resilience(**kwargs) -> LLMResilience:
+    kwargs.setdefault("base_delay", 0.0)
+    return LLMResilience("test", **kwargs)
+
+
+class FakeConnector:
+    def __init__(self, resilience: LLMResilience, outputs: list):
+        self.resilience = resilience
+        self.outputs = outputs
+        self.histories: list[list] = []
+
+    @resilient_structured
+    async def async_get_structured_response(self, system_prompt, chat_history, output_schema, temperature=0.5, top_p=0.9):
+        self.histories.append(list(chat_history))
+        output = self.outputs.pop(0)
+        if isinstance(output, Exception):
+            raise output
+        try:
+            return output_schema.model_validate_json(output)
+        except ValueError as e:
+            raise StructuredOutputError(str(e), raw=output) from e
+
+    @resilient_stream("stream")
+    async def stream(self, fail_after: int | None):
+        output = self.outputs.pop(0)
+        if isinstance(output, Exception):
+            raise output
+        for i, item in enumerate(output):
+            if fail_after is not None and i == fail_after:
+                raise StatusError(503)
+            yield item
+
+
+class TestClassification(unittest.TestCase):
+    def test_retryable_errors(self):
+        self.assertTrue(is_retryable(StatusError(429)))
+        self.assertTrue(is_retryable(StatusError(503)))
+        self.assertTrue(is_retryable(TimeoutError()))
+        self.assertFalse(is_retryable(StatusError(400)))
+        self.assertFalse(is_retryable(StructuredOutputError("bad")))
+        self.assertFalse(is_retryable(InterruptedError()))
+
+
+class TestRetries(unittest.TestCase):
+    def test_backoff_then_success(self):
+        resilience = _resilience(max_retries=3)
+        calls = []
+
+        async def flaky():
+            calls.append(1)
+            if len(calls) < 3:
+                raise StatusError(503)
+            return "ok"
+
+        self.assertEqual(asyncio.run(resilience.call("op", flaky)), "ok")
+        stats = resilience.metrics.snapshot()["op"]
+        self.assertEqual((stats["retry"], stats["ok"]), (2, 1))
+
+    def test_client_errors_are_not_retried(self):
+        resilience = _resilience(max_retries=3)
+        calls = []
+
+        async def bad_request():
+            calls.append(1)
+            raise StatusError(400)
+
+        with self.assertRaises(StatusError):
+            asyncio.run(resilience.call("op", bad_request))
+        self.assertEqual(len(calls), 1)
+
+    def test_backoff_is_capped_and_honours_retry_after(self):
+        resilience = _resilience(base_delay=1.0, max_delay=4.0)
+        self.assertLessEqual(max(resilience.backoff(10) for _ in range(50)), 4.0)
+
+        error = StatusError(429)
+        error.response = type("Response", (), {"headers": {"retry-after": "2"}})()
+        self.assertEqual(resilience.backoff(0, error), 2.0)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_opens_and_fails_fast(self):
+        resilience = _resilience(max_retries=0, breaker=CircuitBreaker(threshold=2, cooldown=60))
+        calls = []
+
+        async def down():
+            calls.append(1)
+            raise StatusError(502)
+
+        for _ in range(2):
+            with self.assertRaises(StatusError):
+                asyncio.run(resilience.call("op", down))
+        with self.assertRaises(CircuitOpenError):
+            asyncio.run(resilience.call("op", down))
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(resilience.metrics.snapshot()["op"]["rejected"], 1)
+
+    def test_half_open_after_cooldown(self):
+        breaker = CircuitBreaker(threshold=1, cooldown=0)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "half_open")
+        breaker.before_call("test")
+        breaker.record_success()
+        self.assertEqual(breaker.state, "closed")
+
+
+class TestHedging(unittest.TestCase):
+    def test_slow_request_is_hedged(self):
+        resilience = _resilience(hedge=True, hedge_after=0.05)
+        calls = []
+
+        async def sometimes_slow():
+            calls.append(1)
+            if len(calls) == 1:
+                await asyncio.sleep(5)
+                return "slow"
+            return "fast"
+
+        self.assertEqual(asyncio.run(resilience.call("op", sometimes_slow)), "fast")
+        self.assertEqual(resilience.metrics.snapshot()["op"]["hedge"], 1)
+
+    def test_no_hedge_without_enough_samples(self):
+        resilience = _resilience(hedge=True, hedge_min_samples=5)
+        self.assertIsNone(resilience.hedge_delay("op"))
+        for latency in range(10):
+            resilience.metrics.record("op", "ok", float(latency))
+        self.assertEqual(resilience.hedge_delay("op"), 9.0)
+
+
+class TestStructuredRepair(unittest.TestCase):
+    def test_validation_error_is_sent_back(self):
+        connector = FakeConnector(_resilience(repair_attempts=2), ['{"value": "x"}', '{"value": 3}'])
+        result = asyncio.run(connector.async_get_structured_response("sys", [], Answer))
+
+        self.assertEqual(result.value, 3)
+        repair = connector.histories[1]
+        self.assertEqual(repair[0].content, '{"value": "x"}')
+        self.assertIn("Validation failed", repair[1].content)
+        self.assertEqual(connector.resilience.metrics.snapshot()["structured"]["repair"], 1)
+
+    def test_gives_up_after_repair_attempts(self):
+        connector = FakeConnector(_resilience(repair_attempts=1), ["nope", "still nope"])
+        with self.assertRaises(StructuredOutputError):
+            asyncio.run(connector.async_get_structured_response("sys", [], Answer))
+        self.assertEqual(len(connector.histories), 2)
+
+
+class TestStreams(unittest.TestCase):
+    def _collect(self, connector, fail_after):
+        async def run():
+            return [item async for item in connector.stream(fail_after)]
+
+        return asyncio.run(run())
+
+    def test_failure_before_first_item_is_retried(self):
+        connector = FakeConnector(_resilience(), [StatusError(503), ["a", "b"]])
+        self.assertEqual(self._collect(connector, None), ["a", "b"])
+        self.assertEqual(connector.resilience.metrics.snapshot()["stream"]["retry"], 1)
+
+    def test_failure_after_delivery_is_raised(self):
+        connector = FakeConnector(_resilience(), [["a", "b", "c"], ["a", "b", "c"]])
+        with self.assertRaises(StatusError):
+            self._collect(connector, 1)
+        self.assertEqual(len(connector.outputs), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from app.database.db_manager import DBManager
+from app.prefabs.manifest import FieldDef, SystemManifest
+
+MANIFESTS = Path(__file__).resolve().parents[1] / "app" / "data" / "manifests"
+
+
+class TestManifestCache(unittest.TestCase):
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.addCleanup(os.remove, self.db_path)
+
+        self.db = DBManager(self.db_path).__enter__()
+        self.addCleanup(self.db.__exit__, None, None, None)
+        self.db.create_tables()
+        self.manifest = SystemManifest.from_file(MANIFESTS / "dnd_35e.json")
+        self.manifest_id = self.db.manifests.create(self.manifest)
+
+    def test_parsed_once_and_shared_between_connections(self):
+        first = self.db.manifests.get_by_id(self.manifest_id)
+        self.assertIs(first, self.db.manifests.get_by_id(self.manifest_id))
+
+        with DBManager(self.db_path) as other:
+            self.assertIs(first, other.manifests.get_by_id(self.manifest_id))
+            self.assertIs(first, other.manifests.get_by_system_id(self.manifest.id)["manifest"])
+
+    def test_update_and_upsert_invalidate(self):
+        first = self.db.manifests.get_by_id(self.manifest_id)
+
+        self.manifest.name = "Renamed"
+        self.db.manifests.update(self.manifest_id, self.manifest)
+        second = self.db.manifests.get_by_id(self.manifest_id)
+        self.assertIsNot(first, second)
+        self.assertEqual(second.name, "Renamed")
+
+        self.manifest.name = "Builtin"
+        self.assertEqual(self.db.manifests.upsert_builtin(self.manifest), self.manifest_id)
+        self.assertEqual(self.db.manifests.get_by_id(self.manifest_id).name, "Builtin")
+
+        self.db.manifests.delete(self.manifest_id)
+        self.assertIsNone(self.db.manifests.get_by_id(self.manifest_id))
+
+    def test_indexes_match_field_list(self):
+        manifest = self.db.manifests.get_by_id(self.manifest_id)
+        for f in manifest.fields:
+            self.assertIs(manifest.get_field(f.path), next(x for x in manifest.fields if x.path == f.path))
+        self.assertEqual(manifest.get_categories(), sorted({f.category for f in manifest.fields}))
+        self.assertIs(manifest.get_path_hints(), manifest.get_path_hints())
+        self.assertIn("| Dice |", manifest.get_engine_table())
+
+    def test_index_follows_replaced_fields(self):
+        manifest = SystemManifest.from_file(MANIFESTS / "dnd_35e.json")
+        self.assertIsNone(manifest.get_field("custom.stat"))
+        manifest.fields = [*manifest.fields, FieldDef(path="custom.stat", label="Stat", prefab="VAL_INT", category="meta")]
+        self.assertIsNotNone(manifest.get_field("custom.stat"))
+        self.assertIn("custom.stat", manifest.get_path_hints())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+import os
+import re
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+from app.context.context_builder import ContextBuilder
+from app.context.memory_retriever import MemoryRetriever
+from app.database.db_manager import DBManager
+from app.database.repositories import memory_repository
+from app.models.message import Message
+from app.models.session import Session
+from app.models.vocabulary import MemoryKind
+
+
+def _engine():
+    engine = MagicMock()
+    engine.extract_keywords.side_effect = lambda text, min_length=3: [
+        w for w in re.findall(r"\w+", text.lower()) if len(w) >= min_length
+    ]
+    engine.can_rerank = False
+    return engine
+
+
+class TestMemoryRetrieval(unittest.TestCase):
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.addCleanup(os.remove, self.db_path)
+
+        self.db = DBManager(self.db_path).__enter__()
+        self.addCleanup(self.db.__exit__, None, None, None)
+        self.db.create_tables()
+        self.db.conn.execute("INSERT INTO prompts (id, name, content) VALUES (1, 'p', 'c')")
+        self.session = self.db.sessions.create("s", Session("s").to_json(), 1)
+
+        mems = self.db.memories
+        self.lore = [mems.create(self.session.id, MemoryKind.LORE, f"Lore entry {i}") for i in range(3)]
+        self.events = [mems.create(self.session.id, MemoryKind.EPISODIC, f"Event {i}") for i in range(3)]
+
+    def test_get_many_chunks_and_skips_missing(self):
+        ids = [m.id for m in self.lore + self.events] + [9999]
+        with patch.object(memory_repository, "MAX_IDS_PER_QUERY", 2), \
+                patch.object(self.db.memories, "_fetchall", wraps=self.db.memories._fetchall) as fetchall:
+            found = self.db.memories.get_many(ids)
+
+        self.assertEqual(fetchall.call_count, 4)
+        self.assertEqual(sorted(found), sorted(ids[:-1]))
+        self.assertEqual(found[self.events[1].id].content, "Event 1")
+
+    def test_semantic_hits_are_hydrated_once(self):
+        # Similarity order, not id order, must survive hydration
+        ordered = [self.events[2], self.lore[1], self.events[0], self.lore[0]]
+        vs = MagicMock()
+        vs.search_memories.return_value = [
+            {"memory_id": m.id, "kind": m.kind, "tags": [], "distance": 0.1 + i * 0.01} for i, m in enumerate(ordered)
+        ]
+        retriever = MemoryRetriever(self.db, vs, engine=_engine())
+        history = [Message(role="assistant", content="The road ahead."), Message(role="user", content="zzz")]
+
+        with patch.object(self.db.memories, "get_by_id") as get_by_id, \
+                patch.object(self.db.memories, "get_many", wraps=self.db.memories.get_many) as get_many:
+            candidates = retriever.gather_candidates(self.session, history)
+
+        get_by_id.assert_not_called()
+        get_many.assert_called_once()
+        lore_ids = [mid for mid, _ in candidates.codex[MemoryKind.LORE]]
+        self.assertLess(lore_ids.index(self.lore[1].id), lore_ids.index(self.lore[0].id))
+        self.assertEqual([mid for mid, _ in candidates.episodic][:2], [self.events[2].id, self.events[0].id])
+
+    def test_query_per_kind_limits_each_kind(self):
+        self.db.memories.create(self.session.id, MemoryKind.LORE, "Important lore", priority=5)
+
+        pools = self.db.memories.query_per_kind(self.session.id, {MemoryKind.LORE: 2, MemoryKind.EPISODIC: 3})
+        self.assertEqual(pools[MemoryKind.LORE][0].content, "Important lore")
+        self.assertEqual((len(pools[MemoryKind.LORE]), len(pools[MemoryKind.EPISODIC])), (2, 3))
+
+    def test_tag_index_ranks_by_overlap(self):
+        mems = self.db.memories
+        one = mems.create(self.session.id, MemoryKind.LORE, "Castle lore", priority=5, tags=["Castle"])
+        two = mems.create(self.session.id, MemoryKind.LORE, "Castle gate lore", tags=["castle", "gate"])
+        rule = mems.create(self.session.id, MemoryKind.RULE, "Gate rule", tags=["gate", "castle", "gate"])
+
+        tagged = mems.query_per_kind(self.session.id, {MemoryKind.LORE: 5, MemoryKind.RULE: 5}, tags=["castle", "GATE"])
+        self.assertEqual([m.id for m in tagged[MemoryKind.LORE]], [two.id, one.id])
+        self.assertEqual([m.id for m in tagged[MemoryKind.RULE]], [rule.id])
+        self.assertEqual(mems.tag_overlap_counts([one.id, two.id, self.lore[0].id], ["castle", "gate"]), {one.id: 1, two.id: 2})
+
+        # Triggers keep the index in sync with updates and deletes
+        mems.update(one.id, tags=["gate", "castle"])
+        mems.delete(rule.id)
+        self.assertEqual(mems.tag_overlap_counts([one.id, rule.id], ["castle", "gate"]), {one.id: 2})
+        self.assertEqual([m.id for m in mems.query(self.session.id, tags=["Gate"])], [one.id, two.id])
+
+    def test_tag_index_backfills_existing_rows(self):
+        self.db.memories.create(self.session.id, MemoryKind.LORE, "Tagged", tags=["moon"])
+        self.db.conn.execute("DELETE FROM memory_tags")
+        self.db.memories.create_table()
+        self.assertEqual(len(self.db.memories.query(self.session.id, tags=["moon"])), 1)
+
+    def test_recent_tags_use_absolute_rounds(self):
+        self.db.messages.append(self.session.id, [
+            Message(role="user" if i % 2 == 0 else "assistant", content=f"Message {i}") for i in range(150)
+        ])
+        self.db.turn_metadata.create(self.session.id, 1, 49, "Old round", ["swamp"], 3)
+        self.db.turn_metadata.create(self.session.id, 1, 74, "Latest round", ["castle"], 3)
+        tagged = self.db.memories.create(self.session.id, MemoryKind.LORE, "Towers", tags=["castle"])
+
+        session = Session("s")
+        session.id = self.session.id
+        history = ContextBuilder(self.db, None, None, None, None).get_truncated_history(session, 100)
+        self.assertEqual(session.history_offset, 50)
+
+        retriever = MemoryRetriever(self.db, None, engine=_engine())
+        with patch.object(self.db.turn_metadata, "get_range", wraps=self.db.turn_metadata.get_range) as get_range:
+            candidates = retriever.gather_candidates(session, history)
+
+        self.assertEqual(get_range.call_args.kwargs, {"start_round": 73, "end_round": 75})
+        self.assertIn(tagged.id, [mid for mid, _ in candidates.codex[MemoryKind.LORE]])
+
+    def test_one_rerank_call_for_all_kinds(self):
+        self.db.memories.create(self.session.id, MemoryKind.RULE, "Entry rules for the lore archive")
+        engine = _engine()
+        engine.can_rerank = True
+        # Deterministic "cross-encoder": longer documents score higher
+        engine.rerank.side_effect = lambda q, docs, memory_ids=None: [float(len(d)) for d in docs]
+        retriever = MemoryRetriever(self.db, None, engine=engine)
+        history = [Message(role="assistant", content="The lore archive"), Message(role="user", content="entry")]
+
+        result = retriever.get_relevant(self.session, history)
+
+        engine.rerank.assert_called_once()
+        self.assertEqual(len(result[MemoryKind.LORE]), 3)
+        self.assertEqual(result[MemoryKind.RULE][0].content, "Entry rules for the lore archive")
+        self.assertIn(MemoryKind.EPISODIC, result)
+
+
+if __name__ == "__main__":
+    unittest.main()
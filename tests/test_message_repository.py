@@ -0,0 +1,72 @@
+import json
+import os
+import tempfile
+import unittest
+
+from app.database.db_manager import DBManager
+from app.models.message import Message
+from app.models.session import Session
+
+
+class TestMessageRepository(unittest.TestCase):
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.addCleanup(os.remove, self.db_path)
+
+        self.db = DBManager(self.db_path).__enter__()
+        self.addCleanup(self.db.__exit__, None, None, None)
+        self.db.create_tables()
+        self.db.conn.execute("INSERT INTO prompts (id, name, content) VALUES (1, 'p', 'c')")
+        self.session_id = self.db.sessions.create("s", Session("s").to_json(), 1).id
+
+    def _msgs(self, n, start=0):
+        return [Message(role="user" if i % 2 == 0 else "assistant", content=f"m{i}") for i in range(start, start + n)]
+
+    def test_append_tail_and_range(self):
+        self.assertEqual(self.db.messages.append(self.session_id, self._msgs(5)), 0)
+        self.assertEqual(self.db.messages.append(self.session_id, self._msgs(2, start=5)), 5)
+
+        self.assertEqual(self.db.messages.count(self.session_id), 7)
+        self.assertEqual([m.content for m in self.db.messages.tail(self.session_id, 3)], ["m4", "m5", "m6"])
+        self.assertEqual([m.content for m in self.db.messages.range(self.session_id, 1, 3)], ["m1", "m2"])
+
+    def test_truncate_and_update(self):
+        self.db.messages.append(self.session_id, self._msgs(4))
+        self.db.messages.truncate(self.session_id, 2)
+        self.db.messages.update(self.session_id, 1, Message(role="assistant", content="edited"))
+
+        self.assertEqual([m.content for m in self.db.messages.get_all(self.session_id)], ["m0", "edited"])
+        self.assertEqual(self.db.messages.append(self.session_id, self._msgs(1)), 2)
+
+    def test_migrates_legacy_history_blob(self):
+        legacy = {
+            "session_id": "s",
+            "system_prompt": "sys",
+            "history": [m.model_dump() for m in self._msgs(3)],
+            "setup_phase_data": "{}",
+        }
+        legacy_id = self.db.sessions.create("legacy", json.dumps(legacy), 1).id
+
+        self.assertEqual(self.db.messages.migrate_session_blobs(), 1)
+        self.assertEqual(len(self.db.messages.get_all(legacy_id)), 3)
+
+        header = json.loads(self.db.sessions.get_by_id(legacy_id).session_data)
+        self.assertNotIn("history", header)
+        self.assertEqual(header["system_prompt"], "sys")
+        self.assertEqual(self.db.messages.migrate_session_blobs(), 0)
+
+    def test_session_window_tracks_pending_messages(self):
+        self.db.messages.append(self.session_id, self._msgs(10))
+        window = Session("s")
+        window.history = self.db.messages.tail(self.session_id, 4)
+        window.history_offset = 6
+        window.mark_persisted()
+
+        window.history.append(Message(role="assistant", content="new"))
+        self.assertEqual(window.next_index(), 11)
+        self.assertEqual([m.content for m in window.pending_messages()], ["new"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,180 @@
+import json
+import os
+import queue
+import tempfile
+import threading
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from app.core.react_turn_manager import ReActTurnManager
+from app.llm.llm_connector import LLMResponse, LLMStreamEvent, StreamEventKind
+from app.models.message import Message
+from app.models.vocabulary import MessageRole
+from app.tools.executor import ToolExecutor
+from app.tools.schemas import Adjust, ContextRetrieve, Roll, StateQuery, is_read_only
+
+
+class FakeRegistry:
+    """Records which connection and thread each call ran on."""
+
+    def __init__(self, barrier: threading.Barrier | None = None):
+        self.barrier = barrier
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def execute(self, call, context=None):
+        with self._lock:
+            self.calls.append((call.name, context["db_manager"], threading.current_thread().name))
+        if self.barrier and call.name in ("state.query", "context.retrieve"):
+            # Only passes if the read-only calls are in flight at the same time
+            self.barrier.wait()
+        if call.name == "context.retrieve":
+            raise RuntimeError("index offline")
+        return {"value": getattr(call, "key", None) or call.name}
+
+
+class TestParallelToolExecution(unittest.TestCase):
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.addCleanup(os.remove, self.db_path)
+        self.session = SimpleNamespace(id=1)
+
+    def _executor(self, registry, db_path=None):
+        db = SimpleNamespace(db_path=db_path or self.db_path, game_state=None)
+        return ToolExecutor(registry, db, None, ui_queue=queue.Queue())
+
+    def test_schemas_mark_read_only_tools(self):
+        self.assertTrue(is_read_only(StateQuery))
+        self.assertTrue(is_read_only(Roll(formula="1d20", reason="r")))
+        self.assertFalse(is_read_only(Adjust(path="resources.hp", delta=-1)))
+        self.assertNotIn("read_only", StateQuery.model_fields)
+
+    def test_mutations_split_read_groups(self):
+        calls = [
+            StateQuery(entity_type="character", key="a"),
+            ContextRetrieve(query="q"),
+            Adjust(path="resources.hp", delta=-1),
+            Adjust(path="resources.hp", delta=-2),
+            StateQuery(entity_type="character", key="b"),
+        ]
+        groups = self._executor(FakeRegistry())._plan_groups(calls)
+        self.assertEqual([[c.name for c in g] for g in groups], [
+            ["state.query", "context.retrieve"], ["adjust"], ["adjust"], ["state.query"],
+        ])
+
+    def test_read_only_calls_run_concurrently_in_order(self):
+        registry = FakeRegistry(barrier=threading.Barrier(3, timeout=5))
+        executor = self._executor(registry)
+        calls = [
+            StateQuery(entity_type="character", key="a"),
+            ContextRetrieve(query="q"),
+            StateQuery(entity_type="character", key="b"),
+        ]
+
+        results, _ = executor.execute(calls, self.session, {}, tool_budget=3)
+
+        self.assertEqual([r["name"] for r in results], ["state.query", "context.retrieve", "state.query"])
+        self.assertEqual(results[0]["result"], {"value": "a"})
+        self.assertEqual(results[1]["error"], "index offline")
+        self.assertEqual(results[2]["result"], {"value": "b"})
+        # Workers read through their own connection, never the turn's
+        self.assertTrue(all(db is not executor.db for _, db, _ in registry.calls))
+        self.assertTrue(all(t.startswith("ToolWorker") for _, _, t in registry.calls))
+
+    def test_mutating_calls_run_on_caller_thread(self):
+        registry = FakeRegistry()
+        executor = self._executor(registry)
+        calls = [Adjust(path="resources.hp", delta=-1), StateQuery(entity_type="character", key="a")]
+
+        executor.execute(calls, self.session, {}, tool_budget=2)
+
+        self.assertEqual([(name, db) for name, db, _ in registry.calls], [
+            ("adjust", executor.db), ("state.query", executor.db),
+        ])
+
+    def test_in_memory_database_falls_back_to_sequential(self):
+        registry = FakeRegistry()
+        executor = self._executor(registry, db_path=":memory:")
+        calls = [StateQuery(entity_type="character", key="a"), StateQuery(entity_type="character", key="b")]
+
+        results, _ = executor.execute(calls, self.session, {}, tool_budget=2)
+
+        self.assertEqual([r["result"]["value"] for r in results], ["a", "b"])
+        self.assertEqual({t for _, _, t in registry.calls}, {threading.current_thread().name})
+
+
+class TestReActToolBatch(unittest.TestCase):
+    def setUp(self):
+        orchestrator = MagicMock()
+        orchestrator.ui_queue = queue.Queue()
+        orchestrator.tool_registry.get_all_tool_types.return_value = [StateQuery, Adjust]
+        self.manager = ReActTurnManager(orchestrator)
+
+    def test_messages_follow_call_order(self):
+        executor = MagicMock()
+        executor.execute.return_value = (
+            [
+                {"name": "state.query", "arguments": {}, "result": {"value": 1}},
+                {"name": "adjust", "error": "no such path"},
+            ],
+            False,
+        )
+        calls = [
+            {"id": "c1", "name": "state.query", "arguments": {"entity_type": "character", "key": "a"}},
+            {"id": "c2", "name": "missing.tool", "arguments": {}},
+            {"id": "c3", "name": "adjust", "arguments": {"path": "resources.hp", "delta": -1}},
+        ]
+
+        messages = self.manager._execute_tool_calls(
+            calls, executor, SimpleNamespace(game_time=None), {}, {}, "turn-1"
+        )
+
+        self.assertEqual([m.tool_call_id for m in messages], ["c1", "c2", "c3"])
+        self.assertEqual(json.loads(messages[0].content), {"value": 1})
+        self.assertIn("not found", json.loads(messages[1].content)["error"])
+        self.assertEqual(json.loads(messages[2].content), {"error": "no such path"})
+        self.assertEqual(executor.execute.call_count, 1)
+        self.assertEqual(executor.execute.call_args.kwargs["tool_budget"], 2)
+
+    def test_streamed_read_only_calls_overlap(self):
+        fd, db_path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.addCleanup(os.remove, db_path)
+        registry = FakeRegistry(barrier=threading.Barrier(2, timeout=5))
+        executor = ToolExecutor(registry, SimpleNamespace(db_path=db_path, game_state=None), None, ui_queue=queue.Queue())
+        calls = [
+            {"id": "c1", "name": "state.query", "arguments": {"entity_type": "character", "key": "a"}},
+            {"id": "c2", "name": "state.query", "arguments": {"entity_type": "character", "key": "b"}},
+            {"id": "c3", "name": "adjust", "arguments": {"path": "resources.hp", "delta": -1}},
+        ]
+        order = []
+
+        def events(**kwargs):
+            for call in calls:
+                yield LLMStreamEvent(StreamEventKind.TOOL_CALL, tool_call=call)
+            yield LLMStreamEvent(StreamEventKind.DONE, response=LLMResponse(content="", tool_calls=calls))
+
+        def run_tool(call_data):
+            # Both reads were joined before the write runs
+            order.append((call_data["name"], len(registry.calls)))
+            return Message(role=MessageRole.TOOL, tool_call_id=call_data["id"], name=call_data["name"], content="{}")
+
+        session = SimpleNamespace(id=1, game_time=None)
+        self.manager.orchestrator.stop_event.is_set.return_value = False
+        self.manager.llm_connector.stream_chat_with_tools = events
+        _, messages = self.manager._stream_llm_step(
+            "sys", "ctx", [], [], "t1", run_tool,
+            lambda call: self.manager._start_read_only_call(call, executor, session, {}, {}, "t1"),
+        )
+
+        # The barrier only opens if both reads are in flight at the same time
+        self.assertEqual([m.tool_call_id for m in messages], ["c1", "c2", "c3"])
+        self.assertEqual([json.loads(m.content) for m in messages[:2]], [{"value": "a"}, {"value": "b"}])
+        self.assertEqual(order, [("adjust", 2)])
+        self.assertTrue(all(t.startswith("ToolWorker") for _, _, t in registry.calls))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+import queue
+import threading
+import unittest
+from dataclasses import replace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.core.post_turn_stage import PostTurnJob, PostTurnStage
+from app.core.react_turn_manager import ReActTurnManager
+from app.llm.llm_connector import LLMIOLoop
+from app.llm.schemas import TurnMetadata, TurnSuggestions, TurnWrapUp
+from app.models.message import Message
+from app.models.vocabulary import UIEventType
+
+
+def _job(session_id=1, turn_id="t1"):
+    return PostTurnJob(
+        session_id=session_id,
+        prompt_id=7,
+        turn_id=turn_id,
+        round_number=3,
+        system_prompt="sys",
+        history=[Message(role="assistant", content="The door creaks open.")],
+    )
+
+
+class TestPostTurnStage(unittest.TestCase):
+    def test_newer_turns_supersede_waiting_suggestions(self):
+        started = threading.Event()
+        release = threading.Event()
+        ran = []
+
+        def runner(job):
+            ran.append((job.turn_id, job.suggestions))
+            started.set()
+            release.wait(5)
+
+        stage = PostTurnStage(runner, workers=2)
+        stage.submit(_job(turn_id="t1"))
+        self.assertTrue(started.wait(5))
+        stage.submit(_job(turn_id="t2"))
+        stage.submit(_job(turn_id="t3"))
+        self.assertTrue(stage.pending(1))
+
+        release.set()
+        self.assertTrue(stage.wait(1, timeout=5))
+        # Every turn is chronicled; only the latest waiting turn still gets suggestions
+        self.assertEqual(ran, [("t1", True), ("t2", False), ("t3", True)])
+
+    def test_sessions_run_concurrently(self):
+        barrier = threading.Barrier(2, timeout=5)
+        stage = PostTurnStage(lambda job: barrier.wait(), workers=2)
+
+        stage.submit(_job(session_id=1))
+        stage.submit(_job(session_id=2))
+
+        self.assertTrue(stage.wait(1, timeout=5))
+        self.assertTrue(stage.wait(2, timeout=5))
+        self.assertFalse(barrier.broken)
+
+    def test_full_queue_drops_oldest_waiting_suggestions(self):
+        started = threading.Event()
+        release = threading.Event()
+        ran = []
+
+        def runner(job):
+            ran.append((job.session_id, job.suggestions))
+            started.set()
+            release.wait(5)
+
+        stage = PostTurnStage(runner, workers=1, max_pending=1)
+        stage.submit(_job(session_id=1))
+        self.assertTrue(started.wait(5))
+        stage.submit(_job(session_id=2))
+        stage.submit(_job(session_id=3))
+
+        release.set()
+        self.assertTrue(stage.wait(2, timeout=5))
+        self.assertTrue(stage.wait(3, timeout=5))
+        self.assertEqual(ran, [(1, True), (2, False), (3, True)])
+
+
+class TestPostTurnRunner(unittest.TestCase):
+    def setUp(self):
+        self.orchestrator = MagicMock()
+        self.orchestrator.ui_queue = queue.Queue()
+        self.orchestrator.active_turn_id = "t1"
+        self.connector = self.orchestrator.llm_connector
+        self.manager = ReActTurnManager(self.orchestrator)
+
+        persist_patch = patch("app.core.react_turn_manager.TurnMetadataService")
+        db_patch = patch("app.core.react_turn_manager.DBManager")
+        self.persist = persist_patch.start().return_value.persist
+        db_patch.start()
+        self.addCleanup(persist_patch.stop)
+        self.addCleanup(db_patch.stop)
+
+    def test_combined_call(self):
+        self.connector.get_structured_response.return_value = TurnWrapUp(
+            choices=["Run", "Hide", "Talk"], summary="A door opened.", tags=[" door ", ""], importance=4
+        )
+
+        self.manager._run_post_turn(_job())
+
+        self.assertEqual(self.connector.get_structured_response.call_count, 1)
+        event = self.orchestrator.ui_queue.get_nowait()
+        self.assertEqual(event["type"], UIEventType.CHOICES)
+        self.assertEqual(event["choices"], ["Run", "Hide", "Talk"])
+        self.persist.assert_called_once_with(
+            session_id=1, prompt_id=7, round_number=3, summary="A door opened.", tags=["door"], importance=4, turn_id="t1"
+        )
+
+    @patch.dict("os.environ", {"POST_TURN_COMBINED": "False"})
+    def test_separate_calls_when_combined_is_off(self):
+        self.connector.io_loop = LLMIOLoop("test-post-turn")
+
+        async def structured(system_prompt, history, schema, temperature):
+            if schema is TurnSuggestions:
+                return TurnSuggestions(choices=["A", "B", "C"])
+            return TurnMetadata(summary="Quiet.", tags=["calm"], importance=2)
+
+        self.connector.async_get_structured_response = AsyncMock(side_effect=structured)
+        self.orchestrator.active_turn_id = "t2"  # A newer turn started meanwhile
+
+        self.manager._run_post_turn(_job())
+
+        self.assertEqual(self.connector.async_get_structured_response.await_count, 2)
+        self.assertTrue(self.orchestrator.ui_queue.empty())
+        self.assertEqual(self.persist.call_args.kwargs["tags"], ["calm"])
+
+    def test_superseded_turn_is_only_chronicled(self):
+        self.connector.io_loop = LLMIOLoop("test-post-turn-superseded")
+        self.connector.async_get_structured_response = AsyncMock(
+            return_value=TurnMetadata(summary="Older turn.", tags=["old"], importance=3)
+        )
+
+        self.manager._run_post_turn(replace(_job(), suggestions=False))
+
+        self.connector.get_structured_response.assert_not_called()
+        self.assertEqual(self.connector.async_get_structured_response.await_count, 1)
+        self.assertIs(self.connector.async_get_structured_response.await_args.args[2], TurnMetadata)
+        self.assertTrue(self.orchestrator.ui_queue.empty())
+        self.assertEqual(self.persist.call_args.kwargs["summary"], "Older turn.")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.llm.openai_connector import PROMPT_LAYOUT_PREFIX_STABLE, OpenAIConnector
+from app.models.message import Message
+
+ENV = {"OPENAI_API_BASE_URL": "http://localhost:8080/v1", "OPENAI_API_KEY": "k", "OPENAI_API_MODEL": "m"}
+
+
+class TestPrefixStableLayout(unittest.TestCase):
+    def setUp(self):
+        with patch.dict("os.environ", ENV):
+            self.connector = OpenAIConnector()
+        self.connector.prompt_layout = PROMPT_LAYOUT_PREFIX_STABLE
+
+        usage = SimpleNamespace(prompt_tokens=1200, prompt_tokens_details=SimpleNamespace(cached_tokens=1100))
+        message = SimpleNamespace(content="ok", tool_calls=None)
+        self.client = MagicMock()
+        self.client.chat.completions.create = AsyncMock(
+            return_value=SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+        )
+        self.connector._get_async_client = lambda: self.client
+
+    def _sent_messages(self, history, dynamic):
+        response = asyncio.run(self.connector.async_chat_with_tools("STATIC", history, [], dynamic_context=dynamic))
+        return self.client.chat.completions.create.call_args.kwargs["messages"], response
+
+    def test_system_message_is_stable_and_context_precedes_latest_user_message(self):
+        history = [
+            Message(role="user", content="look around"),
+            Message(role="assistant", content="A tavern."),
+            Message(role="user", content="order ale"),
+        ]
+        first, response = self._sent_messages(history, "scene: tavern, turn 1")
+        second, _ = self._sent_messages(history, "scene: tavern, turn 2")
+
+        self.assertEqual(first[0], {"role": "system", "content": "STATIC"})
+        self.assertEqual(first[:3], second[:3])
+        self.assertEqual(first[3]["content"], "scene: tavern, turn 1\n\norder ale")
+        self.assertEqual((response.prompt_tokens, response.cached_tokens), (1200, 1100))
+
+    def test_stable_prefix_length_stops_at_dynamic_context(self):
+        messages, _ = self._sent_messages([Message(role="user", content="hi")], "CTX")
+        prefix = OpenAIConnector.stable_prefix_length(messages, "CTX")
+        self.assertGreater(prefix, len("STATIC"))
+        self.assertLess(prefix, sum(len(str(m)) for m in messages))
+
+    def test_classic_layout_keeps_context_in_system_message(self):
+        self.connector.prompt_layout = "classic"
+        messages, _ = self._sent_messages([Message(role="user", content="hi")], "CTX")
+        self.assertEqual(messages[0]["content"], "STATIC\n\nCTX")
+        self.assertEqual(messages[1]["content"], "hi")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+from pydantic import BaseModel
+
+from app.llm.llm_connector import LLMConnector, LLMResponse, StreamEventKind, events_from_response
+from app.llm.replay_connector import CassetteMissError, RecordingConnector, ReplayConnector
+from app.models.message import Message
+
+
+class Verdict(BaseModel):
+    ok: bool
+
+
+class ScriptedConnector(LLMConnector):
+    """Answers every call from a fixed script, counting calls."""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    async def async_get_streaming_response(self, system_prompt, chat_history):
+        self.calls += 1
+        for chunk in ("Once ", "upon ", "a time"):
+            yield chunk
+
+    async def async_get_structured_response(self, system_prompt, chat_history, output_schema, temperature=0.7, top_p=0.9):
+        self.calls += 1
+        return output_schema(ok=True)
+
+    async def async_chat_with_tools(self, system_prompt, chat_history, tools, dynamic_context=None):
+        self.calls += 1
+        call = {"id": "c1", "name": "roll", "arguments": {"formula": "1d20"}}
+        return LLMResponse(content=f"reply to {chat_history[-1].content}", tool_calls=[call], prompt_tokens=10)
+
+    async def async_stream_chat_with_tools(self, system_prompt, chat_history, tools, dynamic_context=None):
+        response = await self.async_chat_with_tools(system_prompt, chat_history, tools, dynamic_context)
+        for event in events_from_response(response):
+            await asyncio.sleep(0.01)
+            yield event
+
+
+TOOLS = [{"type": "function", "function": {"name": "roll", "description": "Roll dice", "parameters": {}}}]
+
+
+class TestRecordReplay(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".jsonl")
+        os.close(handle)
+        os.remove(self.path)
+        self.addCleanup(lambda: os.path.exists(self.path) and os.remove(self.path))
+
+    def _record(self):
+        inner = ScriptedConnector()
+        recorder = RecordingConnector(inner, self.path)
+        history = [Message(role="user", content="hello", turn_id="live-turn")]
+        chat = recorder.chat_with_tools("sys", history, TOOLS, dynamic_context="ctx")
+        streamed = list(recorder.stream_chat_with_tools("sys", [Message(role="user", content="stream")], TOOLS))
+        verdict = recorder.get_structured_response("sys", history, Verdict)
+        text = "".join(recorder.get_streaming_response("sys", history))
+        return inner, chat, streamed, verdict, text
+
+    def test_replay_matches_recording(self):
+        inner, chat, streamed, verdict, text = self._record()
+        self.assertEqual(inner.calls, 4)
+
+        replay = ReplayConnector(self.path, strict=True)
+        # Turn ids differ between runs and are not part of the fingerprint
+        history = [Message(role="user", content="hello", turn_id="replayed-turn")]
+        self.assertEqual(replay.chat_with_tools("sys", history, TOOLS, dynamic_context="ctx"), chat)
+        replayed = list(replay.stream_chat_with_tools("sys", [Message(role="user", content="stream")], TOOLS))
+        self.assertEqual([e.kind for e in replayed], [e.kind for e in streamed])
+        self.assertEqual(replayed[-1].response, streamed[-1].response)
+        self.assertEqual(replay.get_structured_response("sys", history, Verdict), verdict)
+        self.assertEqual("".join(replay.get_streaming_response("sys", history)), text)
+        self.assertEqual(replay.misses, 0)
+
+    def test_stream_recording_serves_non_streamed_call(self):
+        self._record()
+        replay = ReplayConnector(self.path, strict=True)
+        response = replay.chat_with_tools("sys", [Message(role="user", content="stream")], TOOLS)
+        self.assertEqual(response.content, "reply to stream")
+
+    def test_unmatched_requests(self):
+        self._record()
+        history = [Message(role="user", content="something else")]
+
+        with self.assertRaises(CassetteMissError):
+            ReplayConnector(self.path, strict=True).chat_with_tools("sys", history, TOOLS)
+
+        lenient = ReplayConnector(self.path)
+        self.assertEqual(lenient.chat_with_tools("sys", history, TOOLS).content, "reply to hello")
+        self.assertEqual(lenient.misses, 1)
+
+    def test_simulated_latency(self):
+        self._record()
+        replay = ReplayConnector(self.path, simulate_latency=True, speed=0.5)
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+
+        async def timed():
+            started = loop.time()
+            kinds = [e.kind async for e in replay.async_stream_chat_with_tools("sys", [Message(role="user", content="stream")], TOOLS)]
+            return kinds, loop.time() - started
+
+        kinds, elapsed = loop.run_until_complete(timed())
+        self.assertEqual(kinds[-1], StreamEventKind.DONE)
+        # Four events recorded ~10 ms apart, replayed at half speed
+        self.assertGreaterEqual(elapsed, 0.06)
+
+
+if __name__ == "__main__":
+    unittest.main()
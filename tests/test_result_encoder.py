@@ -0,0 +1,73 @@
+import json
+import unittest
+from unittest.mock import patch
+
+from app.tools.result_encoder import encode_result
+
+
+class TestResultEncoder(unittest.TestCase):
+    def test_minified_without_empty_fields_or_echoed_arguments(self):
+        result = {"path": "resources.hp", "old_value": 5, "new_value": 4, "corrections": [], "reason": "hit"}
+        encoded = encode_result("adjust", result, {"path": "resources.hp", "delta": -1, "reason": "hit"})
+        self.assertEqual(encoded, '{"old_value":5,"new_value":4,"corrections":[]}')
+
+        nested = encode_result("state.query", {"value": {"name": "Ayla", "notes": None, "tags": []}})
+        self.assertEqual(json.loads(nested), {"value": {"name": "Ayla"}})
+        # A missing entity stays distinguishable from an empty result
+        self.assertEqual(json.loads(encode_result("state.query", {"value": None})), {"value": None})
+
+    def test_lists_are_capped(self):
+        encoded = json.loads(encode_result("roll", {"rolls": list(range(30))}, max_items=5))
+        self.assertEqual(encoded["rolls"], [0, 1, 2, 3, 4, "…(+25 more)"])
+
+    def test_state_query_collection_has_continuation(self):
+        npcs = {f"npc_{i}": {"name": f"N{i}"} for i in range(8)}
+        encoded = json.loads(
+            encode_result("state.query", {"value": npcs}, {"entity_type": "npc", "key": "*"}, max_items=3)
+        )
+        self.assertEqual(list(encoded["value"]), ["npc_0", "npc_1", "npc_2"])
+        self.assertEqual(encoded["more"]["total"], 8)
+        self.assertEqual(encoded["more"]["keys"], ["npc_3", "npc_4", "npc_5", "npc_6", "npc_7"])
+        self.assertIn("state.query", encoded["more"]["next"])
+
+    @patch.dict("os.environ", {"TOOL_RESULT_MAX_ITEMS": "20"})
+    def test_continuation_lists_every_remaining_key(self):
+        npcs = {f"npc_{i}": {"name": f"N{i}", "tags": [str(t) for t in range(30)]} for i in range(60)}
+        encoded = json.loads(encode_result("state.query", {"value": npcs}, {"entity_type": "npc", "key": "*"}))
+
+        self.assertEqual(len(encoded["value"]), 20)
+        # Entity data is still capped; only the handle is kept whole
+        self.assertEqual(encoded["value"]["npc_0"]["tags"][-1], "…(+10 more)")
+        self.assertEqual(encoded["more"]["keys"], [f"npc_{i}" for i in range(20, 60)])
+
+    def test_move_summarizes_location(self):
+        result = {
+            "status": "moved",
+            "from": "gate",
+            "to": "tavern",
+            "location_name": "The Tavern",
+            "ui_event": "location_change",
+            "location_data": {
+                "name": "The Tavern",
+                "description_visual": "Smoky.",
+                "connections": {
+                    "north": {"target_key": "gate", "display_name": "Gate", "is_hidden": False, "is_locked": True},
+                },
+            },
+        }
+        encoded = json.loads(encode_result("move", result, {"destination": "tavern"}))
+        self.assertNotIn("ui_event", encoded)
+        self.assertEqual(encoded["to"], "tavern")
+        self.assertEqual(encoded["location"]["exits"], {"north": "Gate (locked)"})
+
+    def test_context_retrieve_drops_ids(self):
+        result = {"query": "dragons", "kinds": [], "limit": 8, "text": "📜 Dragons fear silver.", "memory_ids": [1, 2]}
+        encoded = json.loads(encode_result("context.retrieve", result, {"query": "dragons"}))
+        self.assertEqual(encoded, {"text": "📜 Dragons fear silver.", "count": 2})
+
+    def test_errors_pass_through(self):
+        self.assertEqual(encode_result("adjust", {"error": "no such path"}), '{"error":"no such path"}')
+
+
+if __name__ == "__main__":
+    unittest.main()
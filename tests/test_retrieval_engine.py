@@ -0,0 +1,72 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from app.context.memory_retriever import MemoryRetriever
+from app.context.retrieval_engine import RetrievalEngine
+
+
+class TestRetrievalEngine(unittest.TestCase):
+    def setUp(self):
+        nltk_patch = patch("app.context.retrieval_engine.nltk")
+        encoder_patch = patch("app.context.retrieval_engine.TextCrossEncoder")
+        self.mock_nltk = nltk_patch.start()
+        self.mock_encoder_cls = encoder_patch.start()
+        self.addCleanup(nltk_patch.stop)
+        self.addCleanup(encoder_patch.stop)
+
+        self.mock_nltk.pos_tag.side_effect = lambda words: [(w, "NN") for w in words]
+        self.mock_encoder_cls.return_value.rerank.side_effect = lambda q, docs: [float(len(d)) for d in docs]
+
+    def test_warm_up_loads_resources_once(self):
+        engine = RetrievalEngine()
+        engine.warm_up()
+        engine.warm_up()
+
+        self.assertTrue(engine.nltk_ready)
+        self.assertEqual(self.mock_encoder_cls.call_count, 1)
+        self.assertEqual(self.mock_nltk.download.call_count, 4)
+
+    def test_retrievers_share_engine_and_keyword_cache(self):
+        engine = RetrievalEngine()
+        first = MemoryRetriever(MagicMock(), None, engine=engine)
+        second = MemoryRetriever(MagicMock(), None, engine=engine)
+
+        first.extract_keywords("goblin attacks village")
+        second.extract_keywords("goblin attacks village")
+
+        self.assertEqual(self.mock_encoder_cls.call_count, 1)
+        self.assertEqual(self.mock_nltk.pos_tag.call_count, 1)
+        self.assertEqual(engine.keyword_cache_info().hits, 1)
+
+    def test_rerank_scores(self):
+        engine = RetrievalEngine()
+        self.assertEqual(engine.rerank("q", ["a", "abc"]), [1.0, 3.0])
+
+    def test_rerank_scores_are_cached_per_memory(self):
+        engine = RetrievalEngine()
+        model = self.mock_encoder_cls.return_value
+
+        self.assertEqual(engine.rerank("goblin cave", ["a", "abc"], memory_ids=[1, 2]), [1.0, 3.0])
+        # Same keywords in another order, one new memory: only the new one is scored
+        self.assertEqual(engine.rerank("cave Goblin", ["a", "abc", "ab"], memory_ids=[1, 2, 3]), [1.0, 3.0, 2.0])
+        self.assertEqual(model.rerank.call_args_list[-1].args, ("cave Goblin", ["ab"]))
+
+        # Changed content is a different key
+        engine.rerank("goblin cave", ["abcd"], memory_ids=[1])
+        self.assertEqual(model.rerank.call_args_list[-1].args, ("goblin cave", ["abcd"]))
+
+        info = engine.rerank_cache_info()
+        self.assertEqual((info["hits"], info["misses"], info["size"]), (2, 4, 4))
+        self.assertAlmostEqual(info["hit_rate"], 2 / 6)
+
+    def test_rerank_unavailable_falls_back_to_input_order(self):
+        self.mock_encoder_cls.side_effect = RuntimeError("no model")
+        engine = RetrievalEngine()
+        retriever = MemoryRetriever(MagicMock(), None, engine=engine)
+
+        mems = [(1, MagicMock(content="x")), (2, MagicMock(content="y"))]
+        self.assertEqual(retriever._rerank_candidates("query", mems), [m for _, m in mems])
+
+
+if __name__ == "__main__":
+    unittest.main()
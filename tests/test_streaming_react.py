@@ -0,0 +1,131 @@
+import asyncio
+import queue
+import unittest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.core.react_turn_manager import ReActTurnManager
+from app.llm.llm_connector import LLMResponse, LLMStreamEvent, StreamEventKind
+from app.llm.openai_connector import OpenAIConnector
+from app.models.message import Message
+from app.models.vocabulary import MessageRole, UIEventType
+
+ENV = {"OPENAI_API_BASE_URL": "http://localhost:8080/v1", "OPENAI_API_KEY": "k", "OPENAI_API_MODEL": "m"}
+
+
+def _chunk(content=None, tool_calls=None, finish_reason=None):
+    delta = SimpleNamespace(content=content, tool_calls=tool_calls)
+    return SimpleNamespace(choices=[SimpleNamespace(delta=delta, finish_reason=finish_reason)], usage=None)
+
+
+def _fragment(index, id=None, name=None, arguments=None):
+    return SimpleNamespace(index=index, id=id, function=SimpleNamespace(name=name, arguments=arguments))
+
+
+class FakeStream:
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.closed = False
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for chunk in self.chunks:
+            yield chunk
+
+    async def close(self):
+        self.closed = True
+
+
+class TestOpenAIStreaming(unittest.TestCase):
+    def test_assembles_tool_calls_incrementally(self):
+        with patch.dict("os.environ", ENV):
+            connector = OpenAIConnector()
+        stream = FakeStream([
+            _chunk(content="You draw "),
+            _chunk(content="your sword."),
+            _chunk(tool_calls=[_fragment(0, id="call_a", name="roll", arguments='{"spec"')]),
+            _chunk(tool_calls=[_fragment(0, arguments=': "1d20"}')]),
+            _chunk(tool_calls=[_fragment(1, id="call_b", name="note", arguments='{"text": "x"}')]),
+            _chunk(finish_reason="tool_calls"),
+        ])
+        client = MagicMock()
+        client.chat.completions.create = AsyncMock(return_value=stream)
+        connector._get_async_client = lambda: client
+
+        async def collect():
+            return [e async for e in connector.async_stream_chat_with_tools("sys", [Message(role="user", content="go")], [])]
+
+        events = asyncio.run(collect())
+        kinds = [e.kind for e in events]
+
+        # The first call is released as soon as the second one starts, not at the end of the stream
+        self.assertEqual(kinds, ["content", "content", "tool_call", "tool_call", "done"])
+        self.assertEqual(events[2].tool_call, {"name": "roll", "arguments": {"spec": "1d20"}, "id": "call_a"})
+        self.assertEqual(events[-1].response.content, "You draw your sword.")
+        self.assertEqual([c["id"] for c in events[-1].response.tool_calls], ["call_a", "call_b"])
+        self.assertTrue(stream.closed)
+
+    def test_calls_without_index_are_split_by_id(self):
+        with patch.dict("os.environ", ENV):
+            connector = OpenAIConnector()
+        stream = FakeStream([
+            _chunk(tool_calls=[_fragment(None, id="call_a", name="roll", arguments='{"spec"')]),
+            _chunk(tool_calls=[_fragment(None, arguments=': "1d20"}')]),
+            _chunk(tool_calls=[_fragment(None, id="call_b", name="note", arguments='{"text": "x"}')]),
+            _chunk(finish_reason="tool_calls"),
+        ])
+        client = MagicMock()
+        client.chat.completions.create = AsyncMock(return_value=stream)
+        connector._get_async_client = lambda: client
+
+        async def collect():
+            return [e async for e in connector.async_stream_chat_with_tools("sys", [Message(role="user", content="go")], [])]
+
+        events = asyncio.run(collect())
+
+        self.assertEqual([e.kind for e in events], ["tool_call", "tool_call", "done"])
+        self.assertEqual(events[-1].response.tool_calls, [
+            {"name": "roll", "arguments": {"spec": "1d20"}, "id": "call_a"},
+            {"name": "note", "arguments": {"text": "x"}, "id": "call_b"},
+        ])
+
+
+class TestReActStreamingStep(unittest.TestCase):
+    def setUp(self):
+        self.orchestrator = MagicMock()
+        self.orchestrator.stop_event.is_set.return_value = False
+        self.orchestrator.ui_queue = queue.Queue()
+        self.manager = ReActTurnManager(self.orchestrator)
+
+    def test_tools_run_before_stream_finishes(self):
+        order = []
+        call = {"name": "roll", "arguments": {}, "id": "c1"}
+
+        def events(**kwargs):
+            yield LLMStreamEvent(StreamEventKind.THOUGHT, text="hmm")
+            yield LLMStreamEvent(StreamEventKind.CONTENT, text="Rolling")
+            yield LLMStreamEvent(StreamEventKind.TOOL_CALL, tool_call=call)
+            order.append("stream continued")
+            yield LLMStreamEvent(StreamEventKind.DONE, response=LLMResponse(content="Rolling", tool_calls=[call]))
+
+        self.manager.llm_connector.stream_chat_with_tools = events
+
+        def run_tool(call_data):
+            order.append("tool")
+            return Message(role=MessageRole.TOOL, tool_call_id=call_data["id"], name=call_data["name"], content="{}")
+
+        response, tool_messages = self.manager._stream_llm_step("sys", "ctx", [], [], "t1", run_tool)
+
+        self.assertEqual(order, ["tool", "stream continued"])
+        self.assertEqual(response.content, "Rolling")
+        self.assertEqual([m.tool_call_id for m in tool_messages], ["c1"])
+
+        deltas = [self.orchestrator.ui_queue.get_nowait() for _ in range(2)]
+        self.assertEqual([d["type"] for d in deltas], [UIEventType.STREAM_DELTA] * 2)
+        self.assertEqual([(d["kind"], d["text"]) for d in deltas], [("thought", "hmm"), ("content", "Rolling")])
+
+
+if __name__ == "__main__":
+    unittest.main()
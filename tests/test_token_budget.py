@@ -0,0 +1,104 @@
+import json
+import unittest
+
+from app.context.token_budget import (
+    TRUNCATION_MARKER,
+    ApproxTokenizer,
+    TokenBudget,
+    compact_tool_content,
+    fit_text,
+    get_tokenizer,
+)
+from app.models.message import Message
+
+
+class TestTokenizers(unittest.TestCase):
+    def test_approx_counts(self):
+        tokenizer = ApproxTokenizer()
+        self.assertEqual(tokenizer.count(""), 0)
+        self.assertEqual(tokenizer.count("abcd"), 1)
+        self.assertEqual(tokenizer.count("abcde"), 2)
+        self.assertEqual(ApproxTokenizer(2).count("abcd"), 2)
+
+    def test_spec_parsing(self):
+        self.assertEqual(get_tokenizer("approx:3").name, "approx/3")
+        # Unknown specs fall back to the approximation
+        self.assertTrue(get_tokenizer("nonsense").name.startswith("approx"))
+
+
+class TestFitting(unittest.TestCase):
+    def setUp(self):
+        self.tokenizer = ApproxTokenizer()
+
+    def test_fit_text_cuts_on_a_line_and_marks_it(self):
+        text = "\n".join(f"line {i:03d} with some padding" for i in range(100))
+        fitted = fit_text(text, 50, self.tokenizer)
+        self.assertLessEqual(self.tokenizer.count(fitted), 50)
+        self.assertTrue(fitted.endswith(TRUNCATION_MARKER))
+        self.assertTrue(text.startswith(fitted[: -len(TRUNCATION_MARKER)]))
+        self.assertEqual(fit_text("short", 50, self.tokenizer), "short")
+
+    def test_compact_tool_content_reencodes_json_first(self):
+        payload = json.dumps({"items": [{"name": f"n{i}", "hp": i} for i in range(10)]}, indent=4)
+        compact = json.dumps(json.loads(payload), separators=(",", ":"))
+        limit = self.tokenizer.count(compact)
+        self.assertEqual(compact_tool_content(payload, limit, self.tokenizer), compact)
+
+    def test_section_limits_follow_fixed_sizes(self):
+        budget = TokenBudget(self.tokenizer, context_window=2000, output_reserve=0)
+        before = budget.limit("rag")
+        budget.record("static", "x" * 4000)  # 1000 tokens
+        self.assertEqual(budget.limit("rag"), before // 2)
+        self.assertEqual(budget.limit("unknown"), 0)
+
+        fitted = budget.fit("rag", "word " * 1000)
+        self.assertLessEqual(budget.sizes["rag"], budget.limit("rag"))
+        self.assertTrue(fitted.endswith(TRUNCATION_MARKER))
+
+
+class TestPackHistory(unittest.TestCase):
+    def setUp(self):
+        self.tokenizer = ApproxTokenizer()
+
+    def _history(self):
+        return [
+            Message(role="user", content="u" * 400),
+            Message(role="assistant", content="a" * 400, tool_calls=[{"id": "c1", "name": "roll", "arguments": {}}]),
+            Message(role="tool", tool_call_id="c1", name="roll", content="t" * 400),
+            Message(role="assistant", content="a" * 400),
+            Message(role="user", content="u" * 400),
+        ]
+
+    def test_packs_newest_first(self):
+        budget = TokenBudget(self.tokenizer, context_window=320, output_reserve=0)
+        packed = budget.pack_history(self._history())
+        self.assertEqual([m.role for m in packed], ["assistant", "user"])
+        self.assertEqual(budget.sizes["history"], 2 * 104)
+
+    def test_never_starts_with_tool_results(self):
+        budget = TokenBudget(self.tokenizer, context_window=420, output_reserve=0)
+        packed = budget.pack_history(self._history())
+        self.assertEqual([m.role for m in packed], ["assistant", "user"])
+
+    def test_latest_message_always_kept(self):
+        budget = TokenBudget(self.tokenizer, context_window=10, output_reserve=0)
+        packed = budget.pack_history(self._history())
+        self.assertEqual(len(packed), 1)
+        self.assertEqual(packed[0].role, "user")
+
+    def test_oversized_tool_results_are_compacted(self):
+        budget = TokenBudget(self.tokenizer, context_window=10_000, output_reserve=0, tool_result_tokens=20)
+        packed = budget.pack_history(self._history())
+        self.assertEqual(len(packed), 5)
+        self.assertLessEqual(self.tokenizer.count(packed[2].content), 20)
+        self.assertEqual(len(packed[3].content), 400)
+
+    def test_reserve_is_held_back(self):
+        budget = TokenBudget(self.tokenizer, context_window=320, output_reserve=0)
+        packed = budget.pack_history(self._history(), reserve=150)
+        self.assertEqual(len(packed), 1)
+        self.assertEqual(budget.sizes["history"], 150 + 104)
+
+
+if __name__ == "__main__":
+    unittest.main()
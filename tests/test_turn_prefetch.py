@@ -0,0 +1,150 @@
+import json
+import os
+import re
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock
+
+from app.context.context_builder import ContextBuilder
+from app.context.memory_retriever import MemoryRetriever
+from app.context.state_context import StateContextBuilder
+from app.context.token_budget import TokenBudget
+from app.core.turn_prefetcher import TurnPrefetcher
+from app.database.db_manager import DBManager
+from app.models.message import Message
+from app.models.session import Session
+from app.models.vocabulary import MemoryKind
+from app.prefabs.manifest import SystemManifest
+
+MANIFESTS = Path(__file__).resolve().parents[1] / "app" / "data" / "manifests"
+
+
+def _engine():
+    engine = MagicMock()
+    engine.extract_keywords.side_effect = lambda text, min_length=3: [
+        w for w in re.findall(r"\w+", text.lower()) if len(w) >= min_length
+    ]
+    engine.can_rerank = True
+    # Deterministic "cross-encoder": count query words in the document
+    engine.rerank.side_effect = lambda q, docs, memory_ids=None: [float(sum(w in d.lower() for w in q.split())) for d in docs]
+    return engine
+
+
+class TestTurnPrefetch(unittest.TestCase):
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.addCleanup(os.remove, self.db_path)
+
+        self.db = DBManager(self.db_path).__enter__()
+        self.addCleanup(self.db.__exit__, None, None, None)
+        self.db.create_tables()
+
+        manifest_id = self.db.manifests.create(SystemManifest.from_file(MANIFESTS / "dnd_35e.json"))
+        prompt = self.db.prompts.create("p", "You are the GM.")
+        header = Session("s", system_prompt="You are the GM.").to_json()
+        self.game_session = self.db.sessions.create("game", header, prompt.id, json.dumps({"manifest_id": manifest_id}))
+        self.manifest_id = manifest_id
+
+        self.db.messages.append(self.game_session.id, [
+            Message(role="user", content="I enter the tavern."),
+            Message(role="assistant", content="The tavern keeper polishes a goblet and eyes the dragon mural."),
+        ])
+        self.db.game_state.set_entity(self.game_session.id, "character", "player", {"name": "Ayla"})
+        for content in ("Dragons fear silver goblets.", "The tavern keeper owes the thieves guild.", "Silver is rare here."):
+            self.db.memories.create(self.game_session.id, MemoryKind.LORE, content, tags=["lore"])
+
+        self.engine = _engine()
+        self.prefetcher = TurnPrefetcher(self.db_path, MagicMock(), None, self.engine, history_limit=50)
+
+    def _turn_session(self, user_input: str) -> Session:
+        """What a turn sees: the stored history plus the player's new message."""
+        self.db.messages.append(self.game_session.id, [Message(role="user", content=user_input)])
+        session = Session.from_json(self.game_session.session_data)
+        session.id = self.game_session.id
+        session.history = self.db.messages.tail(session.id, 50)
+        return session
+
+    def test_prefetch_matches_cold_turn_context(self):
+        prefetch = self.prefetcher._build(self.game_session)
+        session = self._turn_session("I ask about the silver dragon.")
+
+        manifest = self.db.manifests.get_by_id(self.manifest_id)
+        key = self.prefetcher.make_key(self.db, self.game_session, session, self.manifest_id)
+        self.assertTrue(prefetch.matches(key, manifest))
+
+        retriever = MemoryRetriever(self.db, None, engine=self.engine)
+        builder = ContextBuilder(
+            self.db, None, StateContextBuilder(MagicMock(), self.db), retriever, None, manifest=manifest
+        )
+        self.assertEqual(prefetch.static_instruction, builder.build_static_system_instruction(self.game_session))
+        self.assertEqual(prefetch.dynamic_context, builder.build_dynamic_context(self.game_session, session.history))
+
+        cold = retriever.get_relevant(session, recent_messages=session.history)
+        warm = retriever.rank_candidates(retriever.refine_candidates(prefetch.candidates, session.history[-1].content))
+        self.assertEqual(
+            {k: [m.id for m in v] for k, v in warm.items()},
+            {k: [m.id for m in v] for k, v in cold.items()},
+        )
+
+    def test_tool_definitions_shrink_the_rag_allowance(self):
+        def rag_limit(description):
+            registry = MagicMock()
+            registry.get_llm_tool_schemas.return_value = [
+                {"type": "function", "function": {"name": "state.query", "description": description, "parameters": {}}}
+            ]
+            prefetcher = TurnPrefetcher(self.db_path, registry, None, self.engine, history_limit=50)
+            budget = TokenBudget.from_env()
+            budget.sizes.update(prefetcher._build(self.game_session).section_tokens)
+            return budget.sizes["tools"], budget.limit("rag")
+
+        small_tools, small_rag = rag_limit("Reads state.")
+        large_tools, large_rag = rag_limit("Reads state. " * 2000)
+        self.assertGreater(large_tools, small_tools)
+        self.assertLess(large_rag, small_rag)
+
+    def test_changes_invalidate_the_key(self):
+        prefetch = self.prefetcher._build(self.game_session)
+        manifest = self.db.manifests.get_by_id(self.manifest_id)
+
+        self.db.game_state.set_entity(self.game_session.id, "character", "player", {"name": "Bryn"})
+        session = self._turn_session("Hello")
+        key = self.prefetcher.make_key(self.db, self.game_session, session, self.manifest_id)
+        self.assertFalse(prefetch.matches(key, manifest))
+
+        prefetch = self.prefetcher._build(self.game_session)
+        lore = self.db.memories.create(self.game_session.id, MemoryKind.LORE, "The duke is alive")
+        key = self.prefetcher.make_key(self.db, self.game_session, session, self.manifest_id)
+        self.assertFalse(prefetch.matches(key, manifest))
+
+        # An edit that keeps the content's length is still a change
+        prefetch = self.prefetcher._build(self.game_session)
+        key = self.prefetcher.make_key(self.db, self.game_session, session, self.manifest_id)
+        self.assertTrue(prefetch.matches(key, manifest))
+        self.db.memories.update(lore.id, content="The duke is dead!")
+        key = self.prefetcher.make_key(self.db, self.game_session, session, self.manifest_id)
+        self.assertFalse(prefetch.matches(key, manifest))
+
+    def test_take_cancels_a_job_still_waiting_on_background_work(self):
+        release = threading.Event()
+        self.prefetcher.wait_for_background = lambda session_id, timeout: release.wait(timeout)
+        thread = self.prefetcher.schedule(self.game_session)
+
+        self.assertIsNone(self.prefetcher.take(self.game_session.id))
+        release.set()
+        thread.join(5)
+        self.assertIsNone(self.prefetcher.take(self.game_session.id))
+
+    def test_take_returns_a_finished_prefetch_once(self):
+        self.prefetcher.schedule(self.game_session).join(10)
+
+        prefetch = self.prefetcher.take(self.game_session.id)
+        self.assertIsNotNone(prefetch)
+        self.assertIsNotNone(prefetch.candidates)
+        self.assertIsNone(self.prefetcher.take(self.game_session.id))
+
+
+if __name__ == "__main__":
+    unittest.main()
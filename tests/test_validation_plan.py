@@ -0,0 +1,87 @@
+import copy
+from pathlib import Path
+
+from app.prefabs.manifest import EngineConfig, FieldDef, SystemManifest
+from app.prefabs.validation import get_validation_plan, validate_entity
+
+MANIFESTS = Path(__file__).resolve().parents[1] / "app" / "data" / "manifests"
+
+
+def _manifest() -> SystemManifest:
+    return SystemManifest(
+        id="test",
+        name="Test",
+        engine=EngineConfig(dice="d20", mechanic="", success="", crit=""),
+        fields=[
+            # Declared before its input on purpose: the plan must order by dependency
+            FieldDef(path="combat.ac", label="AC", prefab="VAL_INT", category="combat", formula="10 + dex_mod + combat.armor"),
+            FieldDef(path="combat.armor", label="Armor", prefab="VAL_INT", category="combat", formula="armor_base"),
+            FieldDef(path="attributes.dex", label="DEX", prefab="VAL_COMPOUND", category="attributes"),
+            FieldDef(path="attributes.con", label="CON", prefab="VAL_COMPOUND", category="attributes"),
+            FieldDef(path="resources.hp", label="HP", prefab="RES_POOL", category="resources", max_formula="10 + con_mod"),
+            FieldDef(path="armor_base", label="Base Armor", prefab="VAL_INT", category="combat"),
+        ],
+        aliases={
+            "dex_mod": "(attributes.dex.score - 10) / 2",
+            "con_mod": "(attributes.con.score - 10) / 2",
+        },
+    )
+
+
+def test_plan_orders_formulas_by_dependency():
+    plan = get_validation_plan(_manifest())
+    order = [n.output for n in plan.nodes]
+    assert order.index("combat.armor") < order.index("combat.ac")
+    assert order.index("dex_mod") < order.index("combat.ac")
+
+
+def test_plan_is_cached_per_manifest():
+    manifest = _manifest()
+    assert get_validation_plan(manifest) is get_validation_plan(manifest)
+    manifest.aliases = {**manifest.aliases, "str_mod": "0"}
+    assert "str_mod" in get_validation_plan(manifest).aliases
+
+
+def test_full_validation_computes_derived_values():
+    entity, _ = validate_entity({"attributes": {"dex": {"score": 14}, "con": {"score": 16}}, "armor_base": 2}, _manifest())
+    assert entity["combat"] == {"ac": 14, "armor": 2}
+    assert entity["resources"]["hp"]["max"] == 13
+
+
+def test_incremental_validation_only_touches_downstream_fields():
+    manifest = _manifest()
+    entity, _ = validate_entity({"attributes": {"dex": {"score": 14}, "con": {"score": 16}}}, manifest)
+
+    # Make an unrelated derived value stale: a targeted update must not recompute it
+    entity["combat"]["ac"] = 99
+    entity["resources"]["hp"]["current"] = 50
+    before = copy.deepcopy(entity)
+
+    updated, changes = validate_entity(entity, manifest, changed_paths=["resources.hp.current"])
+
+    assert updated["resources"]["hp"] == {"current": 13, "max": 13}
+    assert updated["combat"]["ac"] == 99
+    assert changes == ["HP: 50 -> 13"]
+    assert entity == before  # input untouched
+    assert updated["attributes"] is entity["attributes"]  # unchanged branches are shared, not copied
+
+
+def test_incremental_validation_propagates_through_aliases():
+    manifest = _manifest()
+    entity, _ = validate_entity({"attributes": {"dex": {"score": 10}, "con": {"score": 10}}}, manifest)
+    entity["attributes"]["dex"]["score"] = 18
+
+    updated, _ = validate_entity(entity, manifest, changed_paths=["attributes.dex.score"])
+    assert updated["combat"]["ac"] == 14
+    assert updated["attributes"]["dex"] == {"score": 18, "mod": 4}
+
+
+def test_incremental_matches_full_on_bundled_manifest():
+    manifest = SystemManifest.from_file(MANIFESTS / "dnd_35e.json")
+    base, _ = validate_entity({}, manifest)
+
+    entity = copy.deepcopy(base)
+    entity["attributes"]["dex"]["score"] = 17
+    incremental, _ = validate_entity(entity, manifest, changed_paths=["attributes.dex.score"])
+    full, _ = validate_entity(entity, manifest)
+    assert incremental == full
@@ -0,0 +1,79 @@
+import threading
+import unittest
+from collections import OrderedDict
+from unittest.mock import MagicMock
+
+import numpy as np
+
+from app.core.vector_store import VectorStore
+
+
+class TestVectorStoreBatching(unittest.TestCase):
+    def setUp(self):
+        # Bypass __init__ so no Chroma client or model download is needed
+        self.vs = VectorStore.__new__(VectorStore)
+        self.vs.embed_batch_size = 2
+        self.vs.embed_model_name = "test-model"
+        self.vs.embed_cache_size = 4
+        self.vs._embed_cache = OrderedDict()
+        self.vs._embed_cache_lock = threading.Lock()
+        self.vs.embed_cache_hits = 0
+        self.vs.embed_cache_misses = 0
+        self.vs.client = MagicMock()
+        self.vs.client.get_max_batch_size.return_value = 100
+        self.vs.embed_model = MagicMock()
+        self.vs.embed_model.embed.side_effect = lambda texts, batch_size: (np.array([float(len(t))]) for t in texts)
+        self.vs.memories_collection = MagicMock()
+        self.vs.turn_collection = MagicMock()
+
+    def test_embed_many_preserves_order(self):
+        self.assertEqual(self.vs.embed_many(["a", "abc", "ab"]), [[1.0], [3.0], [2.0]])
+        self.vs.embed_model.embed.assert_called_once_with(["a", "abc", "ab"], batch_size=2)
+
+    def test_embed_cache_reuses_vectors(self):
+        self.vs.embed_many(["goblin  attack"])
+        self.assertEqual(self.vs.embed_many(["goblin attack ", "new"]), [[13.0], [3.0]])
+
+        info = self.vs.embed_cache_info()
+        self.assertEqual((info["hits"], info["misses"]), (1, 2))
+        self.assertEqual(self.vs.embed_model.embed.call_args.args[0], ["new"])
+
+    def test_embed_cache_is_bounded(self):
+        self.vs.embed_many([f"text {i}" for i in range(10)])
+        self.assertEqual(self.vs.embed_cache_info()["size"], 4)
+        self.vs.embed_many(["text 9"])
+        self.assertEqual(self.vs.embed_cache_hits, 1)
+
+    def test_note_embedded_once_for_dedup_and_upsert(self):
+        self.vs.memories_collection.query.return_value = {"ids": [[]], "metadatas": [[]], "distances": [[]], "documents": [[]]}
+        self.vs.search_memories(1, "The king is dead", k=5)
+        self.vs.upsert_memory(1, 5, "The king is dead", "lore", [], 3)
+        self.assertEqual(self.vs.embed_model.embed.call_count, 1)
+
+    def test_upsert_memories_bulk_chunks_writes(self):
+        mems = [
+            {"memory_id": i, "text": "x" * i, "kind": "lore", "tags": ["t"], "priority": 3}
+            for i in range(1, 6)
+        ]
+        self.vs.upsert_memories_bulk(7, mems)
+
+        calls = self.vs.memories_collection.upsert.call_args_list
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(calls[0].kwargs["ids"], ["7:1", "7:2"])
+        self.assertEqual(calls[2].kwargs["embeddings"], [[5.0]])
+
+    def test_single_upsert_uses_bulk_path(self):
+        self.vs.upsert_memory(1, 42, "hello", "fact", [], 2)
+        call = self.vs.memories_collection.upsert.call_args
+        self.assertEqual(call.kwargs["ids"], ["1:42"])
+        self.assertEqual(call.kwargs["metadatas"][0]["priority"], 2)
+
+    def test_add_turns_bulk(self):
+        turns = [{"round_number": n, "summary": "s", "tags": [], "importance": 1} for n in (1, 2, 3)]
+        self.vs.add_turns_bulk(3, 9, turns)
+        ids = [i for c in self.vs.turn_collection.upsert.call_args_list for i in c.kwargs["ids"]]
+        self.assertEqual(ids, ["3_1", "3_2", "3_3"])
+
+
+if __name__ == "__main__":
+    unittest.main()
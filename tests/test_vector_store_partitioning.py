@@ -0,0 +1,108 @@
+import shutil
+import tempfile
+import threading
+import unittest
+from collections import OrderedDict
+from unittest.mock import MagicMock
+
+import chromadb
+import numpy as np
+from chromadb.config import Settings
+
+from app.core.vector_store import PARTITION_SESSION, VectorStore
+
+
+def _store(client) -> VectorStore:
+    # Bypass __init__ so no model download is needed; Chroma itself is real
+    vs = VectorStore.__new__(VectorStore)
+    vs.client = client
+    vs.turn_collection = client.get_or_create_collection("turn_metadata", metadata={"hnsw:space": "cosine"})
+    vs.memories_collection = client.get_or_create_collection("memories", metadata={"hnsw:space": "cosine"})
+    vs._session_collections = {}
+    vs._session_collections_lock = threading.Lock()
+    vs.embed_batch_size = 16
+    vs.embed_model_name = "test-model"
+    vs.embed_cache_size = 0
+    vs._embed_cache = OrderedDict()
+    vs._embed_cache_lock = threading.Lock()
+    vs.embed_cache_hits = 0
+    vs.embed_cache_misses = 0
+    vs.embed_model = MagicMock()
+    vs.embed_model.embed.side_effect = lambda texts, batch_size: (np.array([float(len(t)), 1.0]) for t in texts)
+    return vs
+
+
+class TestVectorStorePartitioning(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path, True)
+        self.client = chromadb.PersistentClient(path=self.path, settings=Settings(anonymized_telemetry=False))
+
+    def _names(self):
+        return sorted(c.name if hasattr(c, "name") else c for c in self.client.list_collections())
+
+    def _index(self, vs):
+        for sid in (1, 2):
+            vs.upsert_memories_bulk(sid, [
+                {"memory_id": i, "text": f"memory {sid}-{i}", "kind": "lore", "tags": ["t"], "priority": 3} for i in range(3)
+            ])
+            vs.add_turns_bulk(sid, 9, [{"round_number": 1, "summary": "a turn", "tags": [], "importance": 3}])
+
+    def test_session_collections_are_created_lazily(self):
+        vs = _store(self.client)
+        vs.partitioning = PARTITION_SESSION
+
+        self.assertEqual(vs.search_memories(1, "memory"), [])
+        self.assertEqual(self._names(), ["memories", "turn_metadata"])
+
+        self._index(vs)
+        self.assertIn("memories_s1", self._names())
+        hits = vs.search_memories(1, "memory", k=50)
+        self.assertEqual(sorted(h["memory_id"] for h in hits), [0, 1, 2])
+        self.assertEqual(len(vs.search_relevant_turns(2, "turn")), 1)
+        self.assertEqual(vs.memories_collection.count(), 0)
+
+        vs.delete_memory(1, 0)
+        self.assertEqual(len(vs.search_memories(1, "memory", k=50)), 2)
+
+        vs.delete_session_data(1)
+        self.assertNotIn("memories_s1", self._names())
+        self.assertNotIn("turn_metadata_s1", self._names())
+        self.assertEqual(vs.search_memories(1, "memory"), [])
+        self.assertEqual(len(vs.search_memories(2, "memory", k=50)), 3)
+
+    def test_unmigrated_sessions_fall_back_to_shared_collection(self):
+        self._index(_store(self.client))
+
+        vs = _store(self.client)
+        vs.partitioning = PARTITION_SESSION
+        self.assertEqual(sorted(h["memory_id"] for h in vs.search_memories(1, "memory", k=50)), [0, 1, 2])
+        self.assertEqual(vs.search_relevant_turns(2, "turn")[0]["summary"], "a turn")
+
+        # New writes land in the session's collection; an edited copy shadows the shared one
+        vs.upsert_memory(1, 1, "memory 1-1 edited", "lore", [], 3)
+        hits = vs.search_memories(1, "memory", k=50)
+        self.assertEqual(sorted(h["memory_id"] for h in hits), [0, 1, 2])
+        self.assertIn("memory 1-1 edited", [h["content"] for h in hits])
+
+        vs.delete_memory(1, 1)
+        self.assertEqual(sorted(h["memory_id"] for h in vs.search_memories(1, "memory", k=50)), [0, 2])
+        self.assertEqual(vs.memories_collection.count(), 5)
+
+    def test_migration_moves_shared_records(self):
+        shared = _store(self.client)
+        self._index(shared)
+        self.assertEqual(shared.memories_collection.count(), 6)
+
+        vs = _store(self.client)
+        vs.partitioning = PARTITION_SESSION
+        self.assertEqual(vs.migrate_to_session_collections(batch_size=2), {1: 4, 2: 4})
+
+        self.assertEqual((vs.memories_collection.count(), vs.turn_collection.count()), (0, 0))
+        self.assertEqual(len(vs.search_memories(2, "memory", k=50)), 3)
+        self.assertEqual(vs.search_relevant_turns(1, "turn")[0]["summary"], "a turn")
+        self.assertEqual(vs.embed_model.embed.call_count, 2)  # only the two queries were embedded
+
+
+if __name__ == "__main__":
+    unittest.main()
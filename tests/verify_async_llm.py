@@ -9,6 +9,7 @@ from pydantic import BaseModel
 from app.llm.gemini_connector import GeminiConnector
 from app.llm.llm_connector import LLMConnector
 from app.llm.openai_connector import OpenAIConnector
+from app.llm.replay_connector import ReplayConnector
 from app.models.message import Message
 
 logging.basicConfig(level=logging.INFO)
@@ -79,6 +80,9 @@ async def main():
     connector: LLMConnector
     if provider == "GEMINI":
         connector = GeminiConnector()
+    elif provider == "REPLAY":
+        # Offline: serves a cassette recorded with LLM_RECORD_CASSETTE (LLM_REPLAY_LATENCY for timings)
+        connector = ReplayConnector.from_env()
     else:
         connector = OpenAIConnector()
 
@@ -0,0 +1,73 @@
+import os
+import re
+import sys
+import timeit
+from pathlib import Path
+
+from simpleeval import simple_eval
+
+# Add project root to sys.path
+sys.path.append(os.getcwd())
+
+from app.prefabs.formula import SAFE_FUNCTIONS, build_formula_context, compile_formula, evaluate, path_to_identifier
+from app.prefabs.manifest import SystemManifest
+from app.prefabs.validation import validate_entity
+
+MANIFEST_PATH = Path(__file__).resolve().parents[1] / "app" / "data" / "manifests" / "dnd_35e.json"
+ITERATIONS = 200
+
+
+def legacy_evaluate(formula: str, context: dict, default: float = 0.0) -> float:
+    """The pre-compilation path: regex-rewrite every dotted key, then simple_eval from scratch."""
+    try:
+        prepared = formula
+        for key in sorted(context.keys(), key=len, reverse=True):
+            if "." in key:
+                prepared = re.sub(rf"\b{re.escape(key)}\b", path_to_identifier(key), prepared)
+        names = {path_to_identifier(k): v for k, v in context.items()}
+        result = simple_eval(prepared, names=names, functions=SAFE_FUNCTIONS)
+        if isinstance(result, bool):
+            return 1.0 if result else 0.0
+        return float(result)
+    except Exception:
+        return default
+
+
+def collect_formulas(manifest: SystemManifest) -> list[str]:
+    formulas = list((manifest.aliases or {}).values())
+    for field in manifest.fields:
+        formulas.extend(f for f in (field.formula, field.max_formula) if f)
+    return formulas
+
+
+def benchmark_formula_evaluation():
+    print("Starting formula evaluation benchmark...")
+    manifest = SystemManifest.from_file(MANIFEST_PATH)
+    entity, _ = validate_entity({}, manifest)
+    context = build_formula_context(entity, manifest.aliases)
+    formulas = collect_formulas(manifest)
+    print(f"Manifest '{manifest.id}': {len(formulas)} formulas, {len(context)} context keys")
+
+    mismatches = [f for f in formulas if legacy_evaluate(f, context) != evaluate(f, context)]
+    for formula in mismatches:
+        print(f"  differs: {formula!r} legacy={legacy_evaluate(formula, context)} compiled={evaluate(formula, context)}")
+
+    legacy = timeit.timeit(lambda: [legacy_evaluate(f, context) for f in formulas], number=ITERATIONS)
+    compiled = timeit.timeit(lambda: [evaluate(f, context) for f in formulas], number=ITERATIONS)
+
+    # Slot-array evaluation: values resolved once up front, no context lookups at all
+    programs = [compile_formula(f) for f in formulas]
+    slot_values = [[context.get(s, 0.0) for s in p.slots] for p in programs]
+    slotted = timeit.timeit(
+        lambda: [p.evaluate_slots(v) for p, v in zip(programs, slot_values, strict=True)], number=ITERATIONS
+    )
+
+    per_pass = 1e6 / ITERATIONS
+    print(f"Legacy (regex + simple_eval): {legacy * per_pass:9.1f} us per manifest pass")
+    print(f"Compiled (dict context):      {compiled * per_pass:9.1f} us per manifest pass ({legacy / compiled:.1f}x)")
+    print(f"Compiled (slot array):        {slotted * per_pass:9.1f} us per manifest pass ({legacy / slotted:.1f}x)")
+    print(f"Formulas with differing results: {len(mismatches)}")
+
+
+if __name__ == "__main__":
+    benchmark_formula_evaluation()